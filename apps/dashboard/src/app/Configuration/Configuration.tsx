@@ -109,7 +109,7 @@ export function Configuration() {
 								<div className="flex-1">
 									<MultiCombobox
 										label="Blacklisted Processes"
-										description="Enter distractions for your mom to block (e.g., chrome, steam)."
+										description="Enter distractions for your mom to block (e.g., chrome, steam). Prefix with name:, glob: or path: for exact names, wildcards or folders."
 										placeholder="Type process name and press Enter or Add"
 										items={[]}
 										onValueChange={field.onChange}
@@ -10,6 +10,7 @@ export const configSchema = z.object({
 	nag: z.array(z.string()).min(1, "At least one nag message is required"),
 	screenshotFreqMin: z.number().min(1).max(60).optional(),
 	slipperEnabled: z.boolean(),
+	runtimeMode: z.enum(["processes", "async"]).optional(),
 });
 
 export type Config = z.infer<typeof configSchema>;
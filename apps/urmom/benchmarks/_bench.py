@@ -0,0 +1,62 @@
+"""
+Shared helpers for the urmom benchmark scripts.
+
+Benchmarks are plain scripts run from apps/urmom, e.g.
+    uv run benchmarks/ipc_latency.py --json results/ipc.json
+Every script prints a human readable summary and can also write its
+results as JSON so runs can be compared over time.
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+SRC_DIR = os.path.join(APP_DIR, "src")
+
+# Make the app's top-level packages (features, utils) importable
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(values):
+    """Returns count/mean/p50/p95/p99/max for a list of numbers."""
+    if not values:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values),
+    }
+
+
+def emit(name, results, json_path=None):
+    """Prints results and optionally writes them, with run metadata, as JSON."""
+    report = {
+        "benchmark": name,
+        "timestamp": time.time(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if json_path:
+        os.makedirs(os.path.dirname(os.path.abspath(json_path)), exist_ok=True)
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
@@ -0,0 +1,76 @@
+"""
+Lookup latency and hit rate of the negotiate_time() excuse cache.
+
+Seeds the cache with typical excuses, then looks up exact repeats,
+reworded or misspelt repeats, and unrelated excuses. Reports per-lookup
+latency for each kind, and how many paraphrases were recognised. Every
+one of them should be; none of the unrelated excuses should be.
+
+    uv run benchmarks/bargain_cache.py [--filler 200] [--repeat 2000] [--json out.json]
+"""
+
+import argparse
+import random
+import time
+
+import _bench
+from features.bargain.cache import ExcuseCache
+
+SEEDED = [
+    "I need to finish my math homework, it's due tomorrow!",
+    "Please mom! Everyone else is still online!",
+    "Just 5 more minutes, I'm almost done with this level",
+    "I have to study for my chemistry exam",
+    "My friends are waiting for me in the game",
+]
+PARAPHRASES = [
+    "i need to finish my math homework its due tomorrow",
+    "mom pls i need to finish my maths homework, due tomorrow!!",
+    "Everyone else is online!!! please",
+    "10 more minutes, almost done with this level",
+    "i have to study for my chem exam",
+    "my friends r waiting for me in the game mom",
+]
+UNRELATED = [
+    "I want to watch one more anime episode",
+    "The internet was down earlier so I lost time",
+    "Can I reply to my teacher's email first",
+]
+
+
+def _filler(count, seed=0):
+    rng = random.Random(seed)
+    words = "project essay reading video call music drawing coding lecture notes slides test quiz chapter".split()
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(3, 8))) + f" {i}" for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filler", type=int, default=200, help="extra unrelated entries in the cache")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--json")
+    args = parser.parse_args()
+
+    reply = {"minutes": 20, "reply": "Okay, 20 minutes.", "slipper": False}
+    cache = ExcuseCache(size=len(SEEDED) + args.filler)
+    for excuse in _filler(args.filler) + SEEDED:
+        cache.put(excuse, reply)
+
+    results = {"entries": len(cache)}
+    for kind, excuses in (("exact", SEEDED), ("paraphrase", PARAPHRASES), ("unrelated", UNRELATED)):
+        hits = sum(cache.lookup(excuse) is not None for excuse in excuses)
+        samples = []
+        for i in range(args.repeat):
+            excuse = excuses[i % len(excuses)]
+            start = time.perf_counter()
+            cache.lookup(excuse)
+            samples.append(time.perf_counter() - start)
+        results[kind] = {
+            "recognised": f"{hits}/{len(excuses)}",
+            "lookup_us": {k: v * 1e6 if k != "count" else v for k, v in _bench.summarize(samples).items()},
+        }
+    _bench.emit("bargain_cache", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
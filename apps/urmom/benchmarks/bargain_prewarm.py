@@ -0,0 +1,153 @@
+"""
+Cold vs prewarmed first bargain of the night.
+
+Every run is a fresh Python process, like the lights-out worker, that makes
+one streamed bargain against the local LLM stand-in (llm_server.py):
+
+  cold:  the excuse goes straight to negotiate_stream(), paying for the
+         litellm import, model metadata and the first connection itself.
+  warm:  bargain.prewarm() runs first, then --gap seconds pass (the
+         manager prewarms a few minutes before the warning), then the
+         same excuse is sent.
+
+Reports time to the first reply text and to the complete reply for both,
+and the prewarm steps. With --dialog it also times how long the warning
+dialog takes to appear, built on the spot vs by prepare_dialog() (Qt
+offscreen platform, needs PyQt6).
+
+The stand-in is plain HTTP on localhost, so DNS and TLS, which a real
+provider adds to every cold call, are not part of the cold numbers here.
+
+    uv run benchmarks/bargain_prewarm.py [--runs 5] [--gap 1] [--dialog] [--json out.json]
+        [--latency-ms 800 --token-ms 20]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import _bench
+import llm_server
+
+EXCUSE = "I need to finish my math homework, it's due tomorrow!"
+
+
+def _child(args):
+    import llm_flows
+
+    llm_flows._configure_env(args.url, args.workdir)
+    result = {}
+    if args.dialog:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        result["dialog_ms"] = _time_dialog(args.mode) * 1000
+
+    from features.bargain import bargain
+
+    if args.mode == "warm":
+        timings = bargain.prewarm()
+        result["prewarm_ms"] = {step: seconds * 1000 for step, seconds in (timings or {}).items()}
+        time.sleep(args.gap)
+
+    start = time.perf_counter()
+    first_text = []
+
+    def on_update(fields):
+        if not first_text and fields.get("reply"):
+            first_text.append(time.perf_counter() - start)
+
+    reply = bargain.negotiate_stream(EXCUSE, on_update, cache=None)
+    result["total_ms"] = (time.perf_counter() - start) * 1000
+    result["fail_safe"] = reply == bargain.FAIL_SAFE_REPLY
+    # The fail-safe reply shows up fast because nothing answered
+    result["first_text_ms"] = first_text[0] * 1000 if first_text and not result["fail_safe"] else None
+    print(json.dumps(result))
+
+
+def _time_dialog(mode):
+    """Seconds from the warning being due to the dialog being on screen."""
+    if mode == "warm":
+        from features.lights_out import gui
+
+        gui.prepare_dialog(15)
+    start = time.perf_counter()
+    # Cold, this is where PyQt6 gets imported, as in the manager
+    from PyQt6.QtWidgets import QApplication
+
+    from features.lights_out import gui
+
+    app = gui._application()
+    dialog, gui._prepared = gui._prepared, None
+    if dialog is None:
+        dialog = gui.LightsOutDialog(15)
+    dialog.show()
+    QApplication.processEvents()
+    elapsed = time.perf_counter() - start
+    dialog.close()
+    app.processEvents()
+    return elapsed
+
+
+def _run(mode, args, url, workdir):
+    command = [sys.executable, os.path.abspath(__file__), "--child", mode, "--url", url, "--workdir", workdir]
+    command += ["--gap", str(args.gap)] + (["--dialog"] if args.dialog else [])
+    out = subprocess.run(command, capture_output=True, text=True, check=True, cwd=_bench.APP_DIR).stdout
+    # The app prints as it goes; the result is the last line
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _summary_ms(runs, key):
+    return _bench.summarize([run[key] for run in runs if run.get(key) is not None])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per mode")
+    parser.add_argument("--gap", type=float, default=1.0, help="seconds between prewarm and the bargain")
+    parser.add_argument("--dialog", action="store_true", help="also time the warning dialog (needs PyQt6)")
+    parser.add_argument("--json")
+    parser.add_argument("--child", choices=["cold", "warm"], dest="mode", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    llm_server.add_server_arguments(parser)
+    args = parser.parse_args()
+
+    if args.mode:
+        _child(args)
+        return
+
+    server = llm_server.StandInServer(llm_server.config_from_args(args)).start()
+    results = {"server": {**vars(server.config), "script": args.script or "default"}, "gap_s": args.gap}
+    with tempfile.TemporaryDirectory(prefix="urmom-prewarm-bench-") as workdir:
+        runs = {"cold": [], "warm": []}
+        # Interleaved, so drift on the machine hits both modes alike
+        for _ in range(args.runs):
+            for mode in runs:
+                runs[mode].append(_run(mode, args, server.url, workdir))
+    server.stop()
+
+    for mode, mode_runs in runs.items():
+        summary = {
+            "first_text_ms": _summary_ms(mode_runs, "first_text_ms"),
+            "total_ms": _summary_ms(mode_runs, "total_ms"),
+            "fail_safe_replies": sum(run["fail_safe"] for run in mode_runs),
+        }
+        if args.dialog:
+            summary["dialog_ms"] = _summary_ms(mode_runs, "dialog_ms")
+        if mode == "warm":
+            steps = {step for run in mode_runs for step in run.get("prewarm_ms", {})}
+            summary["prewarm_ms"] = {
+                step: _bench.summarize([run["prewarm_ms"][step] for run in mode_runs if step in run["prewarm_ms"]])
+                for step in sorted(steps)
+            }
+        results[mode] = summary
+    cold, warm = results["cold"]["first_text_ms"]["p50"], results["warm"]["first_text_ms"]["p50"]
+    results["first_text_saved_ms_p50"] = cold - warm
+    _bench.emit("bargain_prewarm", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Compares the old blacklist matching loop (every process x every entry,
+lowercasing the path each time) with the compiled BlacklistMatcher.
+
+Uses synthetic process names and paths, so it runs anywhere. The
+substring-only run checks both find the same processes; the mixed run
+shows the cost of the other rule types.
+
+    uv run benchmarks/blacklist_matcher.py [--patterns 1000] [--processes 5000] [--json out.json]
+"""
+
+import argparse
+import random
+import string
+import time
+
+import _bench
+from features.windows_api.matcher import BlacklistMatcher
+
+
+def _word(rng, low=4, high=12):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(low, high)))
+
+
+def make_processes(count, rng):
+    roots = ["C:\\Program Files", "C:\\Program Files (x86)", "C:\\Windows\\System32", "C:\\Users\\me\\AppData\\Local"]
+    procs = []
+    for pid in range(count):
+        name = _word(rng) + ".exe"
+        exe = None if rng.random() < 0.05 else f"{rng.choice(roots)}\\{_word(rng)}\\{name}"
+        procs.append({"pid": pid, "name": name, "exe": exe})
+    return procs
+
+
+def make_patterns(count, procs, rng, mixed):
+    """Roughly 1% of patterns hit a real process; the rest are noise."""
+    patterns = []
+    for _ in range(count):
+        proc = rng.choice(procs)
+        hit = rng.random() < 0.01
+        name = proc["name"] if hit else _word(rng) + ".exe"
+        kind = rng.choice(["", "", "name:", "glob:", "path:"]) if mixed else ""
+        if kind == "glob:":
+            name = name[:3] + "*" + name[-4:]
+        elif kind == "path:":
+            name = (proc["exe"] or name)[:20] if hit else "D:\\" + _word(rng)
+        patterns.append(kind + name)
+    return patterns
+
+
+def legacy_scan(procs, blacklisted_processes):
+    """The pre-matcher loop from blacklist._scan."""
+    found = []
+    for info in procs:
+        for name in blacklisted_processes:
+            exe_lower = info["exe"].lower() if info["exe"] else ""
+            if name.lower() in exe_lower:
+                found.append(info["pid"])
+    return found
+
+
+def matcher_scan(procs, matcher):
+    return [info["pid"] for info in procs if matcher.match(info["name"], info["exe"])]
+
+
+def _time(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patterns", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    procs = make_processes(args.processes, rng)
+    results = {}
+
+    patterns = make_patterns(args.patterns, procs, rng, mixed=False)
+    compile_s, matcher = _time(lambda: BlacklistMatcher(patterns), args.repeat)
+    legacy_s, legacy_found = _time(lambda: legacy_scan(procs, patterns), args.repeat)
+    new_s, new_found = _time(lambda: matcher_scan(procs, matcher), args.repeat)
+    # Processes without an exe now fall back to their name, so compare only the ones that have one
+    with_exe = {p["pid"] for p in procs if p["exe"]}
+    results["substring"] = {
+        "legacy_scan_ms": legacy_s * 1000,
+        "matcher_compile_ms": compile_s * 1000,
+        "matcher_scan_ms": new_s * 1000,
+        "speedup": legacy_s / new_s,
+        "same_matches": set(legacy_found) == set(new_found) & with_exe,
+        "matches": len(set(new_found)),
+    }
+
+    mixed = make_patterns(args.patterns, procs, rng, mixed=True)
+    compile_s, matcher = _time(lambda: BlacklistMatcher(mixed), args.repeat)
+    new_s, new_found = _time(lambda: matcher_scan(procs, matcher), args.repeat)
+    results["mixed_rule_types"] = {
+        "matcher_compile_ms": compile_s * 1000,
+        "matcher_scan_ms": new_s * 1000,
+        "matches": len(new_found),
+    }
+
+    _bench.emit("blacklist_matcher", {"patterns": args.patterns, "processes": args.processes, **results}, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Records the live process table, or replays a recording through the
+blacklist matcher, watcher and enforcement path with termination stubbed
+out. Runs on any OS, so blacklist performance can be checked on Linux
+against churn captured on a real Windows machine.
+
+    uv run benchmarks/blacklist_replay.py record procs.jsonl.gz [--duration 600] [--interval 0.25]
+    uv run benchmarks/blacklist_replay.py replay procs.jsonl.gz --blacklist steam.exe cs2.exe [--json out.json]
+    uv run benchmarks/blacklist_replay.py replay --synthetic 5000 [--duration 300]
+
+A synthetic run generates its own churn, including blacklisted launchers
+with child processes, when no recording is at hand.
+"""
+
+import argparse
+import random
+import time
+
+import _bench
+from features.windows_api import snapshot
+from features.windows_api.blacklist import create_watcher, is_blacklisted, watch_once
+from features.windows_api.enforcer import TerminationReport
+from features.windows_api.matcher import BlacklistMatcher
+from features.windows_api.watcher import POLL_INTERVAL_SECONDS
+
+OLD_SCAN_INTERVAL = 10.0
+SYNTHETIC_BLACKLIST = ["steam.exe", "valorant.exe", "name:cs2.exe"]
+
+
+def synthesize(size, duration, churn_per_second=2.0, blacklisted_starts=20, seed=0):
+    """Frames in the recording format, for runs without a real recording."""
+    rng = random.Random(seed)
+    next_pid = [1000]
+
+    def row(name, ppid, t):
+        next_pid[0] += 4
+        return [next_pid[0], ppid, 1_700_000_000 + t, name, f"C:\\Program Files\\{name[:-4]}\\{name}"]
+
+    frames = {0.0: {"t": 0.0, "start": [row(f"app{i}.exe", 4, 0.0) for i in range(size)], "exit": []}}
+    alive = [r[0] for r in frames[0.0]["start"]]
+
+    def frame(t):
+        t = round(t, 2)
+        return frames.setdefault(t, {"t": t, "start": [], "exit": []})
+
+    t = 0.0
+    while t < duration:
+        t += rng.expovariate(churn_per_second)
+        started = row(f"worker{rng.randint(0, 50)}.exe", 4, t)
+        frame(t)["start"].append(started)
+        # A short-lived helper exits a few seconds later
+        frame(t + rng.uniform(1, 30))["exit"].append(started[0])
+    for _ in range(blacklisted_starts):
+        t = rng.uniform(1, duration)
+        launcher = row(rng.choice(["steam.exe", "valorant.exe", "cs2.exe"]), rng.choice(alive), t)
+        children = [row("steamwebhelper.exe", launcher[0], t + 0.1) for _ in range(rng.randint(0, 4))]
+        frame(t)["start"].append(launcher)
+        frame(t + 0.1)["start"].extend(children)
+    return [frames[k] for k in sorted(frames)]
+
+
+def replay(frames, blacklist, strategy):
+    source = snapshot.ReplaySource(frames)
+    watcher = create_watcher(blacklist, source, clock=lambda: source.now)
+    matcher = BlacklistMatcher(blacklist)
+    interval = OLD_SCAN_INTERVAL if strategy == "full_scan" else POLL_INTERVAL_SECONDS
+
+    def stub_terminate(infos):
+        # Ends the whole tree in the replay instead of on the machine
+        report = TerminationReport()
+        pending = [info["pid"] for info in infos]
+        while pending:
+            pid = pending.pop()
+            pending.extend(source.children(pid))
+            source.kill(pid)
+            report.terminated.append(pid)
+        return report
+
+    latencies = []
+    tick_seconds = []
+    inspected = 0
+    terminated = 0
+    end = frames[-1]["t"] + interval if frames else 0.0
+    t = 0.0
+    while t <= end:
+        source.advance(t)
+        start = time.perf_counter()
+        if strategy == "full_scan":
+            pids = list(source.pids())
+            inspected += len(pids)
+            infos = [source.info(pid) for pid in pids]
+            matches = [(info, rule) for info in infos if info and (rule := is_blacklisted(info, matcher))]
+            report = stub_terminate([info for info, _ in matches]) if matches else None
+        else:
+            before = watcher.inspected
+            matches, report = watch_once(watcher, None, stub_terminate)
+            inspected += watcher.inspected - before
+        tick_seconds.append(time.perf_counter() - start)
+
+        for info, _ in matches:
+            latencies.append(t - source.started_at[info["pid"]])
+        if report:
+            terminated += report.count("terminated")
+        t += interval
+
+    busy = sum(tick_seconds)
+    return {
+        "ticks": len(tick_seconds),
+        "processes_inspected": inspected,
+        "cpu_seconds": busy,
+        "inspected_per_cpu_second": inspected / busy if busy else 0.0,
+        "tick_ms": {k: v * 1000 if k != "count" else v for k, v in _bench.summarize(tick_seconds).items()},
+        "detection_latency_s": _bench.summarize(latencies),
+        "matches": len(latencies),
+        "terminated_including_children": terminated,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="capture the live process table")
+    rec.add_argument("path")
+    rec.add_argument("--duration", type=float, default=600.0)
+    rec.add_argument("--interval", type=float, default=0.25)
+
+    rep = sub.add_parser("replay", help="run a recording through the blacklist path")
+    rep.add_argument("path", nargs="?")
+    rep.add_argument("--blacklist", nargs="+")
+    rep.add_argument("--synthetic", type=int, metavar="PROCESSES", help="generate churn instead of loading a recording")
+    rep.add_argument("--duration", type=float, default=300.0, help="length of a synthetic run")
+    rep.add_argument("--json")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        snapshot.record(args.path, args.duration, args.interval)
+        return
+
+    if args.synthetic:
+        frames = synthesize(args.synthetic, args.duration)
+        blacklist = args.blacklist or SYNTHETIC_BLACKLIST
+        origin = f"synthetic:{args.synthetic}"
+    elif args.path:
+        _, frames = snapshot.load(args.path)
+        blacklist = args.blacklist or SYNTHETIC_BLACKLIST
+        origin = args.path
+    else:
+        parser.error("replay needs a recording path or --synthetic")
+
+    results = {"recording": origin, "frames": len(frames), "blacklist": blacklist}
+    for strategy in ("full_scan", "watcher"):
+        results[strategy] = replay(frames, blacklist, strategy)
+    _bench.emit("blacklist_replay", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Compares the old blacklist loop (full psutil scan every 10 s) with the
+incremental ProcessWatcher (PID diff every 0.5 s) on a synthetic process
+table, so it runs anywhere and is repeatable.
+
+Time is simulated: processes start and exit on a virtual clock, and each
+strategy's scans run at their virtual tick times. The work inside a scan is
+real and timed. Reading one process's details is modeled with a busy wait
+(--info-cost-us), which is where a real scan spends its time.
+
+    uv run benchmarks/blacklist_watcher.py [--sizes 500 5000] [--duration 300] [--json out.json]
+"""
+
+import argparse
+import random
+import time
+
+import _bench
+from features.windows_api.watcher import ProcessWatcher, POLL_INTERVAL_SECONDS
+from features.windows_api.blacklist import is_blacklisted
+from features.windows_api.matcher import BlacklistMatcher
+
+OLD_SCAN_INTERVAL = 10.0
+BLACKLIST = ["steam.exe", "valorant.exe", "discord.exe"]
+MATCHER = BlacklistMatcher(BLACKLIST)
+
+
+def _spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class SyntheticSource:
+    """A process table that the simulation mutates between ticks."""
+
+    def __init__(self, info_cost):
+        self.info_cost = info_cost
+        self.procs = {}
+        self.next_pid = 1000
+        self.info_calls = 0
+
+    def spawn(self, name, now):
+        pid = self.next_pid
+        self.next_pid += 4
+        self.procs[pid] = {
+            "pid": pid,
+            "name": name,
+            "exe": f"C:\\Program Files\\{name[:-4]}\\{name}",
+            "create_time": now,
+        }
+        return pid
+
+    def pids(self):
+        return set(self.procs)
+
+    def create_time(self, pid):
+        info = self.procs.get(pid)
+        return info["create_time"] if info else None
+
+    def info(self, pid):
+        self.info_calls += 1
+        _spin(self.info_cost)
+        info = self.procs.get(pid)
+        return dict(info) if info else None
+
+
+def _build_events(size, duration, churn_per_second, blacklisted_starts, rng):
+    """(time, action, name) tuples; the same list is replayed for both strategies."""
+    events = [(0.0, "start", f"app{i}.exe") for i in range(size)]
+    t = 0.0
+    while t < duration:
+        t += rng.expovariate(churn_per_second)
+        events.append((t, "churn", f"worker{int(t * 1000)}.exe"))
+    for _ in range(blacklisted_starts):
+        events.append((rng.uniform(1, duration), "blacklisted", rng.choice(BLACKLIST)))
+    return sorted(events)
+
+
+def simulate(strategy, size, duration, events, info_cost):
+    source = SyntheticSource(info_cost)
+    watcher = ProcessWatcher(source, lambda info: is_blacklisted(info, MATCHER))
+    interval = OLD_SCAN_INTERVAL if strategy == "full_scan" else POLL_INTERVAL_SECONDS
+
+    spawned_at = {}
+    latencies = []
+    scan_seconds = []
+    event_index = 0
+    tick = 0.0
+    rng = random.Random(1)
+
+    while tick <= duration:
+        # Apply everything that happened up to this tick
+        while event_index < len(events) and events[event_index][0] <= tick:
+            when, action, name = events[event_index]
+            event_index += 1
+            pid = source.spawn(name, when)
+            if action == "churn":
+                # Short-lived helper replaces a random existing one
+                victim = rng.choice(list(source.procs))
+                if victim not in spawned_at:
+                    source.procs.pop(victim, None)
+            elif action == "blacklisted":
+                spawned_at[pid] = when
+
+        start = time.perf_counter()
+        if strategy == "full_scan":
+            found = [info for info in (source.info(pid) for pid in list(source.procs)) if info and is_blacklisted(info, MATCHER)]
+        else:
+            found = [info for info, _ in watcher.tick()]
+        scan_seconds.append(time.perf_counter() - start)
+
+        for info in found:
+            if info["pid"] in spawned_at:
+                latencies.append(tick - spawned_at.pop(info["pid"]))
+                source.procs.pop(info["pid"], None)  # terminated
+        tick += interval
+
+    cpu = sum(scan_seconds)
+    return {
+        "ticks": len(scan_seconds),
+        "info_calls": source.info_calls,
+        "cpu_seconds_per_minute": cpu / duration * 60,
+        "tick_ms": {k: v * 1000 if k != "count" else v for k, v in _bench.summarize(scan_seconds).items()},
+        "detection_latency_s": _bench.summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--duration", type=float, default=300.0, help="simulated seconds")
+    parser.add_argument("--churn", type=float, default=2.0, help="process starts per second")
+    parser.add_argument("--blacklisted", type=int, default=20, help="blacklisted starts per run")
+    parser.add_argument("--info-cost-us", type=float, default=50.0)
+    parser.add_argument("--json")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        events = _build_events(size, args.duration, args.churn, args.blacklisted, random.Random(size))
+        results[str(size)] = {
+            strategy: simulate(strategy, size, args.duration, events, args.info_cost_us / 1e6)
+            for strategy in ("full_scan", "watcher")
+        }
+    _bench.emit("blacklist_watcher", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
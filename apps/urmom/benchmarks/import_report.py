@@ -0,0 +1,112 @@
+"""
+Reports import time and resident memory for each worker process.
+
+Every worker is measured in a fresh interpreter that does what a spawned
+multiprocessing child does: re-import main.py, then run the worker's
+loader from workers.LOADERS. Import time is broken down per module with
+-X importtime, and the report lists which heavy dependencies each worker
+ended up loading so regressions in the import graph are visible.
+
+    uv run benchmarks/import_report.py [--top 10] [--json out.json]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+import _bench
+import workers
+
+HEAVY_MODULES = ["PyQt6", "PyQt6.QtMultimedia", "litellm", "PIL", "psutil", "win32api", "win32gui", "pystray"]
+
+_CHILD = """
+import json, os, sys, time
+sys.path.insert(0, {src!r})
+t0 = time.perf_counter()
+error = None
+try:
+    import main  # a spawned child re-imports the parent's main module
+    import workers
+    {loader}
+except Exception as e:
+    error = repr(e)
+elapsed = time.perf_counter() - t0
+
+def rss_bytes():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+print(json.dumps({{
+    "import_seconds": elapsed,
+    "rss_bytes": rss_bytes(),
+    "error": error,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def _parse_importtime(stderr):
+    """Returns [(module, self_us, cumulative_us)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:") :].split("|")
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def measure(name, top):
+    loader = f"workers.LOADERS[{name!r}]()" if name else "pass"
+    code = _CHILD.format(src=_bench.SRC_DIR, loader=loader, heavy=HEAVY_MODULES)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=_bench.APP_DIR,
+    )
+    try:
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, json.JSONDecodeError):
+        return {"error": proc.stderr.strip().splitlines()[-1:] or "no output"}
+
+    rows = _parse_importtime(proc.stderr)
+    result["module_count"] = len(rows)
+    result["slowest_modules_ms"] = {
+        module: round(self_us / 1000, 3)
+        for module, self_us, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+    }
+    return result
+
+
+def run(top):
+    results = {"baseline": measure(None, top)}
+    for name in workers.LOADERS:
+        results[name] = measure(name, top)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list per worker")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+    _bench.emit("import_report", run(args.top), args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compares the old Mom IPC path (multiprocessing.Queue drained by a 100 ms
+QTimer) with the CommandBus (socket watched by the event loop).
+
+Reports end-to-end latency from put() in a producer process to dispatch in
+the consumer, and how many times the consumer wakes up while idle.
+
+    uv run benchmarks/ipc_latency.py [--messages 200] [--idle 5] [--json out.json]
+"""
+
+import argparse
+import multiprocessing
+import queue
+import random
+import selectors
+import time
+
+import _bench
+from utils.ipc import CommandBus, ChangeAnger
+
+OLD_POLL_INTERVAL = 0.1
+
+
+def _produce_old(q, count, gap):
+    for _ in range(count):
+        q.put({"type": "change_anger", "delta": 1, "sent_at": time.time()})
+        time.sleep(random.uniform(0, gap))
+
+
+def _produce_new(bus, count, gap):
+    for _ in range(count):
+        bus.put(ChangeAnger(delta=1))
+        time.sleep(random.uniform(0, gap))
+
+
+def consume_old(q, count, idle_seconds):
+    """Mirrors the old MomWidget.check_queue timer."""
+    latencies = []
+    wakeups = 0
+    deadline = None
+    while len(latencies) < count or (deadline and time.time() < deadline):
+        time.sleep(OLD_POLL_INTERVAL)
+        wakeups += 1
+        try:
+            while not q.empty():
+                cmd = q.get_nowait()
+                latencies.append(time.time() - cmd["sent_at"])
+        except queue.Empty:
+            pass
+        if len(latencies) >= count and deadline is None:
+            # Everything arrived; now count wakeups with nothing to do
+            deadline = time.time() + idle_seconds
+            wakeups = 0
+    return latencies, wakeups
+
+
+def consume_new(bus, count, idle_seconds):
+    """Mirrors the QSocketNotifier wiring in MomWidget."""
+    latencies = []
+    wakeups = 0
+    sel = selectors.DefaultSelector()
+    sel.register(bus.fileno(), selectors.EVENT_READ)
+    while len(latencies) < count:
+        sel.select()
+        for envelope in bus.drain():
+            latencies.append(time.time() - envelope.sent_at)
+    deadline = time.time() + idle_seconds
+    while (remaining := deadline - time.time()) > 0:
+        # A real event loop sleeps until the fd is readable; the timeout here
+        # only bounds the measurement window and is not counted as a wakeup.
+        if sel.select(timeout=remaining):
+            wakeups += 1
+            bus.drain()
+    sel.close()
+    return latencies, wakeups
+
+
+def run(messages, gap, idle_seconds):
+    results = {}
+
+    q = multiprocessing.Queue()
+    producer = multiprocessing.Process(target=_produce_old, args=(q, messages, gap))
+    producer.start()
+    latencies, wakeups = consume_old(q, messages, idle_seconds)
+    producer.join()
+    results["queue_poll_100ms"] = {
+        "latency_ms": _bench.summarize([x * 1000 for x in latencies]),
+        "idle_wakeups_per_s": wakeups / idle_seconds,
+    }
+
+    bus = CommandBus()
+    producer = multiprocessing.Process(target=_produce_new, args=(bus, messages, gap))
+    producer.start()
+    latencies, wakeups = consume_new(bus, messages, idle_seconds)
+    producer.join()
+    results["command_bus"] = {
+        "latency_ms": _bench.summarize([x * 1000 for x in latencies]),
+        "idle_wakeups_per_s": wakeups / idle_seconds,
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--gap", type=float, default=0.02, help="max seconds between sends")
+    parser.add_argument("--idle", type=float, default=5.0, help="idle window in seconds")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+    _bench.emit("ipc_latency", run(args.messages, args.gap, args.idle), args.json)
+
+
+if __name__ == "__main__":
+    multiprocessing.set_start_method("spawn", force=True)
+    main()
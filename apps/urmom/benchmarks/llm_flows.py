@@ -0,0 +1,238 @@
+"""
+Drives the WYD analysis loop and the lights-out bargaining call against the
+local LLM stand-in (llm_server.py), through the real utils.llm client, and
+reports throughput, latency percentiles and how failures and timeouts play out.
+
+  wyd:      synthetic frames go through the same JobQueue and analysis worker
+            as the live loop, one every --period seconds; reports verdicts
+            delivered, frames dropped as stale and LLM latency.
+  bargain:  --requests excuses through negotiate_time(), --concurrency at a
+            time; reports latency and how often the fail-safe reply was shown.
+  bargain_stream:
+            the same excuses through negotiate_stream(), as the lights-out
+            dialog makes them; reports time to the first reply text next to
+            the total, which is what --token-ms makes the difference in.
+
+    uv run benchmarks/llm_flows.py [--flow wyd|bargain|bargain_stream|all] [--requests 40] [--period 0.5]
+        [--latency-ms 800 --latency-sigma 0.4 --error-rate 0.05 --hang-rate 0.02]
+        [--token-ms 20] [--wyd-deadline 5 --bargain-deadline 3] [--json out.json]
+
+Server options are the same as llm_server.py's. Nothing here touches a real
+provider: every call is routed to the stand-in by URMOM_LLM_API_BASE.
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import _bench
+import llm_server
+
+EXCUSES = [
+    "I need to finish my math homework, it's due tomorrow!",
+    "I just want to play Minecraft for 10 more minutes.",
+    "Please mom! Everyone else is still online!",
+]
+
+
+class _MomInbox:
+    """Collects what the pipeline would have sent to the Mom process."""
+
+    def __init__(self):
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def put(self, message):
+        with self._lock:
+            self.messages.append((time.monotonic(), message))
+
+
+def _configure_env(server_url, workdir):
+    # Must happen before utils.llm and utils.budget are imported: both read these once
+    os.environ["URMOM_LLM_API_BASE"] = server_url
+    os.environ["URMOM_DATA_DIR"] = workdir
+    os.environ.setdefault("GROQ_API_KEY", "stand-in")
+    os.environ["URMOM_LLM_LEDGER"] = os.path.join(workdir, "llm_usage.jsonl")
+    os.environ["URMOM_LLM_BUDGET_STATUS"] = ""
+    os.environ["URMOM_LLM_HOURLY_TOKENS"] = "0"
+    os.environ["URMOM_LLM_DAILY_TOKENS"] = "0"
+    os.environ["URMOM_WYD_HISTORY"] = os.path.join(workdir, "wyd_verdicts.jsonl")
+    os.environ["URMOM_WYD_TIMELINE"] = os.path.join(workdir, "wyd_timeline.db")
+    # Keep litellm off the network: its bundled cost map instead of the
+    # download at import, no tokenizer fetches from the Hugging Face hub
+    os.environ.update(LITELLM_LOCAL_MODEL_COST_MAP="True", HF_HUB_OFFLINE="1", TRANSFORMERS_OFFLINE="1")
+
+
+def _frames(count, width=1920, height=1080):
+    """Noise frames, different enough that none is reused as an unchanged screen."""
+    from PIL import Image
+
+    return [Image.effect_noise((width, height), 32 + i % 64).convert("RGB") for i in range(count)]
+
+
+def run_wyd(args, server):
+    from features.wyd import capture, scheduler, wyd
+
+    wyd.LLM_DEADLINE_SECONDS = args.wyd_deadline
+    mom = _MomInbox()
+    pipeline = wyd.Pipeline(mom, llm_enabled=True, stale_after=args.stale_after)
+    jobs = scheduler.JobQueue()
+    threading.Thread(target=wyd._analysis_worker, args=(pipeline, jobs), daemon=True).start()
+
+    shots = [capture.capture(source=lambda frame=frame: frame) for frame in _frames(min(args.requests, 8))]
+    llm_latencies = []
+    original = wyd.analyze_activity
+
+    def timed_analyze(shot, *a, **kw):
+        start = time.perf_counter()
+        try:
+            return original(shot, *a, **kw)
+        finally:
+            llm_latencies.append(time.perf_counter() - start)
+
+    wyd.analyze_activity = timed_analyze
+
+    schedule = scheduler.Schedule(args.period, first_tick=time.monotonic())
+    started = time.monotonic()
+    for seq in range(1, args.requests + 1):
+        tick = schedule.next_tick()
+        time.sleep(max(0.0, tick - time.monotonic()))
+        job = scheduler.Job(seq=seq, scheduled_at=tick, deadline=tick + args.stale_after)
+        job.shot = shots[seq % len(shots)]
+        job.captured_at = time.monotonic()
+        jobs.put(job)
+
+    # Let the worker finish what is queued; anything still running after that is stale anyway
+    time.sleep(args.stale_after + args.wyd_deadline)
+    elapsed = time.monotonic() - started
+    wyd.analyze_activity = original
+    if pipeline.timeline:
+        pipeline.timeline.close()
+
+    delivered = sum(1 for _, message in mom.messages if type(message).__name__ == "ShowBubbleMessage")
+    return {
+        "frames": args.requests,
+        "period_s": args.period,
+        "verdicts_delivered": delivered,
+        "verdicts_per_minute": delivered / elapsed * 60,
+        "llm_calls": len(llm_latencies),
+        "llm_ms": {k: v * 1000 if k != "count" else v for k, v in _bench.summarize(llm_latencies).items()},
+        "llm_deadline_s": args.wyd_deadline,
+        "calls_at_deadline": sum(1 for s in llm_latencies if s >= args.wyd_deadline * 0.95),
+        "dropped_or_failed": args.requests - delivered,
+    }
+
+
+def run_bargain(args, server):
+    from features.bargain import bargain
+
+    bargain.LLM_DEADLINE_SECONDS = args.bargain_deadline
+    fallbacks = 0
+    latencies = []
+    lock = threading.Lock()
+
+    def one(index):
+        nonlocal fallbacks
+        start = time.perf_counter()
+        # Repeats would be answered by the excuse cache, never reaching the model
+        result = bargain.negotiate_time(EXCUSES[index % len(EXCUSES)], cache=None)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if result == bargain.FAIL_SAFE_REPLY:
+                fallbacks += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "throughput_per_s": args.requests / elapsed,
+        "latency_ms": {k: v * 1000 if k != "count" else v for k, v in _bench.summarize(latencies).items()},
+        "deadline_s": args.bargain_deadline,
+        "fail_safe_replies": fallbacks,
+        "fail_safe_rate": fallbacks / args.requests,
+        "at_deadline": sum(1 for s in latencies if s >= args.bargain_deadline * 0.95),
+    }
+
+
+def run_bargain_stream(args, server):
+    from features.bargain import bargain
+
+    bargain.LLM_DEADLINE_SECONDS = args.bargain_deadline
+    fallbacks = 0
+    first_text = []
+    latencies = []
+    lock = threading.Lock()
+
+    def one(index):
+        nonlocal fallbacks
+        start = time.perf_counter()
+        seen = []
+
+        def on_update(fields):
+            if not seen and fields.get("reply"):
+                seen.append(time.perf_counter() - start)
+
+        # Cached replies would hide the model entirely
+        result = bargain.negotiate_stream(f"{EXCUSES[index % len(EXCUSES)]} ({index})", on_update, cache=None)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            first_text.extend(seen)
+            if result == bargain.FAIL_SAFE_REPLY:
+                fallbacks += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "throughput_per_s": args.requests / elapsed,
+        "first_text_ms": {k: v * 1000 if k != "count" else v for k, v in _bench.summarize(first_text).items()},
+        "latency_ms": {k: v * 1000 if k != "count" else v for k, v in _bench.summarize(latencies).items()},
+        "deadline_s": args.bargain_deadline,
+        "fail_safe_replies": fallbacks,
+        "fail_safe_rate": fallbacks / args.requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--flow", choices=["wyd", "bargain", "bargain_stream", "all"], default="all")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=1, help="bargain requests in flight at once")
+    parser.add_argument("--period", type=float, default=0.5, help="seconds between WYD frames")
+    parser.add_argument("--stale-after", type=float, default=10.0, help="WYD verdict staleness limit")
+    parser.add_argument("--wyd-deadline", type=float, default=5.0)
+    parser.add_argument("--bargain-deadline", type=float, default=3.0)
+    parser.add_argument("--json")
+    llm_server.add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = llm_server.StandInServer(llm_server.config_from_args(args)).start()
+    with tempfile.TemporaryDirectory(prefix="urmom-llm-bench-") as workdir:
+        _configure_env(server.url, workdir)
+        results = {"server": {**vars(server.config), "script": args.script or "default"}}
+        if args.flow in ("wyd", "all"):
+            results["wyd"] = run_wyd(args, server)
+        if args.flow in ("bargain", "all"):
+            results["bargain"] = run_bargain(args, server)
+        if args.flow in ("bargain_stream", "all"):
+            results["bargain_stream"] = run_bargain_stream(args, server)
+        results["served"] = dict(server.stats)
+    server.stop()
+    _bench.emit("llm_flows", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Local OpenAI-compatible stand-in for the vision and chat models, so the LLM
+paths can be benchmarked offline and reproducibly. Serves
+POST /v1/chat/completions (plain and streamed) with scripted WYD verdicts
+and bargaining replies, after a configurable latency, and fails a
+configurable share of requests. GET /stats returns what it has served.
+
+Point the app at it with
+    URMOM_LLM_API_BASE=http://127.0.0.1:8765/v1
+which makes utils.llm send every call there, whatever the model's provider.
+For a fully offline run also set
+    LITELLM_LOCAL_MODEL_COST_MAP=True HF_HUB_OFFLINE=1 TRANSFORMERS_OFFLINE=1
+so importing litellm doesn't download its cost map or tokenizers
+(llm_flows.py sets these itself).
+
+    uv run benchmarks/llm_server.py [--port 8765] [--latency-ms 800 --latency-sigma 0.4]
+        [--error-rate 0.05 --error-status 503] [--hang-rate 0.02] [--script replies.json]
+
+--script takes {"wyd": [verdict, ...], "bargain": [reply, ...]}; replies are
+served in order, cycling. llm_flows.py starts one in-process.
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WYD_VERDICTS = [
+    {"reply": "Aiyah, YouTube again? Homework not doing itself!", "score": -0.8},
+    {"reply": "Good, coding. Keep going, make Mommy proud.", "score": 0.7},
+    {"reply": "Why so many tabs? Focus!", "score": -0.2},
+    {"reply": "Studying? Wah, so good. Drink water also.", "score": 0.9},
+    {"reply": "Games during exam week? Slipper is coming.", "score": -1.0},
+]
+BARGAIN_REPLIES = [
+    {"minutes": 20, "reply": "Homework? Okay, 20 minutes. Then sleep!", "slipper": False},
+    {"minutes": 0, "reply": "Minecraft? No. Go to bed.", "slipper": False},
+    {"minutes": 5, "reply": "Everyone else? You are not everyone else. 5 minutes.", "slipper": True},
+]
+GENERIC_REPLY = {"reply": "Mommy is busy."}
+# Roughly what a 1344px screenshot costs a vision model
+IMAGE_TOKENS = 1105
+
+
+@dataclass
+class ServerConfig:
+    latency_ms: float = 800.0  # median time to the first byte
+    latency_sigma: float = 0.4  # lognormal shape; 0 makes every call take exactly latency_ms
+    token_ms: float = 0.0  # extra time per completion token, streamed or not
+    error_rate: float = 0.0
+    error_status: int = 503
+    hang_rate: float = 0.0  # requests that stall past any sane client deadline
+    hang_seconds: float = 120.0
+    malformed_rate: float = 0.0  # replies whose content is not the JSON asked for
+    image_tokens: int = IMAGE_TOKENS
+    seed: int = 0
+    script: dict = field(default_factory=lambda: {"wyd": WYD_VERDICTS, "bargain": BARGAIN_REPLIES})
+
+
+def _kind(messages):
+    """Which flow a request belongs to, from its system prompt."""
+    system = " ".join(str(m.get("content", "")) for m in messages if m.get("role") == "system")
+    if "computer screen" in system:
+        return "wyd"
+    if "computer time" in system:
+        return "bargain"
+    return "other"
+
+
+def _estimate_tokens(text):
+    return max(1, math.ceil(len(text) / 4))
+
+
+def _prompt_tokens(messages, image_tokens):
+    tokens = 0
+    for message in messages:
+        content = message.get("content", "")
+        if isinstance(content, str):
+            tokens += _estimate_tokens(content)
+            continue
+        for part in content:
+            if part.get("type") == "image_url":
+                tokens += image_tokens
+            else:
+                tokens += _estimate_tokens(part.get("text", ""))
+    return tokens
+
+
+class StandInServer:
+    def __init__(self, config: ServerConfig = None, host="127.0.0.1", port=0):
+        self.config = config or ServerConfig()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._next_reply = {}
+        self.stats = {"requests": 0, "streamed": 0, "errors": 0, "hangs": 0, "malformed": 0, "by_kind": {}}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def start(self):
+        """Serves on a background thread."""
+        threading.Thread(target=self.serve_forever, name="llm-stand-in", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _plan(self, kind):
+        """Draws this request's fate and reply under the lock, so a seed gives the same run."""
+        config = self.config
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["by_kind"][kind] = self.stats["by_kind"].get(kind, 0) + 1
+            roll = self._rng.random()
+            latency = config.latency_ms / 1000
+            if config.latency_sigma > 0:
+                latency *= self._rng.lognormvariate(0, config.latency_sigma)
+            replies = config.script.get(kind) or [GENERIC_REPLY]
+            index = self._next_reply.get(kind, 0)
+            self._next_reply[kind] = index + 1
+            reply = replies[index % len(replies)]
+
+            if roll < config.error_rate:
+                outcome = "error"
+            elif roll < config.error_rate + config.hang_rate:
+                outcome = "hang"
+            elif roll < config.error_rate + config.hang_rate + config.malformed_rate:
+                outcome = "malformed"
+            else:
+                outcome = "ok"
+            if outcome != "ok":
+                self.stats[{"error": "errors", "hang": "hangs", "malformed": "malformed"}[outcome]] += 1
+        content = "Mommy says: " + reply.get("reply", "") if outcome == "malformed" else json.dumps(reply)
+        return outcome, latency, content
+
+    def _handler(self):
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/stats"):
+                    with server._lock:
+                        self._send_json(200, server.stats)
+                elif self.path.rstrip("/").endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": [{"id": "stand-in", "object": "model"}]})
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send_json(400, {"error": {"message": "body is not JSON"}})
+                    return
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+                messages = request.get("messages", [])
+                outcome, latency, content = server._plan(_kind(messages))
+                config = server.config
+
+                if outcome == "hang":
+                    time.sleep(config.hang_seconds)
+                time.sleep(latency)
+                if outcome == "error":
+                    self._send_json(
+                        config.error_status,
+                        {"error": {"message": "stand-in failure", "type": "server_error", "code": config.error_status}},
+                    )
+                    return
+
+                usage = {
+                    "prompt_tokens": _prompt_tokens(messages, config.image_tokens),
+                    "completion_tokens": _estimate_tokens(content),
+                }
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+                model = request.get("model", "stand-in")
+                if request.get("stream"):
+                    with server._lock:
+                        server.stats["streamed"] += 1
+                    self._stream(completion_id, model, content, usage, request)
+                    return
+                time.sleep(config.token_ms / 1000 * usage["completion_tokens"])
+                self._send_json(
+                    200,
+                    {
+                        "id": completion_id,
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [
+                            {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                        ],
+                        "usage": usage,
+                    },
+                )
+
+            def _stream(self, completion_id, model, content, usage, request):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                def chunk(delta, finish_reason=None, extra=None):
+                    body = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                        **(extra or {}),
+                    }
+                    self.wfile.write(f"data: {json.dumps(body)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                try:
+                    chunk({"role": "assistant", "content": ""})
+                    # About one token per chunk
+                    for start in range(0, len(content), 4):
+                        time.sleep(server.config.token_ms / 1000)
+                        chunk({"content": content[start:start + 4]})
+                    include_usage = (request.get("stream_options") or {}).get("include_usage")
+                    chunk({}, "stop", {"usage": usage} if include_usage else None)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up
+
+            def _send_json(self, status, body):
+                data = json.dumps(body).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return _Handler
+
+
+def add_server_arguments(parser):
+    defaults = ServerConfig()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--latency-sigma", type=float, default=defaults.latency_sigma)
+    parser.add_argument("--token-ms", type=float, default=defaults.token_ms)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--error-status", type=int, default=defaults.error_status)
+    parser.add_argument("--hang-rate", type=float, default=defaults.hang_rate)
+    parser.add_argument("--hang-seconds", type=float, default=defaults.hang_seconds)
+    parser.add_argument("--malformed-rate", type=float, default=defaults.malformed_rate)
+    parser.add_argument("--image-tokens", type=int, default=defaults.image_tokens)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--script", help='JSON file with {"wyd": [...], "bargain": [...]} replies')
+
+
+def config_from_args(args) -> ServerConfig:
+    config = ServerConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        token_ms=args.token_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        malformed_rate=args.malformed_rate,
+        image_tokens=args.image_tokens,
+        seed=args.seed,
+    )
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            config.script = {**config.script, **json.load(f)}
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = StandInServer(config_from_args(args), args.host, args.port)
+    print(f"LLM stand-in listening; run the app with URMOM_LLM_API_BASE={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
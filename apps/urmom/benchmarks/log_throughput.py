@@ -0,0 +1,105 @@
+"""
+Compares the old thread-per-line utils.log with the single-writer logger.
+
+For each implementation it measures the per-call latency seen by the
+caller, the time until every line is on disk, and how many lines landed
+out of order.
+
+    uv run benchmarks/log_throughput.py [--lines 5000] [--json out.json]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+
+import _bench
+from utils.log import LogWriter
+
+
+def legacy_log(text):
+    """The implementation utils.log shipped with before the writer thread."""
+
+    def write_log():
+        with open("log.txt", "a") as f:
+            f.write(text + "\n")
+
+    thread = threading.Thread(target=write_log, daemon=True)
+    thread.start()
+    print(text)
+
+
+def _wait_for_lines(path, expected, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                if sum(1 for _ in f) >= expected:
+                    return True
+        time.sleep(0.005)
+    return False
+
+
+def _out_of_order(path):
+    with open(path, encoding="utf-8") as f:
+        seq = [int(line.rsplit(" ", 1)[-1]) for line in f if line.strip()]
+    return sum(1 for a, b in zip(seq, seq[1:]) if b < a)
+
+
+def bench(name, emit_line, path, lines):
+    call_latencies = []
+    start = time.perf_counter()
+    # The old and new loggers both echo to stdout; keep that out of the numbers
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(lines):
+            t0 = time.perf_counter()
+            emit_line(f"Found blacklisted process: C:\\Games\\game.exe {i}")
+            call_latencies.append(time.perf_counter() - t0)
+    submitted = time.perf_counter() - start
+    complete = _wait_for_lines(path, lines)
+    durable = time.perf_counter() - start
+    return {
+        "call_latency_us": _bench.summarize([x * 1e6 for x in call_latencies]),
+        "submit_lines_per_s": lines / submitted,
+        "on_disk_lines_per_s": lines / durable if complete else 0.0,
+        "all_lines_written": complete,
+        "out_of_order_lines": _out_of_order(path) if complete else None,
+    }
+
+
+def run(lines):
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            results["thread_per_line"] = bench("legacy", legacy_log, "log.txt", lines)
+
+            path = os.path.join(tmp, "writer.txt")
+            # Large rotation threshold so the whole run stays in one file
+            writer = LogWriter(path, max_bytes=1 << 30)
+
+            def emit_line(text):
+                writer.submit(text)
+                print(text)
+
+            results["single_writer"] = bench("writer", emit_line, path, lines)
+            results["single_writer"]["dropped"] = writer.dropped
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+    _bench.emit("log_throughput", run(args.lines), args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Startup and footprint benchmark for the whole urmom process tree.
+
+Launches the app headless (Qt offscreen platform, pywin32/pystray
+stand-ins from benchmarks/stubs) and records, per run:
+  - time from launch to the first paint of MomWidget
+  - time until each worker's first loop iteration
+  - resident memory of every process in the tree
+Import time per module for each worker comes from import_report.py.
+Milestones are reported by utils.probe through URMOM_PROBE_FILE.
+
+    uv run benchmarks/startup.py [--runs 3] [--mode processes|async] [--json out.json]
+    uv run benchmarks/startup.py --exe dist/urmom     # frozen build
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import _bench
+import import_report
+
+STUBS_DIR = os.path.join(_bench.BENCH_DIR, "stubs")
+
+# Milestones that mark a worker as up. Any one event of a group is enough.
+READY_EVENTS = {
+    "processes": [
+        ("mom_first_paint",),
+        ("blacklist_first_iteration",),
+        ("lights_out_first_iteration",),
+        ("wyd_first_iteration", "wyd_local_only"),
+    ],
+}
+READY_EVENTS["async"] = READY_EVENTS["processes"]
+
+
+def _config(mode):
+    # Keep lights-out far away so the run never reaches a warning or shutdown
+    start = datetime.now() + timedelta(hours=12)
+    return {
+        "lightsOutStart": start.strftime("%H:%M"),
+        "lightsOutEnd": (start + timedelta(hours=1)).strftime("%H:%M"),
+        "nag": ["Benchmark is running."],
+        "blacklistedProcesses": ["urmom-benchmark-no-such-process.exe"],
+        "screenshotFreqMin": 60,
+        "slipperEnabled": False,
+        "runtimeMode": mode,
+    }
+
+
+def _read_probe(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _children(pid):
+    """All descendants of pid, read from /proc."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; ppid follows the closing paren
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        parents.setdefault(ppid, []).append(int(entry))
+    found, stack = [], [pid]
+    while stack:
+        for child in parents.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def _rss(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def run_once(cmd, env, mode, timeout):
+    with tempfile.TemporaryDirectory() as tmp:
+        probe_path = os.path.join(tmp, "probe.jsonl")
+        env = {**env, "URMOM_PROBE_FILE": probe_path}
+        launched = time.time()
+        proc = subprocess.Popen(
+            cmd, cwd=tmp, env=env, start_new_session=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            events = []
+            deadline = time.time() + timeout
+            while time.time() < deadline:
+                events = _read_probe(probe_path)
+                seen = {e["event"] for e in events}
+                if all(any(e in seen for e in group) for group in READY_EVENTS[mode]):
+                    break
+                time.sleep(0.05)
+            # Let the tree settle before sampling memory
+            time.sleep(0.5)
+            events = _read_probe(probe_path)
+
+            workers = {e["pid"]: e["worker"] for e in events if e["event"] == "worker_start"}
+            rss = {}
+            for pid in [proc.pid] + _children(proc.pid):
+                label = workers.get(pid, "controller" if pid == proc.pid else f"pid{pid}")
+                rss[label] = _rss(pid)
+        finally:
+            try:
+                os.killpg(proc.pid, signal.SIGTERM)
+                proc.wait(timeout=5)
+            except (ProcessLookupError, subprocess.TimeoutExpired):
+                os.killpg(proc.pid, signal.SIGKILL)
+
+    milestones = {}
+    for e in events:
+        key = e["event"] if e["event"] != "worker_start" else f"worker_start:{e['worker']}"
+        milestones.setdefault(key, e["t"] - launched)
+    return {
+        "time_to_first_paint_s": milestones.get("mom_first_paint"),
+        "milestones_s": milestones,
+        "rss_bytes": rss,
+        "total_rss_bytes": sum(v for v in rss.values() if v),
+        "process_count": len(rss),
+    }
+
+
+def run(runs, mode, timeout, exe):
+    config = json.dumps(_config(mode))
+    env = {**os.environ, "QT_QPA_PLATFORM": "offscreen", "dev": "0"}
+    if exe:
+        cmd = [os.path.abspath(exe), config]
+    else:
+        cmd = [sys.executable, os.path.join(_bench.SRC_DIR, "main.py"), config]
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [STUBS_DIR, env.get("PYTHONPATH")]))
+
+    samples = [run_once(cmd, env, mode, timeout) for _ in range(runs)]
+    paints = [s["time_to_first_paint_s"] for s in samples if s["time_to_first_paint_s"] is not None]
+    results = {
+        "build": "frozen" if exe else "source",
+        "mode": mode,
+        "time_to_first_paint_s": _bench.summarize(paints),
+        "total_rss_bytes": _bench.summarize([s["total_rss_bytes"] for s in samples]),
+        "runs": samples,
+    }
+    if not exe:
+        # A frozen build has no separate .py modules to time
+        results["imports"] = import_report.run(top=10)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--mode", choices=["processes", "async"], default="processes")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for every milestone")
+    parser.add_argument("--exe", help="path to a frozen urmom build instead of src/main.py")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+    if not sys.platform.startswith("linux"):
+        parser.error("the startup benchmark reads /proc and only runs on Linux")
+    _bench.emit("startup", run(args.runs, args.mode, args.timeout, args.exe), args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""Benchmark stand-in for pystray: a tray icon that just waits to be stopped."""
+
+import threading
+
+
+class MenuItem:
+    def __init__(self, text, action):
+        self.text = text
+        self.action = action
+
+
+class Menu:
+    def __init__(self, *items):
+        self.items = items
+
+
+class Icon:
+    def __init__(self, name, image=None, title=None, menu=None):
+        self.name = name
+        self._stopped = threading.Event()
+
+    def run(self):
+        self._stopped.wait()
+
+    def stop(self):
+        self._stopped.set()
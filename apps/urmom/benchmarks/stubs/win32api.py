@@ -0,0 +1,34 @@
+"""Benchmark stand-in for pywin32's win32api."""
+
+
+class error(Exception):
+    pass
+
+
+def GetCurrentProcess():
+    return 0
+
+
+def GetModuleHandle(name):
+    return 0
+
+
+def InitiateSystemShutdown(machine, message, timeout, force, reboot):
+    print(f"[stub win32api] shutdown suppressed: {message}")
+
+
+def MonitorFromWindow(hwnd, flags=0):
+    return 1
+
+
+def GetMonitorInfo(monitor):
+    return {"Monitor": (0, 0, 1920, 1080), "Work": (0, 0, 1920, 1040), "Flags": 1}
+
+
+def GetSystemMetrics(index):
+    # Primary 1920x1080 screen, which is also the whole virtual desktop
+    return {0: 1920, 1: 1080, 76: 0, 77: 0, 78: 1920, 79: 1080}.get(index, 0)
+
+
+def MessageBox(hwnd, text, caption, flags=0):
+    return 1
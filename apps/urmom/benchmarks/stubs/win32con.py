@@ -0,0 +1,9 @@
+"""Benchmark stand-in for pywin32's win32con."""
+
+MONITOR_DEFAULTTONEAREST = 2
+SM_CXSCREEN = 0
+SM_CYSCREEN = 1
+SM_XVIRTUALSCREEN = 76
+SM_YVIRTUALSCREEN = 77
+SM_CXVIRTUALSCREEN = 78
+SM_CYVIRTUALSCREEN = 79
@@ -0,0 +1,15 @@
+"""Benchmark stand-in for pywin32's win32gui: a single fake foreground window."""
+
+FOREGROUND_TITLE = "urmom benchmark"
+
+
+def GetForegroundWindow():
+    return 1
+
+
+def GetWindowText(hwnd):
+    return FOREGROUND_TITLE
+
+
+def GetWindowRect(hwnd):
+    return (0, 0, 1280, 720)
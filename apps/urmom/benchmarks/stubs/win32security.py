@@ -0,0 +1,22 @@
+"""Benchmark stand-in for pywin32's win32security."""
+
+TOKEN_ADJUST_PRIVILEGES = 0x20
+TOKEN_QUERY = 0x8
+SE_SHUTDOWN_NAME = "SeShutdownPrivilege"
+SE_PRIVILEGE_ENABLED = 0x2
+
+
+class error(Exception):
+    pass
+
+
+def OpenProcessToken(process, flags):
+    return 0
+
+
+def LookupPrivilegeValue(system, name):
+    return 0
+
+
+def AdjustTokenPrivileges(token, disable_all, privileges):
+    return None
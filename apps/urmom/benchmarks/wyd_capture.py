@@ -0,0 +1,104 @@
+"""
+Compares the old WYD screenshot path (full-resolution JPEG written to
+%TEMP%, read back and base64-encoded) with the in-memory capture pipeline.
+
+Uses a synthetic desktop-like frame so it runs without a display; pass
+--grab to use a real screenshot instead.
+
+    uv run benchmarks/wyd_capture.py [--width 3840 --height 2160] [--repeat 10] [--json out.json]
+"""
+
+import argparse
+import base64
+import os
+import random
+import tempfile
+import time
+
+import _bench
+from features.wyd import capture
+
+
+def synthetic_frame(width, height, seed=0):
+    """Windows, text-like stripes and a noisy wallpaper, roughly what a desktop compresses like."""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    image = Image.effect_noise((width, height), 24).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(width // 2), rng.randrange(height // 2)
+        w, h = rng.randrange(width // 4, width // 2), rng.randrange(height // 4, height // 2)
+        draw.rectangle((x, y, x + w, y + h), fill=(245, 245, 245), outline=(60, 60, 60))
+        for line in range(y + 30, y + h - 10, 18):
+            draw.rectangle((x + 12, line, x + 12 + rng.randrange(w // 3, w - 24), line + 8), fill=(30, 30, 30))
+    return image
+
+
+def old_path(frame):
+    timings = {}
+    start = time.perf_counter()
+    path = os.path.join(tempfile.gettempdir(), f"urmom_screenshot_{int(time.time())}.jpg")
+    frame.save(path, "JPEG")
+    timings["save"] = time.perf_counter() - start
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        encoded = base64.b64encode(f.read()).decode("utf-8")
+    timings["read_base64"] = time.perf_counter() - start
+    size = os.path.getsize(path)
+    os.remove(path)
+    return timings, size, len(encoded)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--grab", action="store_true", help="capture the real screen")
+    parser.add_argument("--json")
+    args = parser.parse_args()
+
+    frame = capture.grab() if args.grab else synthetic_frame(args.width, args.height)
+
+    old_totals, new_totals = [], []
+    old_stages, new_stages = {}, {}
+    for _ in range(args.repeat):
+        timings, old_jpeg, old_payload = old_path(frame)
+        old_totals.append(sum(timings.values()))
+        for stage, seconds in timings.items():
+            old_stages.setdefault(stage, []).append(seconds)
+
+        shot = capture.capture(source=lambda: frame)
+        # The grab itself is identical in both paths, so leave it out
+        shot.timings.pop("grab")
+        shot.timings.pop("locate")
+        new_totals.append(sum(shot.timings.values()))
+        for stage, seconds in shot.timings.items():
+            new_stages.setdefault(stage, []).append(seconds)
+
+    def ms(values):
+        return {k: v * 1000 if k != "count" else v for k, v in _bench.summarize(values).items()}
+
+    results = {
+        "frame": f"{frame.width}x{frame.height}",
+        "old": {
+            "jpeg_bytes": old_jpeg,
+            "payload_bytes": old_payload,
+            "total_ms": ms(old_totals),
+            "stages_ms": {stage: ms(v)["p50"] for stage, v in old_stages.items()},
+        },
+        "in_memory": {
+            "image": f"{shot.image.width}x{shot.image.height}",
+            "quality": shot.quality,
+            "jpeg_bytes": shot.jpeg_bytes,
+            "payload_bytes": len(shot.base64_jpeg),
+            "total_ms": ms(new_totals),
+            "stages_ms": {stage: ms(v)["p50"] for stage, v in new_stages.items()},
+        },
+    }
+    _bench.emit("wyd_capture", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
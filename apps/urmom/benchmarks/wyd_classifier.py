@@ -0,0 +1,65 @@
+"""
+Per-call latency of the local WYD classifier, and how many typical
+foreground windows it settles without escalating to the vision model.
+
+    uv run benchmarks/wyd_classifier.py [--calls 20000] [--history verdicts.jsonl] [--json out.json]
+"""
+
+import argparse
+import time
+
+import _bench
+from features.wyd.classifier import LocalClassifier
+
+WINDOWS = [
+    ("Code.exe", "main.py - urmom - Visual Studio Code"),
+    ("chrome.exe", "How to reverse a list in Python - Stack Overflow - Google Chrome"),
+    ("chrome.exe", "(3) YouTube - Google Chrome"),
+    ("chrome.exe", "Lecture 5 - Linear Algebra.pdf - Google Chrome"),
+    ("steam.exe", "Steam"),
+    ("Discord.exe", "#general | study group - Discord"),
+    ("WINWORD.EXE", "Essay draft - Word"),
+    ("explorer.exe", "Downloads"),
+    ("notepad.exe", "Untitled - Notepad"),
+    ("msedge.exe", "Shopee Singapore | Free Shipping - Microsoft Edge"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--history", help="train from this verdict history first")
+    parser.add_argument("--json")
+    args = parser.parse_args()
+
+    classifier = LocalClassifier(history_file=args.history)
+    if args.history:
+        classifier.train_from_history()
+
+    infos = [{"name": name, "title": title} for name, title in WINDOWS]
+    samples = []
+    for i in range(args.calls):
+        info = infos[i % len(infos)]
+        start = time.perf_counter()
+        classifier.predict(info)
+        samples.append(time.perf_counter() - start)
+
+    decisions = {}
+    for info in infos:
+        score, confidence = classifier.predict(info)
+        decisions[f"{info['name']}: {info['title']}"] = {
+            "score": round(score, 2),
+            "confidence": round(confidence, 2),
+            "escalate": confidence < classifier.threshold,
+        }
+
+    results = {
+        "predict_us": {k: v * 1e6 if k != "count" else v for k, v in _bench.summarize(samples).items()},
+        "settled_locally": sum(not d["escalate"] for d in decisions.values()),
+        "windows": decisions,
+    }
+    _bench.emit("wyd_classifier", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Insert cost of the WYD timeline and how fast range summaries come back from
+its rollups, against the same summaries computed by scanning raw verdicts.
+
+Fills a fresh database with --days of synthetic verdicts, one every
+--interval seconds, ending now.
+
+    uv run benchmarks/wyd_timeline.py [--days 180] [--interval 300] [--queries 50] [--json out.json]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import _bench
+from features.wyd import timeline
+
+APPS = [("Code.exe", "main.py"), ("chrome.exe", "YouTube"), ("WINWORD.EXE", "Essay"), ("steam.exe", "Steam")]
+RANGES_DAYS = [1, 7, 30, 90, 180]
+
+
+def _fill(store, days, interval, seed=0):
+    rng = random.Random(seed)
+    now = time.time()
+    ts = now - days * 86400
+    durations = []
+    while ts < now:
+        name, title = rng.choice(APPS)
+        llm = rng.random() < 0.3
+        start = time.perf_counter()
+        store.record(
+            rng.uniform(-1, 1),
+            {"name": name, "title": title},
+            "llm" if llm else "local",
+            "stand-in" if llm else None,
+            rng.uniform(1, 4) if llm else None,
+            ts=ts,
+        )
+        durations.append(time.perf_counter() - start)
+        ts += interval
+    return durations, now
+
+
+def _raw_summary(store, start, end):
+    with store._lock:
+        return store._db.execute(
+            "SELECT count(*), avg(score), sum(score > ?), sum(score < ?) FROM verdicts WHERE ts >= ? AND ts < ?",
+            (timeline.PRODUCTIVE_SCORE, timeline.UNPRODUCTIVE_SCORE, start, end),
+        ).fetchone()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--interval", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--json")
+    args = parser.parse_args()
+
+    # Keep every raw row so the scan comparison covers the whole range
+    timeline.RAW_RETENTION_DAYS = max(timeline.RAW_RETENTION_DAYS, args.days + 1)
+    with tempfile.TemporaryDirectory(prefix="urmom-timeline-bench-") as workdir:
+        path = os.path.join(workdir, "timeline.db")
+        store = timeline.Timeline(path)
+        inserts, now = _fill(store, args.days, args.interval)
+
+        def ms(values):
+            return {k: v * 1000 if k != "count" else v for k, v in _bench.summarize(values).items()}
+
+        ranges = {}
+        for days in RANGES_DAYS:
+            if days > args.days:
+                continue
+            start = now - days * 86400
+            bucket = "hour" if days <= 7 else "day"
+            timings = {"rollup_series": [], "rollup_summary": [], "raw_scan": []}
+            for _ in range(args.queries):
+                t = time.perf_counter()
+                store.rollups(start, now, bucket)
+                timings["rollup_series"].append(time.perf_counter() - t)
+                t = time.perf_counter()
+                store.summary(start, now, "hour")
+                timings["rollup_summary"].append(time.perf_counter() - t)
+                t = time.perf_counter()
+                _raw_summary(store, start, now)
+                timings["raw_scan"].append(time.perf_counter() - t)
+            ranges[f"{days}d"] = {name: ms(values)["p50"] for name, values in timings.items()} | {"series_bucket": bucket}
+
+        start = time.perf_counter()
+        removed = store.compact()
+        compact_ms = (time.perf_counter() - start) * 1000
+        store.close()
+        size = os.path.getsize(path)
+
+    results = {
+        "verdicts": len(inserts),
+        "insert_us": {k: v * 1e6 if k != "count" else v for k, v in _bench.summarize(inserts).items()},
+        "query_p50_ms": ranges,
+        "compact_ms": compact_ms,
+        "compacted_rows": removed,
+        "db_bytes": size,
+    }
+    _bench.emit("wyd_timeline", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
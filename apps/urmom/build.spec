@@ -23,6 +23,9 @@ dev_build = os.environ.get('DEV_BUILD') == '1'
 datas = []
 binaries = ssl_binaries
 hiddenimports = ['_ssl', 'win32api', 'win32timezone', 'win32security', 'win32con', 'psutil', 'tiktoken_ext', 'tiktoken_ext.openai_public']
+# Only ever imported by name through the lazy __getattr__ in features/__init__.py
+# and features/windows_api/__init__.py, which PyInstaller's analysis can't follow
+hiddenimports += ['features.windows_api.activewindow', 'features.windows_api.snapshot']
 
 # --- FIX: Collect all litellm files/dependencies ---
 # This grabs the missing tokenizers and core utils
@@ -1,4 +1,20 @@
-from .mom import *
-from .windows_api import *
-from .lights_out import *
-from .bargain import *
+import importlib
+
+# Feature modules are imported on first access so that a worker process
+# only loads the dependencies (PyQt6, litellm, pywin32) it actually uses.
+_LAZY = {
+    "mom": "features.mom",
+    "windows_api": "features.windows_api",
+    "lights_out": "features.lights_out",
+    "bargain": "features.bargain",
+    "wyd": "features.wyd",
+    "shutdown": "features.windows_api.shutdown",
+    "blacklist": "features.windows_api.blacklist",
+    "activewindow": "features.windows_api.activewindow",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return importlib.import_module(_LAZY[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1 +1 @@
-from .bargain import main, negotiate_time
+from .bargain import main, negotiate_time, negotiate_stream, prewarm
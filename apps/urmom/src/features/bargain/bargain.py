@@ -1,11 +1,30 @@
 import json
 import os
-from litellm import completion
+import time
 
-DEFAULT_MODEL = "huggingface/together/meta-llama/Llama-3.2-3B-Instruct"
+from utils import metrics, llm
+from .cache import ExcuseCache
+from .streaming import PartialReply
 
-def negotiate_time(user_excuse: str, model=DEFAULT_MODEL):
-    system_prompt = """
+DEFAULT_MODEL = "huggingface/together/meta-llama/Llama-3.2-3B-Instruct"
+# The dialog shows a loading screen meanwhile, so fall back to the fail-safe reply quickly
+LLM_DEADLINE_SECONDS = 20
+# A user is waiting on this, so it may spend the budget WYD has to leave alone
+LLM_PURPOSE = "bargain"
+# Warm-up calls nobody is waiting on, so they don't get the bargain reserve
+PREWARM_PURPOSE = "prewarm"
+# Shown when the model can't be reached in time
+FAIL_SAFE_REPLY = {
+    "minutes": 0,
+    "reply": "I'm too tired to argue. Go sleep.",
+    "slipper": False,
+}
+
+# Lives as long as the lights-out process, so it spans every dialog of the night
+_cache = ExcuseCache()
+
+
+SYSTEM_PROMPT = """
     You are a strict Asian mother. Your child wants more computer time.
     Reply with an Asian accent.
 
@@ -23,31 +42,108 @@ def negotiate_time(user_excuse: str, model=DEFAULT_MODEL):
     Do not output anything else.
     """
 
+
+def _request(user_excuse, model):
+    return dict(
+        model=model,
+        deadline=LLM_DEADLINE_SECONDS,
+        purpose=LLM_PURPOSE,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_excuse},
+        ],
+        temperature=0.7,
+        response_format={"type": "json_object"},
+    )
+
+
+def _cached(user_excuse, cache):
+    # Repeated excuses are answered from the cache, escalating rather than granting again
+    if cache is None:
+        return None
+    cached = cache.lookup(user_excuse)
+    if cached is not None:
+        print("answered from cache: ", cached)
+    return cached
+
+
+def negotiate_time(user_excuse: str, model=DEFAULT_MODEL, cache=_cache):
     try:
+        cached = _cached(user_excuse, cache)
+        if cached is not None:
+            return cached
+
         print("submitting excuse: ", user_excuse)
-        response = completion(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_excuse},
-            ],
-            temperature=0.7,
-            response_format={"type": "json_object"},
-        )
+        with metrics.timed("urmom_bargain_llm_seconds", model=model):
+            # litellm is only imported on the first call: most nights nobody bargains
+            response = llm.complete(**_request(user_excuse, model))
         print("received response: ", response)
 
         # Parse JSON response
         data = json.loads(response.choices[0].message.content)
+        if cache is not None:
+            cache.put(user_excuse, data)
         return data
 
     except Exception as e:
         print(f"Error calling Mom: {e}")
+        metrics.inc("urmom_bargain_errors_total")
         # Fail-safe response if API is down
-        return {
-            "minutes": 0,
-            "reply": "I'm too tired to argue. Go sleep.",
-            "slipper": False,
-        }
+        return dict(FAIL_SAFE_REPLY)
+
+
+def negotiate_stream(user_excuse: str, on_update, model=DEFAULT_MODEL, cache=_cache):
+    """
+    negotiate_time() that shows its work: on_update(fields) is called as the
+    reply streams in, with "reply" (the text so far) whenever it grows and
+    "minutes" / "slipper" once each is known. Returns the same dict as
+    negotiate_time(), which is also what on_update last received in full.
+    """
+    parser = PartialReply()
+    start = time.perf_counter()
+    first_piece = None
+    try:
+        cached = _cached(user_excuse, cache)
+        if cached is not None:
+            on_update(cached)
+            return cached
+
+        print("submitting excuse (streaming): ", user_excuse)
+        for piece in llm.stream(**_request(user_excuse, model)):
+            if first_piece is None:
+                first_piece = time.perf_counter() - start
+                metrics.observe("urmom_bargain_first_token_seconds", first_piece, model=model)
+            changed = parser.feed(piece)
+            if changed:
+                on_update(changed)
+        data = parser.result()
+        metrics.observe("urmom_bargain_llm_seconds", time.perf_counter() - start, model=model)
+        print(f"streamed response in {time.perf_counter() - start:.2f}s (first token {first_piece or 0:.2f}s): ", data)
+        if cache is not None:
+            cache.put(user_excuse, data)
+    except Exception as e:
+        print(f"Error calling Mom: {e}")
+        metrics.inc("urmom_bargain_errors_total")
+        # Whatever already streamed is replaced by the fail-safe answer
+        data = dict(FAIL_SAFE_REPLY)
+    on_update(data)
+    return data
+
+
+def prewarm(model=DEFAULT_MODEL):
+    """
+    Readies the first bargain of the night: imports litellm, loads the model's
+    metadata and opens a connection to its provider. Returns the seconds each
+    step took, or None if the model could not be reached.
+    """
+    try:
+        timings = llm.warm(model, deadline=LLM_DEADLINE_SECONDS, purpose=PREWARM_PURPOSE)
+    except Exception as e:
+        print(f"Could not prewarm Mom: {e}")
+        metrics.inc("urmom_bargain_prewarm_errors_total")
+        return None
+    print("prewarmed bargaining: ", {step: round(seconds, 3) for step, seconds in timings.items()})
+    return timings
 
 
 # testing
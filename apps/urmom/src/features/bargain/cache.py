@@ -0,0 +1,213 @@
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+from utils import metrics
+
+ENTRY_TTL_SECONDS = float(os.environ.get("URMOM_BARGAIN_CACHE_TTL_HOURS", 72)) * 60 * 60
+CACHE_SIZE = 256
+# Shingle-set Jaccard similarity above which two excuses count as the same one
+SIMILARITY_THRESHOLD = 0.6
+SHINGLE_SIZE = 3
+# 8 bands of 4 rows: excuses 0.6 similar share a band about two times in three, 0.8 similar almost always
+NUM_BANDS = 8
+ROWS_PER_BAND = 4
+NUM_HASHES = NUM_BANDS * ROWS_PER_BAND
+# A night runs from noon to noon, so 23:50 and 00:10 are the same night
+NIGHT_STARTS_AT_HOUR = 12
+
+# Words that carry no excuse: "mom please 5 more minutes" == "5 more minutes"
+_FILLER = {"please", "pls", "plz", "mom", "mommy", "mum", "mama", "ma", "just", "really", "but", "okay", "ok", "i"}
+_NON_WORD = re.compile(r"[^\w\s]+")
+_DIGITS = re.compile(r"\d+")
+
+# How a repeat of the same excuse on the same night is answered: how much of
+# the original grant it still gets, whether the slipper comes out, and what Mom says.
+ESCALATION = [
+    (0.5, False, "You said this already. Fine, {minutes} more minutes. Last time!"),
+    (0.0, False, "Same excuse again? No. Go to sleep."),
+    (0.0, True, "AGAIN?! Mommy is getting the slipper!"),
+]
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+_BIN_BITS = (NUM_HASHES - 1).bit_length()
+_VALUE_BITS = 64 - _BIN_BITS
+_VALUE_MASK = (1 << _VALUE_BITS) - 1
+
+
+def normalize(text) -> str:
+    """Lowercase words without punctuation, fillers or specific numbers."""
+    words = _DIGITS.sub("#", _NON_WORD.sub(" ", text.lower())).split()
+    return " ".join(w for w in words if w not in _FILLER)
+
+
+def shingles(normalized) -> frozenset:
+    if len(normalized) <= SHINGLE_SIZE:
+        return frozenset([normalized])
+    return frozenset(normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1))
+
+
+def minhash(shingle_set) -> tuple:
+    """
+    One-permutation MinHash: a single hash per shingle, split into NUM_HASHES
+    bins by its top bits, keeping each bin's minimum. Empty bins borrow the
+    next filled bin's value (rotation densification), so short excuses still
+    get comparable signatures. One pass instead of NUM_HASHES of them.
+    """
+    bins = [None] * NUM_HASHES
+    for s in shingle_set:
+        # crc32 rather than hash(): str hashes are salted per process. The
+        # multiply spreads crc32's 32 bits over all 64.
+        h = (zlib.crc32(s.encode("utf-8")) * _GOLDEN) & _MASK64
+        i, value = h >> _VALUE_BITS, h & _VALUE_MASK
+        if bins[i] is None or value < bins[i]:
+            bins[i] = value
+    signature = list(bins)
+    for i in range(NUM_HASHES):
+        if bins[i] is not None:
+            continue
+        for distance in range(1, NUM_HASHES):
+            borrowed = bins[(i + distance) % NUM_HASHES]
+            if borrowed is not None:
+                # Offset by the distance, so bins filled from different distances never agree
+                signature[i] = borrowed + distance * (_VALUE_MASK + 1)
+                break
+    return tuple(signature)
+
+
+def _bands(signature):
+    return [signature[i:i + ROWS_PER_BAND] for i in range(0, NUM_HASHES, ROWS_PER_BAND)]
+
+
+def night_of(timestamp) -> str:
+    return datetime.fromtimestamp(timestamp - NIGHT_STARTS_AT_HOUR * 3600).date().isoformat()
+
+
+@dataclass
+class _Entry:
+    shingles: frozenset
+    bands: list
+    reply: dict
+    stored_at: float
+    night: str = ""
+    uses: int = 0  # answers given from this entry on `night`, the model's own included
+
+
+def _well_formed(reply) -> bool:
+    """Only replies the escalation can work with are cached; the model doesn't always follow the schema."""
+    minutes = reply.get("minutes") if isinstance(reply, dict) else None
+    return isinstance(minutes, int) and not isinstance(minutes, bool) and isinstance(reply.get("reply"), str)
+
+
+class ExcuseCache:
+    """
+    negotiate_time() replies by normalized excuse. Exact repeats are a dict
+    lookup; near-duplicates ("5 more minutes pls" / "5 more minutes please
+    mom") are found through MinHash LSH buckets and confirmed by the shingle
+    sets' Jaccard similarity. Repeats on the same night escalate instead of
+    granting the same minutes again.
+    """
+
+    def __init__(self, size=CACHE_SIZE, ttl=ENTRY_TTL_SECONDS, threshold=SIMILARITY_THRESHOLD, clock=time.time):
+        self.size = size
+        self.ttl = ttl
+        self.threshold = threshold
+        self.clock = clock
+        self._entries = OrderedDict()  # normalized excuse -> _Entry
+        self._buckets = [{} for _ in range(NUM_BANDS)]  # per band: {band of a signature: normalized excuses}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, excuse):
+        """The reply for a known excuse, escalated for repeats tonight; None on a miss."""
+        start = time.perf_counter()
+        key = normalize(excuse)
+        if not key:
+            return None
+        now = self.clock()
+        with self._lock:
+            entry, kind = self._entries.get(key), "exact"
+            if entry is not None and now - entry.stored_at > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                key, entry = self._similar(key, now)
+                kind = "similar"
+            if entry is None:
+                metrics.inc("urmom_bargain_cache_total", result="miss")
+                return None
+            self._entries.move_to_end(key)
+            reply = self._answer(entry, night_of(now))
+        metrics.inc("urmom_bargain_cache_total", result=kind)
+        metrics.observe("urmom_bargain_cache_seconds", time.perf_counter() - start)
+        return reply
+
+    def put(self, excuse, reply):
+        """Caches the model's reply; it counts as tonight's first answer to that excuse."""
+        key = normalize(excuse)
+        if not key or not _well_formed(reply):
+            return
+        sh = shingles(key)
+        now = self.clock()
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            entry = _Entry(sh, _bands(minhash(sh)), dict(reply), now, night_of(now), 1)
+            self._entries[key] = entry
+            for bucket, band in zip(self._buckets, entry.bands):
+                bucket.setdefault(band, set()).add(key)
+            while len(self._entries) > self.size:
+                self._remove(next(iter(self._entries)))
+            metrics.set_gauge("urmom_bargain_cache_entries", len(self._entries))
+
+    def _similar(self, key, now):
+        sh = shingles(key)
+        candidates = set()
+        for bucket, band in zip(self._buckets, _bands(minhash(sh))):
+            candidates |= bucket.get(band, set())
+        best, best_score = None, self.threshold
+        for candidate in candidates:
+            entry = self._entries[candidate]
+            if now - entry.stored_at > self.ttl:
+                continue
+            score = len(sh & entry.shingles) / len(sh | entry.shingles)
+            if score >= best_score:
+                best, best_score = candidate, score
+        if best is None:
+            return None, None
+        return best, self._entries[best]
+
+    def _answer(self, entry, night):
+        if entry.night != night:
+            entry.night, entry.uses = night, 0
+        entry.uses += 1
+        if entry.uses == 1:
+            return {**entry.reply, "cached": True}
+        share, slipper, text = ESCALATION[min(entry.uses - 2, len(ESCALATION) - 1)]
+        minutes = int(int(entry.reply.get("minutes", 0)) * share)
+        if minutes <= 0 and "{minutes}" in text:
+            # Nothing left to halve
+            text = ESCALATION[1][2]
+        return {
+            "minutes": minutes,
+            "reply": text.format(minutes=minutes),
+            "slipper": slipper or bool(entry.reply.get("slipper")),
+            "cached": True,
+        }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        for bucket, band in zip(self._buckets, entry.bands):
+            keys = bucket.get(band)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del bucket[band]
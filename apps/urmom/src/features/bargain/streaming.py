@@ -0,0 +1,77 @@
+import json
+import re
+
+_MINUTES = re.compile(r'"minutes"\s*:\s*(-?\d+)\s*[,}\s]')
+_SLIPPER = re.compile(r'"slipper"\s*:\s*(true|false)\b')
+_REPLY_START = re.compile(r'"reply"\s*:\s*"')
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def _partial_string(text, start):
+    """Decodes a JSON string body from start as far as it is complete. Returns (value, closed)."""
+    out = []
+    i = start
+    while i < len(text):
+        c = text[i]
+        if c == '"':
+            return "".join(out), True
+        if c != "\\":
+            out.append(c)
+            i += 1
+            continue
+        if i + 1 >= len(text):
+            break
+        escape = text[i + 1]
+        if escape == "u":
+            if i + 6 > len(text):
+                break
+            try:
+                out.append(chr(int(text[i + 2:i + 6], 16)))
+            except ValueError:
+                pass
+            i += 6
+            continue
+        out.append(_ESCAPES.get(escape, escape))
+        i += 2
+    return "".join(out), False
+
+
+class PartialReply:
+    """
+    Reads the model's {"minutes", "reply", "slipper"} JSON as it streams in.
+    feed() returns the fields that changed: "reply" with the text so far
+    whenever it grows, "minutes" and "slipper" once each value is complete.
+    Field order doesn't matter.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.fields = {}
+
+    def feed(self, piece) -> dict:
+        self.text += piece
+        changed = {}
+        if "minutes" not in self.fields and (match := _MINUTES.search(self.text)):
+            changed["minutes"] = int(match.group(1))
+        if "slipper" not in self.fields and (match := _SLIPPER.search(self.text)):
+            changed["slipper"] = match.group(1) == "true"
+        if not self.fields.get("_reply_closed") and (match := _REPLY_START.search(self.text)):
+            reply, closed = _partial_string(self.text, match.end())
+            if reply != self.fields.get("reply", ""):
+                changed["reply"] = reply
+            if closed:
+                self.fields["_reply_closed"] = True
+        self.fields.update(changed)
+        return changed
+
+    def result(self) -> dict:
+        """The complete reply: parsed properly if the JSON is valid, else whatever was recovered."""
+        try:
+            data = json.loads(self.text)
+            if isinstance(data, dict):
+                return data
+        except ValueError:
+            pass
+        if "reply" not in self.fields:
+            raise ValueError(f"no reply in streamed output: {self.text[:200]!r}")
+        return {k: v for k, v in self.fields.items() if not k.startswith("_")}
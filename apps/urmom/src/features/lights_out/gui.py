@@ -14,10 +14,14 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QFont
 
-from features.bargain import negotiate_time
+from features.bargain import negotiate_stream
+from utils import metrics
+from utils.ipc import ChangeAnger
 
 
 class BargainWorker(QThread):
+    # Fields of the reply as they stream in, then the complete result
+    partial = pyqtSignal(dict)
     finished = pyqtSignal(dict)
 
     def __init__(self, excuse):
@@ -25,7 +29,7 @@ class BargainWorker(QThread):
         self.excuse = excuse
 
     def run(self):
-        result = negotiate_time(self.excuse)
+        result = negotiate_stream(self.excuse, self.partial.emit)
         self.finished.emit(result)
 
 
@@ -138,12 +142,12 @@ class LightsOutDialog(QDialog):
         self.lbl_added = QLabel("")
         self.lbl_added.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.lbl_added.setStyleSheet("font-weight: bold;")
-        btn_close = QPushButton("Understood")
-        btn_close.clicked.connect(self.accept)
+        self.btn_close = QPushButton("Understood")
+        self.btn_close.clicked.connect(self.accept)
         self.layout_result.addStretch()
         self.layout_result.addWidget(self.lbl_reply)
         self.layout_result.addWidget(self.lbl_added)
-        self.layout_result.addWidget(btn_close, alignment=Qt.AlignmentFlag.AlignCenter)
+        self.layout_result.addWidget(self.btn_close, alignment=Qt.AlignmentFlag.AlignCenter)
         self.layout_result.addStretch()
         self.stack.addWidget(self.page_result)
 
@@ -152,11 +156,30 @@ class LightsOutDialog(QDialog):
         if not excuse:
             return
         self.stack.setCurrentIndex(2)
+        self.submitted_at = time.perf_counter()
+        self.shown_text = False
         self.worker = BargainWorker(excuse)
+        self.worker.partial.connect(self._handle_bargain_partial)
         self.worker.finished.connect(self._handle_bargain_result)
         self.worker.start()
 
+    def _handle_bargain_partial(self, fields):
+        """Fills the result page in while Mom is still talking; the verdict waits for the end."""
+        if "reply" not in fields:
+            return
+        if not self.shown_text:
+            self.shown_text = True
+            metrics.observe("urmom_bargain_first_text_seconds", time.perf_counter() - self.submitted_at)
+            self.lbl_added.setText("Mom is deciding...")
+            self.lbl_added.setStyleSheet("color: #888; font-weight: bold; font-size: 14px;")
+            # Not before the minutes are in
+            self.btn_close.setEnabled(False)
+            self.stack.setCurrentIndex(3)
+        self.lbl_reply.setText(f'Mom says:\n"{fields["reply"]}"')
+
     def _handle_bargain_result(self, result):
+        metrics.observe("urmom_bargain_dialog_seconds", time.perf_counter() - self.submitted_at)
+        self.btn_close.setEnabled(True)
         self.added_minutes = result.get("minutes", 0)
         reply = result.get("reply", "...")
 
@@ -165,11 +188,11 @@ class LightsOutDialog(QDialog):
         if self.mom_queue:
             if self.added_minutes > 0:
                 # Successful bargain, decrease anger
-                self.mom_queue.put({"type": "change_anger", "delta": -1})
+                self.mom_queue.put(ChangeAnger(delta=-1))
             else:
                 # Failed bargain, increase anger. The 'slipper' flag from the AI
                 # indicates a particularly bad excuse, justifying the anger increase.
-                self.mom_queue.put({"type": "change_anger", "delta": 1})
+                self.mom_queue.put(ChangeAnger(delta=1))
 
         # Update the result dialog UI
         self.lbl_reply.setText(f'Mom says:\n"{reply}"')
@@ -193,13 +216,41 @@ class LightsOutDialog(QDialog):
         self.stack.setCurrentIndex(3)
 
 
+# Held here so the QApplication outlives the call that created it
+_app = None
+# Built by prepare_dialog() ahead of the warning it is for
+_prepared = None
+
+
+def _application():
+    global _app
+    _app = QApplication.instance() or QApplication(sys.argv)
+    return _app
+
+
+def prepare_dialog(minutes_left, mom_queue=None):
+    """Builds the warning dialog ahead of time, so show_warning_dialog() only has to show it."""
+    global _prepared
+    start = time.perf_counter()
+    _application()
+    _prepared = LightsOutDialog(minutes_left, mom_queue)
+    _prepared.ensurePolished()
+    metrics.observe("urmom_lights_out_dialog_prepare_seconds", time.perf_counter() - start)
+
+
 def show_warning_dialog(minutes_left, mom_queue=None):
-    app = QApplication.instance()
-    if not app:
-        app = QApplication(sys.argv)
-    dialog = LightsOutDialog(minutes_left, mom_queue)
+    global _prepared
+    start = time.perf_counter()
+    app = _application()
+    dialog, _prepared = _prepared, None
+    prepared = dialog is not None and dialog.minutes_left == minutes_left
+    if not prepared:
+        dialog = LightsOutDialog(minutes_left, mom_queue)
     dialog.show()
     dialog.raise_()
     dialog.activateWindow()
+    metrics.observe(
+        "urmom_lights_out_dialog_open_seconds", time.perf_counter() - start, prepared=str(prepared).lower()
+    )
     app.exec()
     return dialog.added_minutes
@@ -1,7 +1,17 @@
-import time
+import asyncio
+import os
+import threading
 from datetime import datetime, timedelta, time as dt_time
-from ..windows_api.shutdown import shutdown_computer
-from .gui import show_warning_dialog
+from utils import probe
+from utils.config import wait_for_settings, wait_for_settings_async
+
+# How long before each warning the bargaining path is warmed up: LLM stack
+# imported, provider connection opened, dialog built. Shorter than the LLM
+# keep-alive, so the connection is still open when the dialog is; 0 disables.
+PREWARM_MINUTES = float(os.environ.get("URMOM_LIGHTS_OUT_PREWARM_MINUTES", 3))
+
+# Prewarms still running; the loop only keeps weak references to its tasks
+_prewarm_tasks = set()
 
 
 def parse_time_str(t_str: str) -> dt_time | None:
@@ -27,48 +37,183 @@ def get_next_occurrence(start_time):
     return target
 
 
-# --- FIX: Accept queue ---
-def main(start_str, end_str, dev_mode, mom_queue=None):
-    print(f"Lights Out Manager started. Window: {start_str} to {end_str}")
+class LightsOutSchedule:
+    """Tracks tonight's shutdown deadline and which warnings were already shown."""
+
+    def __init__(self, t_start, t_end):
+        self.t_start = t_start
+        self.t_end = t_end
+        self.target_time = get_next_occurrence(t_start)
+        # Won by bargaining; kept when the window is moved
+        self.bargained = timedelta()
+        self.warned_checkpoints = {15: False, 5: False, 1: False}
+        self.prewarmed_checkpoints = set()
+
+    def set_window(self, t_start, t_end):
+        """Moves tonight's window, keeping the minutes bargained and the warnings already shown."""
+        self.t_start = t_start
+        self.t_end = t_end
+        self.target_time = get_next_occurrence(t_start) + self.bargained
+
+    def minutes_left(self, now):
+        return (self.target_time - now).total_seconds() / 60.0
+
+    def is_over(self, now):
+        minutes_left = self.minutes_left(now)
+        physically_in_window = is_currently_in_blackout(now.time(), self.t_start, self.t_end)
+        return minutes_left <= 0 and (physically_in_window or minutes_left < -1)
+
+    def due_checkpoint(self, now):
+        minutes_left = self.minutes_left(now)
+        if 14.5 < minutes_left < 15.5 and not self.warned_checkpoints[15]:
+            return 15
+        elif 4.5 < minutes_left < 5.5 and not self.warned_checkpoints[5]:
+            return 5
+        elif 0.5 < minutes_left < 1.5 and not self.warned_checkpoints[1]:
+            return 1
+        return None
 
+    def due_prewarm(self, now):
+        """The checkpoint whose warning is less than PREWARM_MINUTES away and not yet prepared for."""
+        if PREWARM_MINUTES <= 0:
+            return None
+        minutes_left = self.minutes_left(now)
+        for checkpoint, warned in self.warned_checkpoints.items():
+            # due_checkpoint() fires half a minute early
+            opens_at = checkpoint + 0.5
+            if not warned and checkpoint not in self.prewarmed_checkpoints:
+                if opens_at < minutes_left <= opens_at + PREWARM_MINUTES:
+                    return checkpoint
+        return None
+
+    def prewarmed(self, checkpoint):
+        self.prewarmed_checkpoints.add(checkpoint)
+
+    def warned(self, checkpoint, added_minutes):
+        if added_minutes > 0:
+            print(f"Bargain success! Adding {added_minutes} minutes.")
+            self.target_time += timedelta(minutes=added_minutes)
+            self.bargained += timedelta(minutes=added_minutes)
+        self.warned_checkpoints[checkpoint] = True
+
+
+def _parse_window(start_str, end_str):
     t_start = parse_time_str(start_str)
     t_end = parse_time_str(end_str)
-
     if not t_start or not t_end:
+        return None
+    return t_start, t_end
+
+
+def _create_schedule(start_str, end_str):
+    print(f"Lights Out Manager started. Window: {start_str} to {end_str}")
+
+    window = _parse_window(start_str, end_str)
+    if not window:
         print("Invalid time formats. Lights out disabled.")
-        return
+        return None
+    return LightsOutSchedule(*window)
+
+
+def _apply_settings(changes, schedule):
+    if "lights_out_window" in changes:
+        start_str, end_str = changes["lights_out_window"]
+        window = _parse_window(start_str, end_str)
+        if not window:
+            # Keep the old window if the new one does not parse
+            print(f"Invalid lights out window {start_str} to {end_str}, keeping the current one.")
+            return schedule
+        print(f"Lights out window moved to {start_str} to {end_str}")
+        schedule.set_window(*window)
+    return schedule
+
 
-    target_time = get_next_occurrence(t_start)
-    warned_checkpoints = {15: False, 5: False, 1: False}
+def _prewarm_llm():
+    # litellm is slow to import, so only the first prewarm of the process pays for it
+    from features.bargain import prewarm
+
+    prewarm()
+
+
+# --- FIX: Accept queue ---
+def main(start_str, end_str, dev_mode, mom_queue=None, settings_inbox=None):
+    schedule = _create_schedule(start_str, end_str)
+    if not schedule:
+        return
 
     while True:
         now = datetime.now()
-        diff = target_time - now
-        minutes_left = diff.total_seconds() / 60.0
-        physically_in_window = is_currently_in_blackout(now.time(), t_start, t_end)
 
-        if minutes_left <= 0 and (physically_in_window or minutes_left < -1):
+        if schedule.is_over(now):
+            from ..windows_api.shutdown import shutdown_computer
+
             shutdown_computer(dev_mode)
             print("Time limit reached. SHUTDOWN.")
             break
 
-        current_checkpoint = None
-        if 14.5 < minutes_left < 15.5 and not warned_checkpoints[15]:
-            current_checkpoint = 15
-        elif 4.5 < minutes_left < 5.5 and not warned_checkpoints[5]:
-            current_checkpoint = 5
-        elif 0.5 < minutes_left < 1.5 and not warned_checkpoints[1]:
-            current_checkpoint = 1
-
+        current_checkpoint = schedule.due_checkpoint(now)
         if current_checkpoint:
             print(f"Triggering warning for {current_checkpoint} mins remaining...")
+            # PyQt6 is only needed once a warning is actually due
+            from .gui import show_warning_dialog
+
             # Pass queue to GUI
             added_minutes = show_warning_dialog(current_checkpoint, mom_queue)
+            schedule.warned(current_checkpoint, added_minutes)
+
+        prewarm_checkpoint = schedule.due_prewarm(now)
+        if prewarm_checkpoint:
+            print(f"Prewarming bargaining for the {prewarm_checkpoint} min warning...")
+            threading.Thread(target=_prewarm_llm, name="urmom-prewarm", daemon=True).start()
+            from .gui import prepare_dialog
 
-            if added_minutes > 0:
-                print(f"Bargain success! Adding {added_minutes} minutes.")
-                target_time += timedelta(minutes=added_minutes)
+            prepare_dialog(prewarm_checkpoint, mom_queue)
+            schedule.prewarmed(prewarm_checkpoint)
 
-            warned_checkpoints[current_checkpoint] = True
+        probe.mark("lights_out_first_iteration")
+        changes = wait_for_settings(settings_inbox, 1)
+        schedule = _apply_settings(changes, schedule)
 
-        time.sleep(1)
+
+async def main_async(start_str, end_str, dev_mode, mom_queue=None, run_gui=None, settings_inbox=None):
+    """
+    Cooperative variant of main for the async runtime. The warning dialog is
+    handed to run_gui, which must execute it on the process's main thread.
+    """
+    schedule = _create_schedule(start_str, end_str)
+    if not schedule:
+        return
+
+    while True:
+        now = datetime.now()
+
+        if schedule.is_over(now):
+            from ..windows_api.shutdown import shutdown_computer
+
+            await asyncio.to_thread(shutdown_computer, dev_mode)
+            print("Time limit reached. SHUTDOWN.")
+            break
+
+        current_checkpoint = schedule.due_checkpoint(now)
+        if current_checkpoint:
+            print(f"Triggering warning for {current_checkpoint} mins remaining...")
+            from .gui import show_warning_dialog
+
+            added_minutes = await run_gui(show_warning_dialog, current_checkpoint, mom_queue)
+            schedule.warned(current_checkpoint, added_minutes)
+
+        prewarm_checkpoint = schedule.due_prewarm(now)
+        if prewarm_checkpoint:
+            print(f"Prewarming bargaining for the {prewarm_checkpoint} min warning...")
+            # Runs alongside the loop
+            task = asyncio.create_task(asyncio.to_thread(_prewarm_llm))
+            _prewarm_tasks.add(task)
+            task.add_done_callback(_prewarm_tasks.discard)
+            from .gui import prepare_dialog
+
+            await run_gui(prepare_dialog, prewarm_checkpoint, mom_queue)
+            schedule.prewarmed(prewarm_checkpoint)
+
+        probe.mark("lights_out_first_iteration")
+        changes = await wait_for_settings_async(settings_inbox, 1)
+        schedule = _apply_settings(changes, schedule)
@@ -3,6 +3,8 @@ from PyQt6.QtWidgets import QWidget
 from PyQt6.QtCore import Qt, QRectF, QPointF
 from PyQt6.QtGui import QPainter, QPainterPath, QColor, QFont, QPen, QFontMetrics
 
+from utils import metrics
+
 # Constants matched from original bubble_window.py
 BUBBLE_FONT = "Consolas"
 BUBBLE_FONT_HEIGHT = 18  # Approx conversion from height 24 logfont
@@ -127,6 +129,10 @@ class BubbleWidget(QWidget):
         self.move(int(bx), int(by))
 
     def paintEvent(self, event):
+        with metrics.timed("urmom_paint_seconds", widget="bubble"):
+            self._paint()
+
+    def _paint(self):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
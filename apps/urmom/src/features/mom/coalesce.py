@@ -0,0 +1,65 @@
+from utils.ipc import (
+    ThrowSlipper,
+    ShowBubbleMessage,
+    SetExpression,
+    ShowBlacklistMessage,
+    ChangeAnger,
+    PrepareForScreenshot,
+    UpdateNagMessages,
+)
+
+# Handled the moment they arrive, never held back behind a burst
+PRIORITY_COMMANDS = (ThrowSlipper, PrepareForScreenshot)
+
+# How long MomWidget collects non-priority commands before acting on them
+COALESCE_WINDOW_MS = 100
+
+
+def is_priority(cmd) -> bool:
+    return isinstance(cmd, PRIORITY_COMMANDS)
+
+
+def coalesce(commands):
+    """
+    Collapses a burst of commands into the fewest commands with the same
+    visible effect: anger deltas are summed, blacklist notices become one
+    notice with a total count, and only the newest bubble message,
+    expression and nag list survive. Results keep the order of their last
+    contributor.
+    """
+    last_index = {}
+    anger_delta = 0
+    blacklist_names = []
+    blacklist_count = 0
+    newest = {}
+    passthrough = []
+
+    for i, cmd in enumerate(commands):
+        if isinstance(cmd, ChangeAnger):
+            anger_delta += cmd.delta
+            last_index[ChangeAnger] = i
+        elif isinstance(cmd, ShowBlacklistMessage):
+            if cmd.process not in blacklist_names:
+                blacklist_names.append(cmd.process)
+            blacklist_count += cmd.count
+            last_index[ShowBlacklistMessage] = i
+        elif isinstance(cmd, (ShowBubbleMessage, SetExpression, UpdateNagMessages)):
+            newest[type(cmd)] = cmd
+            last_index[type(cmd)] = i
+        else:
+            passthrough.append((i, cmd))
+
+    merged = list(passthrough)
+    if anger_delta:
+        merged.append((last_index[ChangeAnger], ChangeAnger(delta=anger_delta)))
+    if blacklist_names:
+        merged.append(
+            (
+                last_index[ShowBlacklistMessage],
+                ShowBlacklistMessage(process=", ".join(blacklist_names), count=blacklist_count),
+            )
+        )
+    for cls, cmd in newest.items():
+        merged.append((last_index[cls], cmd))
+
+    return [cmd for _, cmd in sorted(merged, key=lambda item: item[0])]
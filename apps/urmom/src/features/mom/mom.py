@@ -1,21 +1,32 @@
 import sys
 import random
-import queue  # For the Empty exception
 import threading
+import time
 from utils import log
+from utils.ipc import (
+    ThrowSlipper,
+    ShowBubbleMessage,
+    SetExpression,
+    ShowBlacklistMessage,
+    ChangeAnger,
+    PrepareForScreenshot,
+    UpdateNagMessages,
+)
 from PyQt6.QtWidgets import QApplication, QWidget, QMenu
-from PyQt6.QtCore import Qt, QTimer, QPoint, QRect, QUrl
+from PyQt6.QtCore import Qt, QTimer, QPoint, QRect, QUrl, QSocketNotifier
 from PyQt6.QtGui import QPixmap, QPainter, QAction, QIcon, QMouseEvent, QTransform
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 
 from .bubble import BubbleWidget
 from .popup import PopupWidget
+from .coalesce import coalesce, is_priority, COALESCE_WINDOW_MS
 import signal
 
 # Import SlipperOverlay directly so we can spawn it here
 from features.slipper.slipper import SlipperOverlay 
 
 from utils.paths import get_asset_path
+from utils import probe, metrics
 
 # Constants
 IMAGE_FILENAME = "mom.png"
@@ -43,6 +54,8 @@ class MomWidget(QWidget):
         self.anger = 1  # Anger meter, 1 = normal, higher = angrier
         self.is_animating = False # Flag to prevent animations from overlapping
         self.mumble_players = []
+        self.pending_commands = []
+        self._pixmap_cache = {}
 
         # --- Audio Setup for Camera ---
         self.audio_output_camera = QAudioOutput()
@@ -102,50 +115,70 @@ class MomWidget(QWidget):
         self.head_track_timer.timeout.connect(self.update_bubble_target)
         self.head_track_timer.start(100)
 
-        # --- IPC Polling Timer ---
+        # --- IPC: wake up only when a command actually arrives ---
         if self.command_queue:
-            self.ipc_timer = QTimer(self)
-            self.ipc_timer.timeout.connect(self.check_queue)
-            self.ipc_timer.start(100) # Check every 100ms
+            self.ipc_notifier = QSocketNotifier(
+                self.command_queue.fileno(), QSocketNotifier.Type.Read, self
+            )
+            self.ipc_notifier.activated.connect(self.check_queue)
+
+            # Bursts of ordinary commands are collected and applied together
+            self.coalesce_timer = QTimer(self)
+            self.coalesce_timer.setSingleShot(True)
+            self.coalesce_timer.timeout.connect(self.flush_pending_commands)
 
     def check_queue(self):
-        """Polls the multiprocessing queue for commands."""
-        try:
-            while not self.command_queue.empty():
-                cmd = self.command_queue.get_nowait()
-                self.handle_command(cmd)
-        except queue.Empty:
-            pass
+        """Drains every command waiting on the command bus."""
+        for envelope in self.command_queue.drain():
+            metrics.inc("urmom_mom_commands_total", type=envelope.command.TYPE)
+            metrics.observe("urmom_mom_command_latency_seconds", max(0.0, time.time() - envelope.sent_at))
+            if is_priority(envelope.command):
+                self.handle_command(envelope.command)
+            else:
+                self.pending_commands.append(envelope.command)
+        if self.pending_commands and not self.coalesce_timer.isActive():
+            self.coalesce_timer.start(COALESCE_WINDOW_MS)
+        metrics.set_gauge("urmom_mom_pending_commands", len(self.pending_commands))
+        if self.command_queue.closed:
+            log("IPC: command bus closed, no more commands will arrive")
+            self.ipc_notifier.setEnabled(False)
+
+    def flush_pending_commands(self):
+        """Applies the commands collected during the coalescing window."""
+        batch, self.pending_commands = self.pending_commands, []
+        merged = coalesce(batch)
+        metrics.set_gauge("urmom_mom_pending_commands", 0)
+        metrics.inc("urmom_mom_commands_coalesced_total", len(batch) - len(merged))
+        if len(merged) < len(batch):
+            log(f"Coalesced {len(batch)} commands into {len(merged)}")
+        for cmd in merged:
+            self.handle_command(cmd)
 
     def handle_command(self, cmd):
         """Dispatches commands to modify Mom or trigger events."""
-        msg_type = cmd.get("type")
-        
-        if msg_type == "throw_slipper":
+        if isinstance(cmd, ThrowSlipper):
             # Instantiate overlay directly within this process
             self.overlay = SlipperOverlay(self)
             self.overlay.show()
 
-        elif msg_type == "show_bubble_message":
-            text = cmd.get("text", "...")
-            score = cmd.get("score", 0.0)
-            self.show_bubble(text=text, score=score)
+        elif isinstance(cmd, ShowBubbleMessage):
+            self.show_bubble(text=cmd.text, score=cmd.score)
             
-        elif msg_type == "set_expression":
-            asset = cmd.get("asset", "mom.png")
-            self.set_look(asset)
+        elif isinstance(cmd, SetExpression):
+            self.set_look(cmd.asset)
 
-        elif msg_type == "show_blacklist_message":
-            process_name = cmd.get("process", "unknown")
-            self.show_blacklist_message(process_name)
+        elif isinstance(cmd, ShowBlacklistMessage):
+            self.show_blacklist_message(cmd.process, cmd.count)
 
-        elif msg_type == "change_anger":
-            delta = cmd.get("delta", 0)
-            self.update_anger(delta)
+        elif isinstance(cmd, ChangeAnger):
+            self.update_anger(cmd.delta)
         
-        elif msg_type == "prepare_for_screenshot":
+        elif isinstance(cmd, PrepareForScreenshot):
             self.play_camera_animation()
 
+        elif isinstance(cmd, UpdateNagMessages):
+            self.update_nag_messages(cmd.messages)
+
     def get_anger_image(self):
         """Returns the image filename corresponding to the anger level."""
         if self.anger == 0:
@@ -208,9 +241,10 @@ class MomWidget(QWidget):
         asset = self.get_anger_image()
         self.set_look(asset)
 
-    def show_blacklist_message(self, process_name):
+    def show_blacklist_message(self, process_name, count=1):
         """Show a bubble with a message about the blacklisted process."""
-        message = f"EH WHY ARE YOU RUNNING {process_name.upper()}??? STOP IT RIGHT NOW!"
+        times = f" {count} TIMES" if count > 1 else ""
+        message = f"EH WHY ARE YOU RUNNING {process_name.upper()}{times}??? STOP IT RIGHT NOW!"
         if not self.bubble:
             self.bubble = BubbleWidget(self.geometry(), [message])
         else:
@@ -224,6 +258,15 @@ class MomWidget(QWidget):
         # Restore original messages after 5 seconds
         QTimer.singleShot(5000, self.restore_bubble_messages)
 
+    def update_nag_messages(self, messages):
+        """Swap in a new list of nagging messages from a config reload."""
+        self.messages = list(messages)
+        self.original_messages = list(messages)
+        log(f"Nag messages updated ({len(self.messages)} messages)")
+        if self.bubble and not self.bubble.is_wyd_message:
+            self.bubble.messages = self.messages
+            self.bubble.phrase_index = 0
+
     def restore_bubble_messages(self):
         """Restore the bubble to show original nagging messages."""
         if self.bubble:
@@ -234,6 +277,20 @@ class MomWidget(QWidget):
             self.bubble.update()
 
     def load_pixmap(self, filename, flip_horizontal=False):
+        # Decoding and smooth-scaling the PNG is the expensive part of every
+        # mood change, and there are only a handful of looks
+        key = (filename, flip_horizontal)
+        pix = self._pixmap_cache.get(key)
+        if pix is None:
+            with metrics.timed("urmom_mom_render_pixmap_seconds"):
+                pix = self._render_pixmap(filename, flip_horizontal)
+            self._pixmap_cache[key] = pix
+
+        self.pixmap = pix
+        self.resize(self.pixmap.size())
+        self.update()
+
+    def _render_pixmap(self, filename, flip_horizontal):
         img_path = get_asset_path(filename)
         pix = QPixmap(img_path)
         
@@ -247,10 +304,7 @@ class MomWidget(QWidget):
         if flip_horizontal:
             transform = QTransform().scale(-1, 1)
             pix = pix.transformed(transform)
-        
-        self.pixmap = pix
-        self.resize(self.pixmap.size())
-        self.update()
+        return pix
 
     def set_look(self, filename, flip_horizontal=False):
         self.load_pixmap(filename, flip_horizontal)
@@ -283,10 +337,13 @@ class MomWidget(QWidget):
         QTimer.singleShot(750, flash_and_snap)
 
     def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
-        painter.drawPixmap(0, 0, self.pixmap)
+        with metrics.timed("urmom_paint_seconds", widget="mom"):
+            painter = QPainter(self)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.drawPixmap(0, 0, self.pixmap)
+            painter.end()
+        probe.mark("mom_first_paint")
 
     def mousePressEvent(self, event: QMouseEvent):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -1,3 +1,24 @@
-from .shutdown import *
-from .blacklist import *
-from .activewindow import *
+import importlib
+
+# Each submodule pulls in different native deps (pywin32, psutil); load them
+# on first access so importing the blacklist doesn't also load win32security.
+_SUBMODULES = ("shutdown", "blacklist", "enforcer", "matcher", "snapshot", "watcher", "activewindow")
+_EXPORTS = {
+    "shutdown_computer": "shutdown",
+    "find_and_kill_blacklisted_process": "blacklist",
+    "terminate_blacklisted_process": "blacklist",
+    "terminate_trees": "enforcer",
+    "BlacklistMatcher": "matcher",
+    "ProcessWatcher": "watcher",
+    "get_active_process_info": "activewindow",
+    "get_foreground_bounds": "activewindow",
+}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    if name in _EXPORTS:
+        module = importlib.import_module(f".{_EXPORTS[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,40 @@
+import ctypes
+
+import win32api
+import win32con
 import win32gui
 import win32process
 import psutil
 
+# DPI_AWARENESS_CONTEXT_PER_MONITOR_AWARE_V2
+_PER_MONITOR_AWARE_V2 = -4
+_dpi_aware = False
+
+
+def _ensure_dpi_aware():
+    """
+    Makes window and monitor rects come back in physical pixels, the
+    coordinates Pillow's ImageGrab works in. Without it, a scaled display
+    (125%, 150%) reports DPI-virtualized rects and the crop is off.
+    """
+    global _dpi_aware
+    if _dpi_aware:
+        return
+    _dpi_aware = True
+    windll = getattr(ctypes, "windll", None)
+    if windll is None:
+        return
+    try:
+        if windll.user32.SetProcessDpiAwarenessContext(ctypes.c_void_p(_PER_MONITOR_AWARE_V2)):
+            return
+    except (AttributeError, OSError):
+        pass
+    # Before Windows 10 1703, or already set (e.g. by Qt, which also picks per-monitor)
+    try:
+        windll.shcore.SetProcessDpiAwareness(2)
+    except (AttributeError, OSError):
+        windll.user32.SetProcessDPIAware()
+
 
 def get_active_process_info():
     hwnd = win32gui.GetForegroundWindow()
@@ -19,3 +52,27 @@ def get_active_process_info():
         }
     except psutil.NoSuchProcess:
         return None
+
+
+def get_foreground_bounds():
+    """
+    Screen rectangles (left, top, right, bottom) of the foreground window,
+    the monitor it is mostly on, and the whole virtual desktop.
+    """
+    _ensure_dpi_aware()
+    hwnd = win32gui.GetForegroundWindow()
+    if not hwnd:
+        return None
+    monitor = win32api.MonitorFromWindow(hwnd, win32con.MONITOR_DEFAULTTONEAREST)
+    left = win32api.GetSystemMetrics(win32con.SM_XVIRTUALSCREEN)
+    top = win32api.GetSystemMetrics(win32con.SM_YVIRTUALSCREEN)
+    return {
+        "window": win32gui.GetWindowRect(hwnd),
+        "monitor": win32api.GetMonitorInfo(monitor)["Monitor"],
+        "desktop": (
+            left,
+            top,
+            left + win32api.GetSystemMetrics(win32con.SM_CXVIRTUALSCREEN),
+            top + win32api.GetSystemMetrics(win32con.SM_CYVIRTUALSCREEN),
+        ),
+    }
@@ -1,46 +1,140 @@
+import asyncio
 import psutil
-import time
 from utils import log
+from utils.ipc import ShowBlacklistMessage, ChangeAnger
+from utils import probe, metrics
+from utils.config import SettingsInbox, wait_for_settings_async
+from .enforcer import terminate_trees
+from .matcher import BlacklistMatcher, Rule
+from .watcher import (
+    ProcessWatcher,
+    PsutilSource,
+    StartNotifier,
+    POLL_INTERVAL_SECONDS,
+    NOTIFIED_POLL_INTERVAL_SECONDS,
+)
+
+# One scan can match a whole process tree; Mom gets angry about the offence, not the PID count
+MAX_ANGER_PER_SCAN = 1
+
+
+def is_blacklisted(info: dict, matcher: BlacklistMatcher) -> Rule | None:
+    """Returns the blacklist rule the process matches, if any."""
+    return matcher.match(info.get("name"), info.get("exe"))
 
 
 def find_and_kill_blacklisted_process(blacklisted_processes: list[str], mom_queue=None) -> None:
+    """One full scan of every running process."""
+    with metrics.timed("urmom_blacklist_scan_seconds"):
+        matches = _scan(BlacklistMatcher(blacklisted_processes))
+    enforce(matches, mom_queue)
+
+
+def _scan(matcher):
     log("Checking for blacklisted processes...")
-    for proc in psutil.process_iter(["pid", "name", "exe"]):
-        for name in blacklisted_processes:
-            exe_lower = proc.info["exe"].lower() if proc.info["exe"] else ""
-            if name.lower() in exe_lower:
-                log(f"Found blacklisted process: {proc.info['exe']}")
-                if mom_queue:
-                    try:
-                        mom_queue.put({"type": "show_blacklist_message", "process": proc.info["name"]})
-                        mom_queue.put({"type": "change_anger", "delta": 1})
-                    except Exception as e:
-                        log(f"Failed to send message to mom: {e}")
-                terminate_blacklisted_process(
-                    proc.info["pid"], proc.info["name"], proc.info["exe"]
-                )
-    return None
+    matches = []
+    for proc in psutil.process_iter(["pid", "name", "exe", "create_time"]):
+        rule = is_blacklisted(proc.info, matcher)
+        if rule:
+            matches.append((proc.info, rule))
+    return matches
+
+
+def enforce(matches: list[tuple[dict, Rule]], mom_queue=None, terminate=terminate_trees):
+    """
+    Takes down every match from one scan together and tells Mom about all
+    of them in a single message.
+    """
+    if not matches:
+        return None
+    for info, rule in matches:
+        log(f"Found blacklisted process: {info['exe'] or info['name']} (rule {rule.entry!r})")
+        metrics.inc("urmom_blacklist_matches_total", kind=rule.kind)
+
+    with metrics.timed("urmom_blacklist_enforce_seconds"):
+        report = terminate([info for info, _ in matches])
+    for outcome in ("terminated", "killed", "survived", "denied"):
+        if report.count(outcome):
+            metrics.inc("urmom_blacklist_terminations_total", report.count(outcome), outcome=outcome)
+    log(
+        f"Ended {report.count('terminated') + report.count('killed')} processes "
+        f"({report.count('killed')} killed, {report.count('survived') + report.count('denied')} still running)"
+    )
+
+    if mom_queue:
+        names = list(dict.fromkeys(info["name"] for info, _ in matches))
+        mom_queue.put(ShowBlacklistMessage(process=", ".join(names), count=len(matches)))
+        mom_queue.put(ChangeAnger(delta=min(len(names), MAX_ANGER_PER_SCAN)))
+    return report
+
+
+def create_watcher(blacklisted_processes: list[str], source=None, **kwargs) -> ProcessWatcher:
+    matcher = BlacklistMatcher(blacklisted_processes)
+    return ProcessWatcher(source or PsutilSource(), lambda info: is_blacklisted(info, matcher), **kwargs)
+
+
+def watch_once(watcher: ProcessWatcher, mom_queue=None, terminate=terminate_trees):
+    """Handles processes that started since the previous call."""
+    with metrics.timed("urmom_blacklist_scan_seconds"):
+        matches = watcher.tick()
+    metrics.set_gauge("urmom_blacklist_tracked_processes", len(watcher))
+    report = enforce(matches, mom_queue, terminate)
+    if report:
+        watcher.give_up(report.denied)
+    return matches, report
 
 
 def terminate_blacklisted_process(pid: int, name: str, exe: str) -> None:
-    try:
-        log(f"Attempting to terminate process: {pid} {name} {exe}")
-        proc = psutil.Process(pid)
-        proc.terminate()
-    except (psutil.NoSuchProcess, psutil.AccessDenied):
-        log(f"Could not terminate process with PID, name and exe: {pid, name, exe}")
+    log(f"Attempting to terminate process: {pid} {name} {exe}")
+    terminate_trees([{"pid": pid, "name": name, "exe": exe}])
+
+
+def _apply_settings(changes, blacklisted_processes, watcher):
+    if "blacklisted_processes" in changes:
+        blacklisted_processes = changes["blacklisted_processes"]
+        log("Blacklist updated: " + ", ".join(blacklisted_processes))
+        # Every cached verdict was made against the old list
+        matcher = BlacklistMatcher(blacklisted_processes)
+        watcher.classify = lambda info: is_blacklisted(info, matcher)
+        watcher.invalidate()
+    return blacklisted_processes
 
 
-def main(blacklisted_processes: list[str], dev_mode, mom_queue=None) -> None:
+def main(blacklisted_processes: list[str], dev_mode, mom_queue=None, settings_inbox=None) -> None:
     if dev_mode == "1":
         return
     log(
         "Blacklist process started with blacklisted processes: "
         + ", ".join(blacklisted_processes)
     )
+    # The inbox doubles as the wake-up channel for process start notifications
+    inbox = settings_inbox or SettingsInbox()
+    notifier = StartNotifier(inbox.wake)
+    notifier.start()
+
+    watcher = create_watcher(blacklisted_processes)
+    while True:
+        watch_once(watcher, mom_queue)
+        probe.mark("blacklist_first_iteration")
+        interval = NOTIFIED_POLL_INTERVAL_SECONDS if notifier.available else POLL_INTERVAL_SECONDS
+        changes = inbox.wait(interval)
+        blacklisted_processes = _apply_settings(changes, blacklisted_processes, watcher)
+
+
+async def main_async(blacklisted_processes: list[str], dev_mode, mom_queue=None, settings_inbox=None) -> None:
+    """Cooperative variant of main; each tick runs on the runtime's thread pool."""
+    if dev_mode == "1":
+        return
+    log(
+        "Blacklist task started with blacklisted processes: "
+        + ", ".join(blacklisted_processes)
+    )
+    watcher = create_watcher(blacklisted_processes)
     while True:
-        find_and_kill_blacklisted_process(blacklisted_processes, mom_queue)
-        time.sleep(10)
+        await asyncio.to_thread(watch_once, watcher, mom_queue)
+        probe.mark("blacklist_first_iteration")
+        changes = await wait_for_settings_async(settings_inbox, POLL_INTERVAL_SECONDS)
+        blacklisted_processes = _apply_settings(changes, blacklisted_processes, watcher)
 
 
 if __name__ == "__main__":
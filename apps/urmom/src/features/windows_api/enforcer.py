@@ -0,0 +1,102 @@
+from dataclasses import dataclass, field
+
+import psutil
+
+from utils import log, WARNING
+
+# How long terminated processes get to exit before they are killed
+TERMINATE_GRACE_SECONDS = 3.0
+# How long killed processes get before we give up on them
+KILL_GRACE_SECONDS = 2.0
+
+
+@dataclass
+class TerminationReport:
+    terminated: list = field(default_factory=list)  # exited after terminate()
+    killed: list = field(default_factory=list)  # needed kill()
+    survived: list = field(default_factory=list)  # still running after kill()
+    denied: list = field(default_factory=list)  # we lack the rights to touch them
+
+    def count(self, outcome) -> int:
+        return len(getattr(self, outcome))
+
+
+def _collect_tree(info):
+    """
+    The matched process and all its descendants, or [] if it already exited.
+    The matched process is left suspended; terminate_trees() resumes it.
+    """
+    try:
+        root = psutil.Process(info["pid"])
+        # The PID may have been reused since the process was matched
+        if info.get("create_time") and root.create_time() != info["create_time"]:
+            return []
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return []
+    try:
+        # Stops a launcher from respawning children while we take it down
+        root.suspend()
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        pass
+    try:
+        return [root] + root.children(recursive=True)
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return [root]
+
+
+def terminate_trees(infos, grace=TERMINATE_GRACE_SECONDS, kill_grace=KILL_GRACE_SECONDS) -> TerminationReport:
+    """
+    Terminates every matched process together with its children in one pass,
+    waits on all of them at once and kills whatever is still alive when the
+    grace period ends. Takes at most grace + kill_grace seconds in total.
+    """
+    report = TerminationReport()
+    procs = {}
+    roots = set()
+    for info in infos:
+        tree = _collect_tree(info)
+        if tree:
+            roots.add(tree[0].pid)
+        for proc in tree:
+            procs[proc.pid] = proc
+
+    signalled = []
+    # Children first, so a dying parent has nothing left to restart
+    for proc in reversed(list(procs.values())):
+        try:
+            proc.terminate()
+            signalled.append(proc)
+        except psutil.NoSuchProcess:
+            report.terminated.append(proc.pid)
+        except psutil.AccessDenied:
+            report.denied.append(proc.pid)
+        if proc.pid in roots:
+            # Its children are signalled by now. On POSIX a stopped process only
+            # acts on SIGTERM once continued, so it would sit out the grace period
+            _resume(proc)
+
+    gone, alive = psutil.wait_procs(signalled, timeout=grace)
+    report.terminated.extend(p.pid for p in gone)
+
+    for proc in alive:
+        try:
+            proc.kill()
+        except psutil.NoSuchProcess:
+            pass
+        except psutil.AccessDenied:
+            report.denied.append(proc.pid)
+    gone, alive = psutil.wait_procs(alive, timeout=kill_grace)
+    report.killed.extend(p.pid for p in gone)
+    report.survived.extend(p.pid for p in alive if p.pid not in report.denied)
+
+    if report.survived or report.denied:
+        log(f"Could not terminate PIDs: survived={report.survived} denied={report.denied}", WARNING)
+    return report
+
+
+def _resume(proc):
+    # Never leave a process we could not end frozen
+    try:
+        proc.resume()
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        pass
@@ -0,0 +1,163 @@
+import fnmatch
+import re
+from dataclasses import dataclass
+
+# Blacklist entries may start with one of these to pick a rule type:
+#   name:steam.exe         process name equals (case-insensitive)
+#   glob:*launcher*.exe    shell-style wildcards; against the full path if the
+#                          pattern has a path separator, otherwise the name
+#   path:C:\Games\         executable path starts with
+# Anything else is a substring of the executable path, as before.
+RULE_KINDS = {"name": "exact", "glob": "glob", "path": "prefix"}
+
+
+@dataclass(frozen=True)
+class Rule:
+    kind: str  # "exact", "substring", "glob" or "prefix"
+    pattern: str  # lowercased, without the type prefix
+    entry: str  # as written in the config
+    index: int  # position in the blacklist; lower wins when several match
+
+
+def parse_rule(entry: str, index: int) -> Rule:
+    kind = "substring"
+    pattern = entry
+    head, sep, rest = entry.partition(":")
+    if sep and head.lower() in RULE_KINDS:
+        kind = RULE_KINDS[head.lower()]
+        pattern = rest
+    return Rule(kind=kind, pattern=pattern.lower(), entry=entry, index=index)
+
+
+class _AhoCorasick:
+    """Finds the lowest-index pattern occurring anywhere in a string, in one pass."""
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._out = [None]
+        for pattern, index in patterns:
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._out.append(None)
+                state = nxt
+            if self._out[state] is None or index < self._out[state]:
+                self._out[state] = index
+
+        # Breadth-first fail links; each state also inherits its suffix's best output
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                inherited = self._out[self._fail[nxt]]
+                if inherited is not None and (self._out[nxt] is None or inherited < self._out[nxt]):
+                    self._out[nxt] = inherited
+                queue.append(nxt)
+
+    def search(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        best = None
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            found = out[state]
+            if found is not None and (best is None or found < best):
+                best = found
+        return best
+
+
+class _GlobSet:
+    """
+    Globs compiled into one regex per leading literal character, so a name
+    is only tried against globs that could match its first character.
+    """
+
+    def __init__(self, rules):
+        buckets = {}
+        for rule in rules:
+            first = rule.pattern[0]
+            buckets.setdefault(None if first in "*?[" else first, []).append(rule)
+        # One named group per rule; alternation tries them in blacklist order
+        self._buckets = {
+            key: re.compile("|".join(f"(?P<r{r.index}>{fnmatch.translate(r.pattern)})" for r in bucket))
+            for key, bucket in buckets.items()
+        }
+
+    def match(self, text):
+        if not text:
+            return None
+        best = None
+        for regex in (self._buckets.get(text[0]), self._buckets.get(None)):
+            m = regex.match(text) if regex else None
+            if m:
+                index = int(m.lastgroup[1:])
+                if best is None or index < best:
+                    best = index
+        return best
+
+
+class BlacklistMatcher:
+    """
+    Compiles blacklist entries once so matching a process costs one pass
+    over its path instead of one lowercase-and-search per entry.
+    """
+
+    def __init__(self, entries: list[str]):
+        self.rules = [parse_rule(entry, i) for i, entry in enumerate(entries)]
+        # An empty pattern ("path:") would match everything, so it matches nothing
+        by_kind = {
+            kind: [r for r in self.rules if r.kind == kind and r.pattern]
+            for kind in ("exact", "substring", "glob", "prefix")
+        }
+
+        self._exact = {}
+        for rule in by_kind["exact"]:
+            self._exact.setdefault(rule.pattern, rule.index)
+        self._substrings = _AhoCorasick((r.pattern, r.index) for r in by_kind["substring"])
+        self._prefixes = {}
+        for rule in by_kind["prefix"]:
+            self._prefixes.setdefault(rule.pattern, rule.index)
+        self._prefix_lengths = sorted({len(p) for p in self._prefixes})
+        self._name_globs = _GlobSet(r for r in by_kind["glob"] if not _has_separator(r.pattern))
+        self._path_globs = _GlobSet(r for r in by_kind["glob"] if _has_separator(r.pattern))
+
+    def match(self, name: str | None, exe: str | None) -> Rule | None:
+        """Returns the first blacklist rule the process matches, or None."""
+        name_lower = (name or "").lower()
+        # No fallback to the name when the exe can't be read: those are mostly
+        # protected processes we couldn't end anyway. name: rules still apply
+        path_lower = (exe or "").lower()
+        candidates = [
+            self._exact.get(name_lower),
+            self._substrings.search(path_lower),
+            self._match_prefix(path_lower),
+            self._name_globs.match(name_lower),
+            self._path_globs.match(path_lower),
+        ]
+        found = [index for index in candidates if index is not None]
+        return self.rules[min(found)] if found else None
+
+    def _match_prefix(self, path):
+        best = None
+        for length in self._prefix_lengths:
+            if length > len(path):
+                break
+            index = self._prefixes.get(path[:length])
+            if index is not None and (best is None or index < best):
+                best = index
+        return best
+
+
+def _has_separator(pattern):
+    return "\\" in pattern or "/" in pattern
@@ -2,7 +2,7 @@ import win32api
 import win32security
 import datetime
 import time
-from utils import log
+from utils import log, ERROR
 
 
 """
@@ -42,20 +42,17 @@ def shutdown_computer(dev_mode):
 
     except win32api.error as e:
         error_msg = f"Win32 API error during shutdown: {e}"
-        log(error_msg)
-        print(error_msg)
+        log(error_msg, ERROR)
         return False
 
     except win32security.error as e:
         error_msg = f"Win32 Security error during shutdown: {e}"
-        log(error_msg)
-        print(error_msg)
+        log(error_msg, ERROR)
         return False
 
     except Exception as e:
         error_msg = f"Unexpected error during shutdown: {e}"
-        log(error_msg)
-        print(error_msg)
+        log(error_msg, ERROR)
         return False
 
 
@@ -0,0 +1,114 @@
+import gzip
+import json
+import time
+
+# Recordings are JSON lines, gzipped when the path ends in .gz. The first
+# line is a header; every other line is the change since the previous one:
+#   {"format": "urmom-procs", "version": 1, "interval": 0.25, "started_at": ...}
+#   {"t": 0.0, "start": [[pid, ppid, create_time, name, exe], ...], "exit": []}
+#   {"t": 0.25, "start": [...], "exit": [pid, ...]}
+# t is seconds since the recording started. Frames with no changes are omitted.
+FORMAT = "urmom-procs"
+VERSION = 1
+FIELDS = ("pid", "ppid", "create_time", "name", "exe")
+
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _snapshot(psutil):
+    """pid -> row for every running process."""
+    rows = {}
+    for proc in psutil.process_iter(list(FIELDS)):
+        info = proc.info
+        rows[info["pid"]] = [info[f] for f in FIELDS]
+    return rows
+
+
+def record(path, duration, interval=0.25):
+    """Samples the live process table every interval seconds for duration seconds."""
+    import psutil
+
+    start = time.monotonic()
+    previous = {}
+    with _open(path, "w") as f:
+        header = {"format": FORMAT, "version": VERSION, "interval": interval, "started_at": time.time()}
+        f.write(json.dumps(header) + "\n")
+        while True:
+            t = time.monotonic() - start
+            if t > duration:
+                break
+            current = _snapshot(psutil)
+            started = [row for pid, row in current.items() if previous.get(pid) is None or previous[pid][2] != row[2]]
+            exited = [pid for pid, row in previous.items() if pid not in current or current[pid][2] != row[2]]
+            if started or exited:
+                f.write(json.dumps({"t": round(t, 3), "start": started, "exit": exited}, separators=(",", ":")) + "\n")
+            previous = current
+            time.sleep(max(0.0, interval - (time.monotonic() - start - t)))
+
+
+def load(path):
+    """Returns (header, frames) from a recording."""
+    with _open(path, "r") as f:
+        header = json.loads(f.readline())
+        if header.get("format") != FORMAT or header.get("version") != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} {FORMAT} recording")
+        frames = [json.loads(line) for line in f if line.strip()]
+    return header, frames
+
+
+class ReplaySource:
+    """
+    Plays a recording back as a process table for ProcessWatcher. The
+    caller moves the virtual clock with advance(); kill(pid) stands in
+    for terminating a process.
+    """
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.now = 0.0
+        self.started_at = {}  # pid -> t the process appeared in the recording
+        self._next = 0
+        self._procs = {}
+        self._killed = set()
+
+    @property
+    def finished(self):
+        return self._next >= len(self.frames)
+
+    def advance(self, t):
+        """Applies every frame recorded up to virtual time t."""
+        self.now = t
+        while self._next < len(self.frames) and self.frames[self._next]["t"] <= t:
+            frame = self.frames[self._next]
+            self._next += 1
+            for pid in frame["exit"]:
+                self._procs.pop(pid, None)
+                self._killed.discard(pid)
+            for row in frame["start"]:
+                info = dict(zip(FIELDS, row))
+                self._procs[info["pid"]] = info
+                self.started_at[info["pid"]] = frame["t"]
+                self._killed.discard(info["pid"])
+
+    def kill(self, pid):
+        self._killed.add(pid)
+
+    def pids(self) -> set[int]:
+        return self._procs.keys() - self._killed
+
+    def create_time(self, pid) -> float | None:
+        info = self.info(pid)
+        return info["create_time"] if info else None
+
+    def info(self, pid) -> dict | None:
+        if pid in self._killed:
+            return None
+        info = self._procs.get(pid)
+        return dict(info) if info else None
+
+    def children(self, pid) -> list[int]:
+        return [p for p, info in self._procs.items() if info["ppid"] == pid and p not in self._killed]
@@ -0,0 +1,144 @@
+import threading
+import time
+
+from utils import log, WARNING
+
+# Seconds between diff-based ticks when the OS can't tell us about new processes
+POLL_INTERVAL_SECONDS = 0.5
+# With start notifications, ticks are only a safety net
+NOTIFIED_POLL_INTERVAL_SECONDS = 5.0
+# Every cached PID gets its create_time re-checked this often, to catch PID reuse
+FULL_RESCAN_SECONDS = 60.0
+# A match that survived termination is reported again after this long
+RETRY_MATCH_SECONDS = 10.0
+
+
+class PsutilSource:
+    """Live process table. Any object with pids(), create_time(pid) and info(pid) can replace it."""
+
+    def __init__(self):
+        import psutil
+
+        self._psutil = psutil
+
+    def pids(self) -> set[int]:
+        return set(self._psutil.pids())
+
+    def create_time(self, pid) -> float | None:
+        try:
+            return self._psutil.Process(pid).create_time()
+        except self._psutil.NoSuchProcess:
+            return None
+
+    def info(self, pid) -> dict | None:
+        try:
+            return self._psutil.Process(pid).as_dict(attrs=["pid", "name", "exe", "create_time"], ad_value=None)
+        except self._psutil.NoSuchProcess:
+            return None
+
+
+class ProcessWatcher:
+    """
+    Keeps a PID -> (create_time, verdict) cache so each tick only inspects
+    processes that appeared since the last one. Listing PIDs is cheap;
+    reading a process's name and exe is not, so that is done once per process.
+    """
+
+    def __init__(self, source, classify, clock=time.monotonic):
+        self.source = source
+        self.classify = classify  # info dict -> truthy verdict for blacklisted
+        self.clock = clock  # replays pass their virtual clock
+        self._cache = {}
+        self._last_full_rescan = clock()
+        self.inspected = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def invalidate(self):
+        """Forget every verdict, e.g. after the blacklist changes."""
+        self._cache.clear()
+
+    def tick(self) -> list[tuple[dict, object]]:
+        """Returns (info, verdict) for blacklisted processes that need handling."""
+        now = self.clock()
+        current = self.source.pids()
+
+        for pid in self._cache.keys() - current:
+            del self._cache[pid]
+
+        if now - self._last_full_rescan >= FULL_RESCAN_SECONDS:
+            self._last_full_rescan = now
+            self._drop_reused_pids()
+
+        matches = []
+        for pid in current - self._cache.keys():
+            info = self.source.info(pid)
+            self.inspected += 1
+            if info is None:
+                continue
+            verdict = self.classify(info)
+            self._cache[pid] = [info.get("create_time"), verdict, now if verdict else None, info]
+            if verdict:
+                matches.append((info, verdict))
+
+        # Matches we already handled but that are still running
+        for pid, entry in self._cache.items():
+            _, verdict, reported_at, info = entry
+            if verdict and reported_at is not None and now - reported_at >= RETRY_MATCH_SECONDS:
+                entry[2] = now
+                matches.append((info, verdict))
+        return matches
+
+    def give_up(self, pids):
+        """Stops reporting matches we lack the rights to end; they would anger Mom every retry."""
+        for pid in pids:
+            entry = self._cache.get(pid)
+            if entry:
+                entry[2] = None
+
+    def _drop_reused_pids(self):
+        # Only the start time; a reused PID is dropped here and inspected afresh by tick()
+        for pid, entry in list(self._cache.items()):
+            if self.source.create_time(pid) != entry[0]:
+                del self._cache[pid]
+
+
+class StartNotifier:
+    """
+    Calls on_start() whenever Windows reports a new process, via a WMI
+    event subscription on a background thread. available is False when
+    WMI (pywin32's win32com) can't be used, and callers fall back to polling.
+    """
+
+    def __init__(self, on_start):
+        self.on_start = on_start
+        self.available = False
+        try:
+            import pythoncom  # noqa: F401
+            import win32com.client  # noqa: F401
+
+            self.available = True
+        except ImportError:
+            pass
+
+    def start(self):
+        if self.available:
+            threading.Thread(target=self._run, name="urmom-process-notifier", daemon=True).start()
+
+    def _run(self):
+        import pythoncom
+        import win32com.client
+
+        pythoncom.CoInitialize()
+        try:
+            wmi = win32com.client.GetObject("winmgmts:")
+            events = wmi.ExecNotificationQuery(
+                "SELECT * FROM __InstanceCreationEvent WITHIN 0.2 WHERE TargetInstance ISA 'Win32_Process'"
+            )
+            while True:
+                events.NextEvent()
+                self.on_start()
+        except Exception as e:
+            log(f"Process start notifications unavailable, polling instead: {e}", WARNING)
+            self.available = False
@@ -0,0 +1,173 @@
+import base64
+import io
+import os
+import time
+from dataclasses import dataclass, field
+
+from utils import log, metrics
+
+# The vision model works on 336px tiles and caps how many it looks at, so
+# pixels beyond this on the long edge cost upload time and tokens for nothing.
+MAX_EDGE = int(os.environ.get("URMOM_WYD_MAX_EDGE", 1344))
+MIN_JPEG_QUALITY = 40
+# Below MIN_JPEG_QUALITY text on screen stops being readable, so lower settings are raised to it
+JPEG_QUALITY = min(max(int(os.environ.get("URMOM_WYD_JPEG_QUALITY", 80)), MIN_JPEG_QUALITY), 95)
+# Upper bound on the JPEG sent per cycle; quality, then size, drop to fit
+MAX_JPEG_BYTES = int(os.environ.get("URMOM_WYD_MAX_BYTES", 300_000))
+# "monitor": only the monitor showing the foreground window
+# "window": only the foreground window, falling back to its monitor if tiny or minimized
+# "desktop": every monitor
+CAPTURE_REGION = os.environ.get("URMOM_WYD_CAPTURE", "monitor")
+MIN_WINDOW_EDGE = 200
+QUALITY_STEP = 10
+SHRINK_FACTOR = 0.75
+
+
+@dataclass
+class Capture:
+    image: object  # downscaled RGB PIL image
+    base64_jpeg: str
+    jpeg_bytes: int
+    quality: int
+    source_size: tuple
+    timings: dict = field(default_factory=dict)  # stage -> seconds
+    region: str = "desktop"
+    # Versus sending every monitor. Upload only: Pillow still grabs the
+    # whole desktop and crops it
+    pixels_saved: int = 0
+    bytes_saved_estimate: int = 0
+
+    @property
+    def data_url(self):
+        return f"data:image/jpeg;base64,{self.base64_jpeg}"
+
+
+def _area(rect):
+    return max(0, rect[2] - rect[0]) * max(0, rect[3] - rect[1])
+
+
+def _intersect(a, b):
+    rect = (max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3]))
+    return rect if _area(rect) else None
+
+
+def capture_bounds(region=CAPTURE_REGION):
+    """
+    Returns (region used, bbox, desktop rect) in virtual-desktop coordinates.
+    bbox is None for a full capture, which is also the fallback whenever the
+    foreground window can't be located.
+    """
+    if region == "desktop":
+        return "desktop", None, None
+    try:
+        from features.windows_api import get_foreground_bounds
+
+        bounds = get_foreground_bounds()
+    except Exception:
+        bounds = None
+    if not bounds:
+        return "desktop", None, None
+    if region == "window":
+        window = _intersect(bounds["window"], bounds["monitor"])
+        if window and min(window[2] - window[0], window[3] - window[1]) >= MIN_WINDOW_EDGE:
+            return "window", window, bounds["desktop"]
+    return "monitor", bounds["monitor"], bounds["desktop"]
+
+
+def grab(bbox=None):
+    from PIL import ImageGrab
+
+    # all_screens so monitors left of or above the primary one can be captured.
+    # The whole desktop is grabbed either way; bbox only crops what is kept
+    return ImageGrab.grab(bbox=bbox, all_screens=True)
+
+
+def downscale(image, max_edge=MAX_EDGE):
+    """Shrinks the image so its long edge is at most max_edge, keeping the aspect ratio."""
+    from PIL import Image
+
+    image = image.convert("RGB")
+    if max(image.size) > max_edge:
+        # reducing_gap lets Pillow shrink by whole factors first, which is much faster on 4K
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS, reducing_gap=2.0)
+    return image
+
+
+def encode_jpeg(image, quality=JPEG_QUALITY, max_bytes=MAX_JPEG_BYTES):
+    """Returns (jpeg bytes, quality used, image), lowering quality and then size to fit max_bytes."""
+    # Always encodes at least once, whatever quality the caller passed
+    quality = max(quality, MIN_JPEG_QUALITY)
+    while True:
+        for q in range(quality, MIN_JPEG_QUALITY - 1, -QUALITY_STEP):
+            buffer = io.BytesIO()
+            image.save(buffer, "JPEG", quality=q, optimize=True)
+            data = buffer.getvalue()
+            if len(data) <= max_bytes:
+                return data, q, image
+        if min(image.size) < 64:
+            return data, q, image
+        image = image.resize((int(image.width * SHRINK_FACTOR), int(image.height * SHRINK_FACTOR)))
+
+
+def capture(max_edge=MAX_EDGE, quality=JPEG_QUALITY, max_bytes=MAX_JPEG_BYTES, region=CAPTURE_REGION,
+            source=None) -> Capture:
+    """Screen -> downscale -> JPEG -> base64, all in memory. source() replaces the screen grab."""
+    timings = {}
+
+    start = time.perf_counter()
+    if source is None:
+        region, bbox, desktop = capture_bounds(region)
+    else:
+        region, bbox, desktop = "desktop", None, None
+    timings["locate"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    screenshot = source() if source else grab(bbox)
+    timings["grab"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    image = downscale(screenshot, max_edge)
+    timings["resize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    jpeg, used_quality, image = encode_jpeg(image, quality, max_bytes)
+    timings["encode"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoded = base64.b64encode(jpeg).decode("ascii")
+    timings["base64"] = time.perf_counter() - start
+
+    result = Capture(
+        image=image,
+        base64_jpeg=encoded,
+        jpeg_bytes=len(jpeg),
+        quality=used_quality,
+        source_size=screenshot.size,
+        timings=timings,
+        region=region,
+    )
+    captured = screenshot.width * screenshot.height
+    full = _area(desktop) if desktop else captured
+    if full > captured:
+        result.pixels_saved = full - captured
+        # What the JPEG would have weighed at the same density, within the same budget
+        result.bytes_saved_estimate = max(0, min(max_bytes, result.jpeg_bytes * full // captured) - result.jpeg_bytes)
+    _report(result)
+    return result
+
+
+def _report(result: Capture):
+    for stage, seconds in result.timings.items():
+        metrics.observe("urmom_wyd_stage_seconds", seconds, stage=stage)
+    metrics.set_gauge("urmom_wyd_jpeg_bytes", result.jpeg_bytes)
+    metrics.set_gauge("urmom_wyd_payload_bytes", len(result.base64_jpeg))
+    metrics.inc("urmom_wyd_captures_total", region=result.region)
+    metrics.inc("urmom_wyd_pixels_saved_total", result.pixels_saved)
+    metrics.inc("urmom_wyd_bytes_saved_estimate_total", result.bytes_saved_estimate)
+    stages = " ".join(f"{stage}={seconds * 1000:.0f}ms" for stage, seconds in result.timings.items())
+    log(
+        f"WYD: captured {result.source_size[0]}x{result.source_size[1]} -> "
+        f"{result.image.width}x{result.image.height}, {result.jpeg_bytes / 1024:.0f} KB JPEG "
+        f"(q={result.quality}), {len(result.base64_jpeg) / 1024:.0f} KB payload; {result.region} capture sent "
+        f"{result.pixels_saved / 1e6:.1f} MP fewer, ~{result.bytes_saved_estimate / 1024:.0f} KB less upload; {stages}"
+    )
@@ -0,0 +1,90 @@
+import math
+import os
+
+from utils import log, metrics
+
+# 16x16 difference hash: 256 bits, robust to recompression and small
+# cursor/clock changes, sensitive to a different window or page
+HASH_SIZE = 16
+# Frames whose hashes differ in at most this many bits count as unchanged
+CHANGE_THRESHOLD = int(os.environ.get("URMOM_WYD_HASH_THRESHOLD", 12))
+# Reuse a verdict for at most this many cycles in a row, then look again anyway
+MAX_REUSED_CYCLES = 6
+
+# Rough token cost of one analysis, for the savings estimate: the model
+# sees 336px tiles at about 145 tokens each, plus the prompt and the reply
+TILE_EDGE = 336
+TOKENS_PER_TILE = 145
+PROMPT_TOKENS = 250
+REPLY_TOKENS = 60
+
+
+def dhash(image, hash_size=HASH_SIZE):
+    """Difference hash: whether each pixel of a tiny grayscale copy is brighter than its left neighbour."""
+    import numpy as np
+    from PIL import Image
+
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    return pixels[:, 1:] > pixels[:, :-1]
+
+
+def hamming(a, b) -> int:
+    import numpy as np
+
+    return int(np.count_nonzero(a != b))
+
+
+def estimate_tokens(image) -> int:
+    tiles = math.ceil(image.width / TILE_EDGE) * math.ceil(image.height / TILE_EDGE)
+    return tiles * TOKENS_PER_TILE + PROMPT_TOKENS + REPLY_TOKENS
+
+
+class ChangeDetector:
+    """
+    Remembers the hash of the last frame that was sent for analysis and
+    its verdict, so a screen that hasn't changed doesn't cost another LLM call.
+    """
+
+    def __init__(self, threshold=CHANGE_THRESHOLD, max_reused=MAX_REUSED_CYCLES):
+        self.threshold = threshold
+        self.max_reused = max_reused
+        self._hash = None
+        self._pending_hash = None
+        self._verdict = None
+        self._reused = 0
+        self.analyzed = 0
+        self.skipped = 0
+
+    def reusable_verdict(self, image):
+        """The previous verdict if image looks like the last analyzed frame, else None."""
+        current = dhash(image)
+        self._pending_hash = current
+        if self._hash is None or self._verdict is None or self._reused >= self.max_reused:
+            return None
+        distance = hamming(current, self._hash)
+        metrics.observe("urmom_wyd_hash_distance_bits", distance)
+        if distance > self.threshold:
+            return None
+
+        self._reused += 1
+        self.skipped += 1
+        metrics.inc("urmom_wyd_cycles_total", result="skipped")
+        metrics.inc("urmom_wyd_llm_calls_saved_total")
+        metrics.inc("urmom_wyd_tokens_saved_estimate_total", estimate_tokens(image))
+        metrics.set_gauge("urmom_wyd_skip_ratio", self.skipped / (self.skipped + self.analyzed))
+        log(f"WYD: screen unchanged ({distance} bits differ), reusing the last verdict")
+        return self._verdict
+
+    def remember(self, verdict):
+        """Records the verdict for the frame passed to the last reusable_verdict() call."""
+        self.analyzed += 1
+        metrics.inc("urmom_wyd_cycles_total", result="analyzed")
+        metrics.set_gauge("urmom_wyd_skip_ratio", self.skipped / (self.skipped + self.analyzed))
+        if verdict is None:
+            # A failed call is no baseline; try again next cycle
+            self._hash = None
+            return
+        self._hash = self._pending_hash
+        self._verdict = verdict
+        self._reused = 0
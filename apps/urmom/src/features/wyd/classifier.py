@@ -0,0 +1,139 @@
+import json
+import math
+import os
+import random
+import re
+
+from utils import log, WARNING, metrics
+from utils.paths import get_data_path
+
+# Past LLM verdicts, one JSON object per line, used to train the local model.
+# Holds window titles, so it stays in the user's app data directory
+HISTORY_FILE = os.environ.get("URMOM_WYD_HISTORY") or get_data_path("wyd_verdicts.jsonl")
+MAX_HISTORY = 2000
+# Below this the local guess is escalated to the vision model (when there is one)
+CONFIDENCE_THRESHOLD = float(os.environ.get("URMOM_WYD_LOCAL_CONFIDENCE", 0.6))
+LEARNING_RATE = 0.1
+L2 = 0.001
+EPOCHS = 5
+
+# Hand-written feature groups; their seed weights make the model useful before any history exists
+KEYWORDS = {
+    "code": (1.2, r"visual studio|pycharm|intellij|\bvim\b|neovim|sublime|\.(py|ts|tsx|js|java|c|cpp|rs|go)\b"
+                  r"|github|stack ?overflow|terminal|powershell|cmd\.exe"),
+    "study": (1.0, r"\bword\b|google docs|notion|obsidian|\.pdf\b|overleaf|onenote|excel|sheets|powerpoint"
+                   r"|lecture|tutorial|assignment|homework|canvas|coursera|khan academy"),
+    "research": (0.8, r"wikipedia|scholar|arxiv|jstor|documentation|\bdocs\b"),
+    "video": (-1.0, r"youtube|netflix|twitch|disney\+|prime video|tiktok|bilibili|crunchyroll"),
+    "social": (-1.0, r"instagram|facebook|twitter|\bx\.com\b|reddit|discord|whatsapp|telegram|messenger"),
+    "game": (-1.5, r"steam|epic games|minecraft|valorant|league of legends|roblox|\bosu\b|genshin|\bcs2\b"),
+    "shopping": (-0.7, r"shopee|lazada|amazon|taobao|carousell"),
+}
+_COMPILED = {name: re.compile(pattern) for name, (_, pattern) in KEYWORDS.items()}
+_WORD = re.compile(r"[a-z][a-z0-9+#.]{2,}")
+
+REPLIES = {
+    "good": [
+        "Wah, studying so hard! Good, like that then can go university.",
+        "Okay, this one I like to see. Continue ah.",
+    ],
+    "neutral": [
+        "What you doing there? Don't anyhow waste time hor.",
+        "Hmm, I watching you ah. Better start your work.",
+    ],
+    "bad": [
+        "Eh! Playing again?! Your cousin already finish homework you know!",
+        "Aiyo, stop this nonsense and go study now!",
+    ],
+}
+
+
+def features(info) -> list[str]:
+    """Sparse binary features from the foreground process name and window title."""
+    name = (info.get("name") or "").lower()
+    title = (info.get("title") or "").lower()
+    text = f"{name} {title}"
+    found = ["bias", f"app:{name}"]
+    found.extend(f"kw:{group}" for group, regex in _COMPILED.items() if regex.search(text))
+    found.extend({f"w:{word}" for word in _WORD.findall(title)})
+    return found
+
+
+class LocalClassifier:
+    """
+    Linear model over keyword, app and title-word features, squashed to a
+    [-1, 1] productivity score. Trained online from the vision model's verdicts.
+    """
+
+    def __init__(self, history_file=HISTORY_FILE, threshold=CONFIDENCE_THRESHOLD):
+        self.history_file = history_file
+        self.threshold = threshold
+        self.weights = {f"kw:{group}": weight for group, (weight, _) in KEYWORDS.items()}
+        self.weights["bias"] = 0.0
+        self.examples = 0
+
+    def predict(self, info):
+        """Returns (score, confidence); confidence is 0 when no known feature fired."""
+        feats = features(info)
+        known = [f for f in feats if f in self.weights and f != "bias"]
+        score = math.tanh(sum(self.weights.get(f, 0.0) for f in feats))
+        return score, abs(score) if known else 0.0
+
+    def verdict(self, info):
+        """A verdict in analyze_activity()'s shape if the model is confident, else None."""
+        if not info:
+            return None
+        score, confidence = self.predict(info)
+        if confidence < self.threshold:
+            metrics.inc("urmom_wyd_local_total", result="escalated")
+            return None
+        metrics.inc("urmom_wyd_local_total", result="confident")
+        band = "good" if score > 0.3 else "bad" if score < -0.3 else "neutral"
+        return {"reply": random.choice(REPLIES[band]), "score": round(score, 2), "source": "local"}
+
+    def learn(self, info, score):
+        """One SGD step on squared error against a verdict from the vision model."""
+        feats = features(info)
+        predicted = math.tanh(sum(self.weights.get(f, 0.0) for f in feats))
+        gradient = (predicted - score) * (1 - predicted * predicted)
+        for f in feats:
+            w = self.weights.get(f, 0.0)
+            self.weights[f] = w - LEARNING_RATE * (gradient + L2 * w)
+        self.examples += 1
+
+    def record(self, info, verdict):
+        """Learns from a remote verdict and appends it to the history file."""
+        if not info or not verdict or verdict.get("source") == "local" or verdict.get("score") is None:
+            return
+        score = max(-1.0, min(1.0, float(verdict["score"])))
+        self.learn(info, score)
+        try:
+            with open(self.history_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"name": info.get("name"), "title": info.get("title"), "score": score}) + "\n")
+        except OSError as e:
+            log(f"WYD: could not save verdict history: {e}", WARNING)
+
+    def train_from_history(self):
+        """Replays saved verdicts a few times; keeps the file to its last MAX_HISTORY lines."""
+        try:
+            with open(self.history_file, encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        if len(lines) > MAX_HISTORY:
+            lines = lines[-MAX_HISTORY:]
+            with open(self.history_file, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+
+        samples = []
+        for line in lines:
+            try:
+                samples.append(json.loads(line))
+            except ValueError:
+                continue
+        rng = random.Random(0)
+        for _ in range(EPOCHS):
+            rng.shuffle(samples)
+            for sample in samples:
+                self.learn(sample, sample["score"])
+        log(f"WYD: local classifier trained on {len(samples)} past verdicts")
@@ -0,0 +1,136 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from utils import metrics
+
+# A verdict that would reach Mom later than this after its capture is not worth delivering
+STALE_AFTER_SECONDS = float(os.environ.get("URMOM_WYD_STALE_SECONDS", 90))
+# Frames waiting for analysis; when full, the oldest waiting frame is dropped
+QUEUE_SIZE = 2
+
+
+class Schedule:
+    """
+    Tick k is at anchor + k * period on the monotonic clock, so the period
+    never stretches by however long a cycle took. Ticks that are already
+    past when asked for are skipped rather than fired late in a burst.
+    """
+
+    def __init__(self, period, first_tick=None, clock=time.monotonic):
+        self.period = period
+        # The configured period; period is this times stretch
+        self.base_period = period
+        self.stretch = 1.0
+        self.clock = clock
+        self.anchor = (first_tick if first_tick is not None else clock() + period) - period
+        self.k = 0
+        self.missed = 0
+
+    def next_tick(self) -> float:
+        self.k += 1
+        tick = self.anchor + self.k * self.period
+        behind = self.clock() - tick
+        if behind > 0:
+            skipped = math.ceil(behind / self.period)
+            self.k += skipped
+            self.missed += skipped
+            metrics.inc("urmom_wyd_ticks_missed_total", skipped)
+            tick = self.anchor + self.k * self.period
+        return tick
+
+    def set_period(self, period):
+        """
+        Re-anchors on the previous tick, so the pending one moves by the change
+        in period. Call next_tick() again afterwards for the new pending tick.
+        """
+        self.base_period = period
+        self._reanchor(period * self.stretch)
+
+    def set_stretch(self, stretch):
+        """Lengthens the configured period by a factor; like set_period, call next_tick() after."""
+        self.stretch = stretch
+        self._reanchor(self.base_period * stretch)
+
+    def _reanchor(self, period):
+        if self.k:
+            self.anchor += (self.k - 1) * self.period
+        self.period = period
+        self.k = 0
+
+
+@dataclass
+class Job:
+    seq: int
+    scheduled_at: float
+    deadline: float
+    captured_at: float = 0.0
+    shot: object = None  # Capture waiting for analysis
+    verdict: dict = None  # already settled by a cheap tier
+    app: dict = None
+    key: tuple = None
+    source: str = None  # tier that settled it: local, cache, unchanged or llm
+
+
+def record_jitter(job: Job, now):
+    metrics.observe("urmom_wyd_tick_jitter_seconds", abs(now - job.scheduled_at))
+
+
+def dropped(reason):
+    metrics.inc("urmom_wyd_frames_dropped_total", reason=reason)
+
+
+class JobQueue:
+    """Bounded FIFO between the capture loop and the analysis worker thread."""
+
+    def __init__(self, size=QUEUE_SIZE):
+        self.size = size
+        self._jobs = deque()
+        self._cond = threading.Condition()
+
+    def put(self, job: Job):
+        with self._cond:
+            while len(self._jobs) >= self.size:
+                self._jobs.popleft()
+                dropped("queue_full")
+            self._jobs.append(job)
+            metrics.set_gauge("urmom_wyd_queue_depth", len(self._jobs))
+            self._cond.notify()
+
+    def get(self) -> Job:
+        with self._cond:
+            while not self._jobs:
+                self._cond.wait()
+            job = self._jobs.popleft()
+            metrics.set_gauge("urmom_wyd_queue_depth", len(self._jobs))
+            return job
+
+
+class AsyncJobQueue:
+    """JobQueue for the asyncio runtime, where the worker is a task rather than a thread."""
+
+    def __init__(self, size=QUEUE_SIZE):
+        import asyncio
+
+        self.size = size
+        self._jobs = deque()
+        self._ready = asyncio.Event()
+
+    def put(self, job: Job):
+        while len(self._jobs) >= self.size:
+            self._jobs.popleft()
+            dropped("queue_full")
+        self._jobs.append(job)
+        metrics.set_gauge("urmom_wyd_queue_depth", len(self._jobs))
+        self._ready.set()
+
+    async def get(self) -> Job:
+        while not self._jobs:
+            self._ready.clear()
+            await self._ready.wait()
+        job = self._jobs.popleft()
+        metrics.set_gauge("urmom_wyd_queue_depth", len(self._jobs))
+        return job
@@ -0,0 +1,218 @@
+import os
+import sqlite3
+import threading
+import time
+
+from utils import log, WARNING, metrics
+from utils.paths import get_data_path
+
+TIMELINE_FILE = os.environ.get("URMOM_WYD_TIMELINE") or get_data_path("wyd_timeline.db")
+# Raw verdicts, hourly and daily rollups are each kept this many days
+RAW_RETENTION_DAYS = int(os.environ.get("URMOM_WYD_TIMELINE_RAW_DAYS", 90))
+HOURLY_RETENTION_DAYS = 400
+DAILY_RETENTION_DAYS = 5 * 365
+COMPACT_INTERVAL_SECONDS = 24 * 60 * 60
+# Same bands report_analysis() uses to change Mom's mood
+PRODUCTIVE_SCORE = 0.3
+UNPRODUCTIVE_SCORE = -0.3
+DELETE_BATCH = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    app TEXT,
+    title TEXT,
+    score REAL NOT NULL,
+    source TEXT NOT NULL,
+    model TEXT,
+    latency REAL
+);
+CREATE INDEX IF NOT EXISTS verdicts_ts ON verdicts (ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    bucket TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    score_sum REAL NOT NULL,
+    score_min REAL NOT NULL,
+    score_max REAL NOT NULL,
+    productive INTEGER NOT NULL,
+    unproductive INTEGER NOT NULL,
+    llm_calls INTEGER NOT NULL,
+    latency_sum REAL NOT NULL,
+    PRIMARY KEY (bucket, start)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_ROLLUP = """
+INSERT INTO rollups VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (bucket, start) DO UPDATE SET
+    count = count + 1,
+    score_sum = score_sum + excluded.score_sum,
+    score_min = min(score_min, excluded.score_min),
+    score_max = max(score_max, excluded.score_max),
+    productive = productive + excluded.productive,
+    unproductive = unproductive + excluded.unproductive,
+    llm_calls = llm_calls + excluded.llm_calls,
+    latency_sum = latency_sum + excluded.latency_sum
+"""
+
+BUCKETS = ("hour", "day")
+
+
+def bucket_starts(ts):
+    """Start of the local-time hour and day containing ts, as epoch seconds."""
+    t = time.localtime(ts)
+    hour = time.mktime((t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour, 0, 0, 0, 0, t.tm_isdst))
+    day = time.mktime((t.tm_year, t.tm_mon, t.tm_mday, 0, 0, 0, 0, 0, -1))
+    return int(hour), int(day)
+
+
+class Timeline:
+    """
+    Append-only history of WYD verdicts in SQLite (WAL, so the dashboard can
+    read while WYD writes). Each insert also updates its hour's and day's
+    rollup row in the same transaction, so range summaries read a handful of
+    rollup rows instead of scanning months of verdicts.
+    """
+
+    def __init__(self, path=TIMELINE_FILE, clock=time.time):
+        self.path = path
+        self.clock = clock
+        # WYD records from its analysis worker, and from the runtime's thread pool in async mode
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA auto_vacuum = INCREMENTAL")  # only takes effect on a new file
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._last_compact = 0.0
+        self.compact()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def record(self, score, app=None, source="llm", model=None, latency=None, ts=None):
+        ts = self.clock() if ts is None else ts
+        app = app or {}
+        score = max(-1.0, min(1.0, float(score)))
+        productive = int(score > PRODUCTIVE_SCORE)
+        unproductive = int(score < UNPRODUCTIVE_SCORE)
+        llm_call = int(source == "llm")
+        with self._lock:
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.execute(
+                    "INSERT INTO verdicts (ts, app, title, score, source, model, latency) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (ts, app.get("name"), app.get("title"), score, source, model, latency),
+                )
+                for bucket, start in zip(BUCKETS, bucket_starts(ts)):
+                    self._db.execute(
+                        _UPSERT_ROLLUP,
+                        (bucket, start, score, score, score, productive, unproductive, llm_call, latency or 0.0),
+                    )
+        metrics.inc("urmom_wyd_timeline_records_total", source=source)
+        if self.clock() - self._last_compact > COMPACT_INTERVAL_SECONDS:
+            self.compact()
+
+    def rollups(self, start, end, bucket="hour"):
+        """Per-hour or per-day summaries for buckets starting in [start, end)."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT start, count, score_sum, score_min, score_max, productive, unproductive, llm_calls, latency_sum "
+                "FROM rollups WHERE bucket = ? AND start >= ? AND start < ? ORDER BY start",
+                (bucket, int(start), int(end)),
+            ).fetchall()
+        return [
+            {
+                "start": row[0],
+                "count": row[1],
+                "avg_score": row[2] / row[1],
+                "min_score": row[3],
+                "max_score": row[4],
+                "productive": row[5],
+                "unproductive": row[6],
+                "llm_calls": row[7],
+                "avg_latency": row[8] / row[7] if row[7] else None,
+            }
+            for row in rows
+        ]
+
+    def summary(self, start, end, bucket="day"):
+        """One summary over [start, end), to the resolution of bucket."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sum(count), sum(score_sum), min(score_min), max(score_max), sum(productive), "
+                "sum(unproductive), sum(llm_calls), sum(latency_sum) "
+                "FROM rollups WHERE bucket = ? AND start >= ? AND start < ?",
+                (bucket, int(start), int(end)),
+            ).fetchone()
+        count = row[0] or 0
+        return {
+            "count": count,
+            "avg_score": row[1] / count if count else None,
+            "min_score": row[2],
+            "max_score": row[3],
+            "productive": row[4] or 0,
+            "unproductive": row[5] or 0,
+            "llm_calls": row[6] or 0,
+            "avg_latency": row[7] / row[6] if row[6] else None,
+        }
+
+    def verdicts(self, start, end, limit=1000):
+        """Raw verdicts in [start, end), newest first. Only the last RAW_RETENTION_DAYS are kept."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT ts, app, title, score, source, model, latency FROM verdicts "
+                "WHERE ts >= ? AND ts < ? ORDER BY ts DESC LIMIT ?",
+                (start, end, limit),
+            ).fetchall()
+        keys = ("ts", "app", "title", "score", "source", "model", "latency")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def compact(self):
+        """Drops rows past their retention, then returns the freed pages and truncates the WAL."""
+        now = self.clock()
+        self._last_compact = now
+        removed = 0
+        with self._lock:
+            try:
+                removed += self._delete("DELETE FROM verdicts WHERE id IN "
+                                        "(SELECT id FROM verdicts WHERE ts < ? LIMIT ?)",
+                                        now - RAW_RETENTION_DAYS * 86400)
+                for bucket, days in (("hour", HOURLY_RETENTION_DAYS), ("day", DAILY_RETENTION_DAYS)):
+                    removed += self._delete(
+                        f"DELETE FROM rollups WHERE bucket = '{bucket}' AND start IN "
+                        f"(SELECT start FROM rollups WHERE bucket = '{bucket}' AND start < ? LIMIT ?)",
+                        now - days * 86400,
+                    )
+                if removed:
+                    self._db.execute("PRAGMA incremental_vacuum")
+                self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error as e:
+                log(f"WYD: could not compact the timeline: {e}", WARNING)
+                return 0
+        if removed:
+            log(f"WYD: timeline compacted, {removed} expired rows removed")
+        return removed
+
+    def _delete(self, statement, cutoff):
+        # In batches, so a first compaction after a long time doesn't hold the write lock for long
+        removed = 0
+        while True:
+            with self._db:
+                self._db.execute("BEGIN")
+                count = self._db.execute(statement, (cutoff, DELETE_BATCH)).rowcount
+            removed += count
+            if count < DELETE_BATCH:
+                return removed
+
+
+def open_timeline(path=TIMELINE_FILE):
+    """The timeline, or None if it can't be opened; WYD runs on without history then."""
+    try:
+        return Timeline(path)
+    except sqlite3.Error as e:
+        log(f"WYD: timeline disabled, could not open {path}: {e}", WARNING)
+        return None
@@ -0,0 +1,109 @@
+import os
+import re
+import time
+from collections import OrderedDict
+
+from utils import log, metrics
+
+VERDICT_TTL_SECONDS = 15 * 60
+CACHE_SIZE = 64
+# However fresh the cache, take a real screenshot at least this often
+FORCE_CAPTURE_MINUTES = float(os.environ.get("URMOM_WYD_FORCE_CAPTURE_MINUTES", 30))
+
+_COUNTER = re.compile(r"^[\(\[]\d+[\)\]]\s*")  # "(3) Inbox" unread badges
+_DIGITS = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+
+
+def app_key(info):
+    """
+    Normalizes foreground window info into (process name, title pattern).
+    Titles usually read "<document> - <context> - <app>"; the document part
+    changes constantly, so with three or more parts it is dropped. Numbers
+    and unread badges are masked so "(3) Inbox" and "(4) Inbox" share a key.
+    """
+    if not info or not info.get("name"):
+        return None
+    title = _COUNTER.sub("", (info.get("title") or "").strip().lower())
+    parts = [p.strip() for p in title.split(" - ") if p.strip()]
+    if len(parts) >= 3:
+        parts = parts[1:]
+    pattern = _SPACES.sub(" ", _DIGITS.sub("#", " - ".join(parts)))[:80]
+    return info["name"].lower(), pattern
+
+
+def foreground_app():
+    """get_active_process_info(), or None where it isn't available."""
+    try:
+        from features.windows_api import get_active_process_info
+
+        return get_active_process_info()
+    except Exception:
+        return None
+
+
+class VerdictCache:
+    """
+    LRU cache of WYD verdicts by foreground app, each valid for ttl seconds.
+    capture_due() says when a real screenshot is needed regardless.
+    """
+
+    def __init__(self, size=CACHE_SIZE, ttl=VERDICT_TTL_SECONDS, force_capture_minutes=FORCE_CAPTURE_MINUTES,
+                 clock=time.monotonic):
+        self.size = size
+        self.ttl = ttl
+        self.force_capture_seconds = force_capture_minutes * 60
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (stored_at, verdict)
+        self._last_capture = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"lru": 0, "ttl": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def capture_due(self) -> bool:
+        return self._last_capture is None or self.clock() - self._last_capture >= self.force_capture_seconds
+
+    def get(self, key):
+        entry = self._entries.get(key) if key else None
+        if entry is not None and self.clock() - entry[0] >= self.ttl:
+            del self._entries[key]
+            self._evicted("ttl")
+            entry = None
+        if entry is None:
+            self.misses += 1
+            metrics.inc("urmom_wyd_verdict_cache_total", result="miss")
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        metrics.inc("urmom_wyd_verdict_cache_total", result="hit")
+        return entry[1]
+
+    def put(self, key, verdict):
+        """Stores the verdict from a real capture; that capture also resets the forced schedule."""
+        self._last_capture = self.clock()
+        if not key or verdict is None:
+            return
+        self._entries[key] = (self.clock(), verdict)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+            self._evicted("lru")
+        metrics.set_gauge("urmom_wyd_verdict_cache_entries", len(self._entries))
+
+    def _evicted(self, reason):
+        self.evictions[reason] += 1
+        metrics.inc("urmom_wyd_verdict_cache_evictions_total", reason=reason)
+        metrics.set_gauge("urmom_wyd_verdict_cache_entries", len(self._entries))
+
+
+def lookup(cache: VerdictCache, key):
+    """The cached verdict for key, unless a real capture is due."""
+    if key is None or cache.capture_due():
+        return None
+    verdict = cache.get(key)
+    if verdict is not None:
+        log(f"WYD: reusing cached verdict for {key[0]} ({key[1] or 'no title'})")
+    return verdict
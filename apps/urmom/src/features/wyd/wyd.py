@@ -1,41 +1,40 @@
+import asyncio
 import os
 import sys
+import threading
 import time
-import base64
 import json
-from litellm import completion
-from PIL import ImageGrab
 from utils.env import load_env
-from utils import log
+from utils import log, ERROR, WARNING
+from utils.ipc import PrepareForScreenshot, ShowBubbleMessage, ChangeAnger
+from utils import probe, metrics, llm, budget
+from utils.config import wait_for_settings, wait_for_settings_async
+from . import capture
+from .change import ChangeDetector
+from . import verdicts, scheduler, timeline
+from .classifier import LocalClassifier
 
 # --- Constants ---
 DEFAULT_MODEL = "groq/meta-llama/llama-4-scout-17b-16e-instruct"
 CHECK_INTERVAL_SECONDS = 5 * 60  # 5 minutes
 ANIMATION_DELAY_SECONDS = 2
+# Vision calls are slow; past this the cycle gives up rather than stalling WYD
+LLM_DEADLINE_SECONDS = 45
+LLM_PURPOSE = "wyd"
+# Stretch changes smaller than this don't move the schedule
+MIN_STRETCH_CHANGE = 0.1
 
 
 def take_screenshot():
-    """Takes a screenshot and returns the path to a temporary file."""
+    """Captures the screen into an in-memory, downscaled JPEG ready to upload."""
     try:
-        screenshot = ImageGrab.grab()
-        # --- FIX: Use a unique filename to avoid caching issues ---
-        temp_dir = os.getenv("TEMP", "/tmp")
-        temp_filename = f"urmom_screenshot_{int(time.time())}.jpg"
-        temp_path = os.path.join(temp_dir, temp_filename)
-        screenshot.save(temp_path, "JPEG")
-        return temp_path
+        return capture.capture()
     except Exception as e:
-        log(f"WYD Error taking screenshot: {e}")
+        log(f"WYD Error taking screenshot: {e}", ERROR)
         return None
 
 
-def encode_image(image_path):
-    """Encodes an image file to a base64 string."""
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode("utf-8")
-
-
-def analyze_activity(image_path, model=DEFAULT_MODEL):
+def analyze_activity(shot, model=DEFAULT_MODEL, deadline=LLM_DEADLINE_SECONDS):
     """
     Sends the screenshot to the AI for analysis and returns the structured response.
     """
@@ -56,14 +55,13 @@ def analyze_activity(image_path, model=DEFAULT_MODEL):
     }
     Do not output anything else. Be concise.
     """
-    base64_image = encode_image(image_path)
-    if not base64_image:
-        return None
-
     try:
         log("WYD: Analyzing screenshot...")
-        response = completion(
+        llm_start = time.perf_counter()
+        response = llm.complete(
             model=model,
+            deadline=deadline,
+            purpose=LLM_PURPOSE,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {
@@ -76,7 +74,7 @@ def analyze_activity(image_path, model=DEFAULT_MODEL):
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
+                                "url": shot.data_url
                             },
                         },
                     ],
@@ -84,55 +82,295 @@ def analyze_activity(image_path, model=DEFAULT_MODEL):
             ],
             response_format={"type": "json_object"},
         )
+        metrics.observe("urmom_wyd_llm_seconds", time.perf_counter() - llm_start, model=model)
         log("WYD: Received analysis:")
         data = json.loads(response.choices[0].message.content)
         log(str(data))
         return data
 
+    except llm.BudgetExceeded as e:
+        log(f"WYD: {e}", WARNING)
+        metrics.inc("urmom_wyd_errors_total", stage="budget")
+        return None
     except Exception as e:
-        log(f"WYD Error calling AI: {e}")
+        log(f"WYD Error calling AI: {e}", ERROR)
+        metrics.inc("urmom_wyd_errors_total", stage="llm")
         return None
-    finally:
-        # Clean up the temporary screenshot file
-        if os.path.exists(image_path):
-            os.remove(image_path)
 
-def main(mom_queue=None, check_interval_minutes=10):
+def analyze_frame(shot, detector, deadline=LLM_DEADLINE_SECONDS):
+    """
+    Analysis half of a cycle: the last verdict if the screen hasn't changed,
+    else the model's. Returns (verdict, "unchanged" or "llm").
+    """
+    verdict = detector.reusable_verdict(shot.image)
+    if verdict is not None:
+        return verdict, "unchanged"
+    verdict = analyze_activity(shot, deadline=deadline)
+    detector.remember(verdict)
+    return verdict, "llm"
+
+
+def report_analysis(analysis, mom_queue):
+    """Sends Mom the verdict and the matching mood change."""
+    if not analysis or not mom_queue:
+        return
+    reply = analysis.get("reply")
+    score = analysis.get("score")
+
+    if reply is not None and score is not None:
+        mom_queue.put(ShowBubbleMessage(text=reply, score=float(score)))
+        if score < -0.3:
+            mom_queue.put(ChangeAnger(delta=1))
+        elif score > 0.3:
+            mom_queue.put(ChangeAnger(delta=-1))
+
+
+def _llm_enabled():
     load_env()
     if not os.environ.get("GROQ_API_KEY"):
         log(
-            "⚠️ WYD: GROQ_API_KEY not found in environment. This feature will be disabled."
+            "⚠️ WYD: GROQ_API_KEY not found in environment. Only the local classifier will be used."
         )
-        return
-        
-    print("👀 WYD Manager started. Checking screen every {check_interval_minutes:.1f} minutes.")
-    
-    while True:
-        # 1. Tell Mom to get ready for the picture
-        if mom_queue:
+        # Without the LLM there may be no verdict to report for a long while
+        probe.mark("wyd_local_only")
+        return False
+    return True
+
+
+def _create_classifier():
+    classifier = LocalClassifier()
+    classifier.train_from_history()
+    return classifier
+
+
+def quick_verdict(cache, classifier, llm_enabled):
+    """
+    The tiers that need no screenshot: a cached verdict for the app in
+    front, then the local classifier. Returns (verdict or None, app info, cache key).
+    """
+    app = verdicts.foreground_app()
+    key = verdicts.app_key(app)
+    verdict = verdicts.lookup(cache, key)
+    # A due forced capture outranks a local guess, if there is a model to capture for
+    if verdict is None and not (llm_enabled and cache.capture_due()):
+        with metrics.timed("urmom_wyd_local_seconds"):
+            verdict = classifier.verdict(app)
+    return verdict, app, key
+
+
+class Pipeline:
+    """
+    A WYD cycle split in two. prepare() and capture() run on the schedule;
+    process() runs on the analysis worker, one job at a time in capture
+    order, so a slow LLM call delays only its own verdict.
+    """
+
+    # Smoothing for the running LLM latency estimate used to drop doomed frames
+    LATENCY_SMOOTHING = 0.3
+
+    def __init__(self, mom_queue, llm_enabled, stale_after=scheduler.STALE_AFTER_SECONDS):
+        self.mom_queue = mom_queue
+        self.llm_enabled = llm_enabled
+        self.stale_after = stale_after
+        self.detector = ChangeDetector()
+        self.cache = verdicts.VerdictCache()
+        self.classifier = _create_classifier()
+        self.timeline = timeline.open_timeline()
+        self.expected_latency = 0.0
+        self._seq = 0
+        # The cache and classifier are shared by the schedule and the worker
+        self._lock = threading.Lock()
+
+    def prepare(self, tick):
+        """Just before a tick: settles it with a cheap tier, or warns Mom a picture is coming."""
+        self._seq += 1
+        job = scheduler.Job(seq=self._seq, scheduled_at=tick, deadline=tick + self.stale_after)
+        # Over budget, the local tiers carry on alone until spend rolls off
+        llm_enabled = self.llm_enabled and budget.get_budget().check(LLM_PURPOSE) is None
+        with self._lock:
+            job.verdict, job.app, job.key = quick_verdict(self.cache, self.classifier, llm_enabled)
+        if job.verdict is not None:
+            job.source = job.verdict.get("source", "cache")
+        if job.verdict is None and not llm_enabled:
+            return None
+        if job.verdict is None and self.mom_queue:
             log("WYD: Telling Mom to take a picture.")
-            mom_queue.put({"type": "prepare_for_screenshot"})
-            time.sleep(ANIMATION_DELAY_SECONDS)  # Give animation time to play
-
-        # 2. Take the screenshot and analyze it
-        screenshot_path = take_screenshot()
-        analysis = None
-        if screenshot_path:
-            analysis = analyze_activity(screenshot_path)
-
-        # 3. Send the analysis results back to Mom
-        if analysis and mom_queue:
-            reply = analysis.get("reply")
-            score = analysis.get("score")
-
-            if reply is not None and score is not None:
-                mom_queue.put(
-                    {"type": "show_bubble_message", "text": reply, "score": score}
-                )
-                if score < -0.3:
-                    mom_queue.put({"type": "change_anger", "delta": 1})
-                elif score > 0.3:
-                    mom_queue.put({"type": "change_anger", "delta": -1})
-
-        # 4. Wait for the next cycle
-        time.sleep(check_interval_minutes * 60 - ANIMATION_DELAY_SECONDS)
+            self.mom_queue.put(PrepareForScreenshot())
+        return job
+
+    def capture(self, job):
+        scheduler.record_jitter(job, time.monotonic())
+        if job.verdict is None:
+            with metrics.timed("urmom_wyd_capture_seconds"):
+                job.shot = take_screenshot()
+            if job.shot is None:
+                metrics.inc("urmom_wyd_errors_total", stage="capture")
+        job.captured_at = time.monotonic()
+
+    def process(self, job):
+        """Analyzes the job if needed and delivers its verdict, unless it would arrive stale."""
+        verdict = job.verdict
+        latency = None
+        if verdict is None:
+            if job.shot is None:
+                return
+            remaining = job.deadline - time.monotonic()
+            if remaining <= self.expected_latency:
+                log(f"WYD: dropping frame {job.seq}, its verdict would arrive too late")
+                scheduler.dropped("stale")
+                return
+            start = time.monotonic()
+            verdict, job.source = analyze_frame(job.shot, self.detector, min(LLM_DEADLINE_SECONDS, remaining))
+            elapsed = time.monotonic() - start
+            if job.source == "llm":
+                latency = elapsed
+                # Unchanged-screen reuses take no time and would drag the estimate to 0
+                self.expected_latency += self.LATENCY_SMOOTHING * (elapsed - self.expected_latency)
+            if verdict is None:
+                # A failed call mustn't count as a fresh capture for the cache
+                return
+            with self._lock:
+                self.cache.put(job.key, verdict)
+                self.classifier.record(job.app, verdict)
+
+        # Kept even if too late to show: it still says what was on screen at capture time
+        self.save(job, verdict, latency)
+        if time.monotonic() > job.deadline:
+            scheduler.dropped("stale")
+            return
+        report_analysis(verdict, self.mom_queue)
+        metrics.observe("urmom_wyd_verdict_age_seconds", time.monotonic() - job.scheduled_at)
+        probe.mark("wyd_first_iteration")
+
+    def save(self, job, verdict, latency=None):
+        """Adds the verdict to the timeline, stamped with when its frame was captured."""
+        if self.timeline is None or verdict.get("score") is None:
+            return
+        try:
+            self.timeline.record(
+                verdict["score"],
+                app=job.app,
+                source=job.source,
+                model=DEFAULT_MODEL if job.source == "llm" else None,
+                latency=latency,
+                ts=time.time() - (time.monotonic() - job.captured_at),
+            )
+        except Exception as e:
+            log(f"WYD: could not save verdict to the timeline: {e!r}", WARNING)
+
+
+def _apply_settings(changes, schedule):
+    """Moves the pending tick when the screenshot interval changes. Returns True if it did."""
+    if "screenshot_frequency_minutes" in changes:
+        new_interval = changes["screenshot_frequency_minutes"]
+        schedule.set_period(new_interval * 60)
+        log(f"WYD: screenshot interval changed to {new_interval} minutes")
+        return True
+    return False
+
+
+def _pace(schedule):
+    """Stretches the interval as the LLM budget runs low. Returns True if the pending tick moved."""
+    stretch = budget.get_budget().stretch(schedule.base_period, LLM_PURPOSE)
+    if abs(stretch - schedule.stretch) < MIN_STRETCH_CHANGE:
+        return False
+    schedule.set_stretch(stretch)
+    metrics.set_gauge("urmom_wyd_budget_stretch", stretch)
+    log(f"WYD: LLM budget pacing, screenshots every {schedule.period / 60:.1f} minutes")
+    return True
+
+
+def _create_schedule(check_interval_minutes):
+    # The first picture is taken right after startup, as soon as Mom has animated
+    return scheduler.Schedule(
+        check_interval_minutes * 60, first_tick=time.monotonic() + ANIMATION_DELAY_SECONDS
+    )
+
+
+def _wait_until(deadline, settings_inbox, schedule):
+    """Sleeps until deadline; False if the schedule changed meanwhile."""
+    while (remaining := deadline - time.monotonic()) > 0:
+        if _apply_settings(wait_for_settings(settings_inbox, remaining), schedule):
+            return False
+    return True
+
+
+def _analysis_worker(pipeline, jobs):
+    while True:
+        job = jobs.get()
+        try:
+            pipeline.process(job)
+        except Exception as e:
+            log(f"WYD Error analyzing frame {job.seq}: {e!r}", ERROR)
+
+
+def main(mom_queue=None, check_interval_minutes=10, settings_inbox=None):
+    llm_enabled = _llm_enabled()
+    print(f"👀 WYD Manager started. Checking screen every {check_interval_minutes:.1f} minutes.")
+    pipeline = Pipeline(mom_queue, llm_enabled)
+    jobs = scheduler.JobQueue()
+    threading.Thread(target=_analysis_worker, args=(pipeline, jobs), name="urmom-wyd-analysis", daemon=True).start()
+    schedule = _create_schedule(check_interval_minutes)
+
+    while True:
+        tick = schedule.next_tick()
+        if pipeline.llm_enabled and _pace(schedule):
+            tick = schedule.next_tick()
+
+        # 1. Wait until it's time to warn Mom, applying interval changes as they come
+        if not _wait_until(tick - ANIMATION_DELAY_SECONDS, settings_inbox, schedule):
+            continue
+
+        # 2. A cached or confident local verdict needs no picture; otherwise Mom gets ready for one
+        job = pipeline.prepare(tick)
+        if job is None:
+            continue
+
+        # 3. Capture exactly on the tick and hand the frame to the analysis worker,
+        #    which reports to Mom in order while the next tick is being waited for
+        time.sleep(max(0.0, tick - time.monotonic()))
+        pipeline.capture(job)
+        jobs.put(job)
+
+
+async def _wait_until_async(deadline, settings_inbox, schedule):
+    while (remaining := deadline - time.monotonic()) > 0:
+        if _apply_settings(await wait_for_settings_async(settings_inbox, remaining), schedule):
+            return False
+    return True
+
+
+async def _analysis_worker_async(pipeline, jobs):
+    while True:
+        job = await jobs.get()
+        try:
+            await asyncio.to_thread(pipeline.process, job)
+        except Exception as e:
+            log(f"WYD Error analyzing frame {job.seq}: {e!r}", ERROR)
+
+
+async def main_async(mom_queue=None, check_interval_minutes=10, settings_inbox=None):
+    """Cooperative variant of main; capture and LLM call run on the runtime's thread pool."""
+    llm_enabled = _llm_enabled()
+
+    print(f"👀 WYD Manager started (async). Checking screen every {check_interval_minutes:.1f} minutes.")
+    pipeline = await asyncio.to_thread(Pipeline, mom_queue, llm_enabled)
+    jobs = scheduler.AsyncJobQueue()
+    worker = asyncio.create_task(_analysis_worker_async(pipeline, jobs))
+    schedule = _create_schedule(check_interval_minutes)
+
+    try:
+        while True:
+            tick = schedule.next_tick()
+            if pipeline.llm_enabled and await asyncio.to_thread(_pace, schedule):
+                tick = schedule.next_tick()
+            if not await _wait_until_async(tick - ANIMATION_DELAY_SECONDS, settings_inbox, schedule):
+                continue
+            job = await asyncio.to_thread(pipeline.prepare, tick)
+            if job is None:
+                continue
+            await asyncio.sleep(max(0.0, tick - time.monotonic()))
+            await asyncio.to_thread(pipeline.capture, job)
+            jobs.put(job)
+    finally:
+        worker.cancel()
@@ -1,37 +1,68 @@
-from features import mom as mom
-from features import shutdown
-from features import blacklist
-from features import bargain
-from features import lights_out
-from features import wyd
+# Spawned children re-import this module, so keep its top level light:
+# feature imports live in workers.py and run only in the process that needs them.
 import sys
 import os
 import json
 import multiprocessing
 import threading
-from utils import tray, Validation
+import workers
 from utils import log
+from utils.log import flush_logs, ERROR, WARNING
 from utils.env import load_env
+from utils.ipc import CommandBus, UpdateNagMessages
+from utils.config import parse_config, load_config_file, ConfigWatcher, SettingsInbox
+from utils import probe
+from utils.metrics import MetricsAggregator
 
 
-def cleanup_generator(procs):
+def cleanup_generator(procs, watcher=None, aggregator=None):
     def cleanup():
         print("Shutting down everything...")
+        if watcher:
+            watcher.stop()
         for p in procs:
             if p.is_alive():
                 p.terminate()  # Graceful request
                 p.join()  # Wait for it to actually stop
+        if aggregator:
+            # After the workers, so none of them writes a snapshot into it again
+            aggregator.stop()
+        flush_logs()
         sys.exit(0)
 
     return cleanup
 
 
+def config_change_handler(mom_command_queue, inboxes):
+    """Forwards only the settings that changed, and only to the workers that use them."""
+
+    def on_change(old, new, changed):
+        if "nag" in changed:
+            mom_command_queue.put(UpdateNagMessages(messages=new.nag))
+        if "blacklisted_processes" in changed:
+            inboxes["blacklist"].send(blacklisted_processes=new.blacklisted_processes)
+        if "screenshot_frequency_minutes" in changed:
+            inboxes["wyd"].send(screenshot_frequency_minutes=new.screenshot_frequency_minutes)
+        if {"lights_out_start", "lights_out_end"} & changed:
+            inboxes["lights_out"].send(lights_out_window=(new.lights_out_start, new.lights_out_end))
+        if "runtime_mode" in changed:
+            log("runtimeMode changes take effect after a restart", WARNING)
+
+    return on_change
+
+
 def main():
     multiprocessing.freeze_support()
+    probe.mark("main_start")
     load_env()
-    if len(sys.argv) != 2:
-        log("Error: expected only one json string as argument")
-        log(str(sys.argv))
+
+    # Either a json string, or --config <path> to load (and live-reload) a file
+    config_path = None
+    if len(sys.argv) == 3 and sys.argv[1] == "--config":
+        config_path = sys.argv[2]
+    elif len(sys.argv) != 2:
+        log("Error: expected one json string or --config <path> as arguments", ERROR)
+        log(str(sys.argv), ERROR)
         return
 
     # Check for dev mode
@@ -49,68 +80,111 @@ def main():
 
     # Extract json data
     try:
-        json_args = json.loads(sys.argv[1])
+        if config_path:
+            config = load_config_file(config_path)
+        else:
+            config = parse_config(json.loads(sys.argv[1]))
     except json.JSONDecodeError:
-        log("Error: argument is not valid json")
+        log("Error: argument is not valid json", ERROR)
+        return
+    except OSError as e:
+        log(f"Error: could not read config file: {e}", ERROR)
         return
 
-    lights_out_start = Validation.validate_time_fmt(json_args["lightsOutStart"])
-    lights_out_end = Validation.validate_time_fmt(json_args["lightsOutEnd"])
+    lights_out_start = config.lights_out_start
+    lights_out_end = config.lights_out_end
+    nagging_messages = config.nag
+    blacklisted_processes = config.blacklisted_processes
+    screenshot_frequency_minutes = config.screenshot_frequency_minutes
+    runtime_mode = config.runtime_mode
 
-    nagging_messages = Validation.validate_non_empty_list(
-        json_args["nag"]
-    )
-    blacklisted_processes = Validation.validate_non_empty_list(
-        json_args["blacklistedProcesses"]
-    )
-    screenshot_frequency_minutes = Validation.validate_positive_int(json_args["screenshotFreqMin"])
-    
-    # Create a queue for sending commands to the Mom process
-    mom_command_queue = multiprocessing.Queue()
+    # Create a bus for sending commands to the Mom process
+    mom_command_queue = CommandBus()
+
+    # One inbox per background worker for live config changes
+    inboxes = {name: SettingsInbox() for name in ("blacklist", "lights_out", "wyd")}
 
     log(
-        f"Parsed arguments: lights_out_start={lights_out_start}, lights_out_end={lights_out_end}"
-        f"screenshot_frequency={screenshot_frequency_minutes} mins"
+        f"Parsed arguments: lights_out_start={lights_out_start}, lights_out_end={lights_out_end} "
+        f"screenshot_frequency={screenshot_frequency_minutes} mins runtime_mode={runtime_mode}"
     )
 
+    # Must start before the workers so they inherit its directory
+    aggregator = MetricsAggregator()
+    aggregator.start()
+
     # Prepare processes list
     procs = []
 
     # 1. Mom Process
     mom_proc = multiprocessing.Process(
-        target=mom.main, args=(mom_command_queue, nagging_messages)
+        target=workers.run_mom, args=(mom_command_queue, nagging_messages)
     )
     procs.append(mom_proc)
 
+    if runtime_mode == "async":
+        # 2. One process running every background worker as a task
+        async_proc = multiprocessing.Process(
+            target=workers.run_async_runtime,
+            args=(
+                blacklisted_processes, dev_mode, lights_out_start, lights_out_end,
+                screenshot_frequency_minutes, mom_command_queue, inboxes,
+            ),
+        )
+        procs.append(async_proc)
+    else:
+        procs.extend(
+            _create_worker_procs(
+                blacklisted_processes, dev_mode, lights_out_start, lights_out_end,
+                screenshot_frequency_minutes, mom_command_queue, inboxes,
+            )
+        )
+
+    # Start all background processes
+    for p in procs:
+        p.start()
+    probe.mark("workers_spawned")
+
+    watcher = None
+    if config_path:
+        watcher = ConfigWatcher(config_path, config, config_change_handler(mom_command_queue, inboxes))
+        watcher.start()
+
+    # Create and run the tray icon in a separate thread
+    from utils import tray
+
+    icon = tray.create_icon(cleanup_generator(procs, watcher, aggregator))
+    icon_thread = threading.Thread(target=icon.run)
+    icon_thread.start()
+
+
+def _create_worker_procs(blacklisted_processes, dev_mode, lights_out_start, lights_out_end,
+                         screenshot_frequency_minutes, mom_command_queue, inboxes):
+    procs = []
+
     # 2. Blacklist Process
     blacklist_checker = multiprocessing.Process(
-        target=blacklist.main, args=(blacklisted_processes, dev_mode, mom_command_queue)
+        target=workers.run_blacklist,
+        args=(blacklisted_processes, dev_mode, mom_command_queue, inboxes["blacklist"]),
     )
     procs.append(blacklist_checker)
 
     # 3. Lights Out Process (Optional)
     if lights_out_start and lights_out_end:
         lights_out_proc = multiprocessing.Process(
-            target=lights_out.main, 
-            args=(lights_out_start, lights_out_end, mom_command_queue) 
+            target=workers.run_lights_out,
+            args=(lights_out_start, lights_out_end, dev_mode, mom_command_queue, inboxes["lights_out"])
         )
         procs.append(lights_out_proc)
 
     # 3. Wyd process
 
     wyd_proc = multiprocessing.Process(
-        target=wyd.main, args=(mom_command_queue, screenshot_frequency_minutes)
+        target=workers.run_wyd, args=(mom_command_queue, screenshot_frequency_minutes, inboxes["wyd"])
     )
     procs.append(wyd_proc)
+    return procs
 
-    # Start all background processes
-    for p in procs:
-        p.start()
-
-    # Create and run the tray icon in a separate thread
-    icon = tray.create_icon(cleanup_generator(procs))
-    icon_thread = threading.Thread(target=icon.run)
-    icon_thread.start()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,103 @@
+"""
+Single-process runtime for the background workers.
+
+Instead of one OS process each, blacklist, lights_out and wyd run as
+asyncio tasks on an event loop thread inside one worker process. Their
+blocking calls (psutil scans, screenshots, LLM requests) go to a bounded
+thread pool, and Qt dialogs are marshalled back to the main thread, which
+is where Qt insists they live.
+"""
+
+import asyncio
+import concurrent.futures
+import queue
+import threading
+
+from utils import log, ERROR
+
+MAX_BLOCKING_THREADS = 4
+
+
+class GuiThread:
+    """Runs callables on the thread that calls serve() and awaits their results."""
+
+    def __init__(self):
+        self._calls = queue.Queue()
+
+    async def run(self, fn, *args):
+        future = concurrent.futures.Future()
+        self._calls.put((fn, args, future))
+        return await asyncio.wrap_future(future)
+
+    def serve(self):
+        """Blocks, executing submitted calls one at a time, until stop()."""
+        while True:
+            item = self._calls.get()
+            if item is None:
+                return
+            fn, args, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def stop(self):
+        self._calls.put(None)
+
+
+async def _supervise(name, coro):
+    """Keeps one crashing task from taking the others down with it."""
+    try:
+        await coro
+        log(f"Async runtime: {name} finished")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        log(f"Async runtime: {name} crashed: {e!r}", ERROR)
+
+
+async def _run(tasks, max_threads):
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(
+        concurrent.futures.ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="urmom-blocking")
+    )
+    await asyncio.gather(*(_supervise(name, coro) for name, coro in tasks))
+
+
+def main(blacklisted_processes, dev_mode, lights_out_start, lights_out_end,
+         screenshot_frequency_minutes, mom_queue, settings_inboxes=None,
+         max_threads=MAX_BLOCKING_THREADS):
+    from features.windows_api import blacklist
+    from features.lights_out import manager
+    from features.wyd import wyd
+
+    inboxes = settings_inboxes or {}
+    gui = GuiThread()
+    tasks = [
+        ("blacklist", blacklist.main_async(blacklisted_processes, dev_mode, mom_queue, inboxes.get("blacklist")))
+    ]
+    if lights_out_start and lights_out_end:
+        tasks.append(
+            (
+                "lights_out",
+                manager.main_async(
+                    lights_out_start, lights_out_end, dev_mode, mom_queue, gui.run, inboxes.get("lights_out")
+                ),
+            )
+        )
+    tasks.append(("wyd", wyd.main_async(mom_queue, screenshot_frequency_minutes, inboxes.get("wyd"))))
+
+    log(f"Async runtime started with tasks: {', '.join(name for name, _ in tasks)}")
+
+    def run_loop():
+        try:
+            asyncio.run(_run(tasks, max_threads))
+        finally:
+            gui.stop()
+
+    loop_thread = threading.Thread(target=run_loop, name="urmom-async-runtime", daemon=True)
+    loop_thread.start()
+    gui.serve()
+    loop_thread.join()
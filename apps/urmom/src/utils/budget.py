@@ -0,0 +1,327 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from .log import log, WARNING
+from . import metrics
+from .paths import get_data_path
+
+# Every process appends its LLM usage here and tails what the others appended,
+# so the WYD and bargain workers spend from one budget.
+LEDGER_FILE = os.environ.get("URMOM_LLM_LEDGER") or get_data_path("llm_usage.jsonl")
+# Current spend and projections, rewritten after every call for the dashboard;
+# set to "" to skip writing it
+STATUS_FILE = os.environ.get("URMOM_LLM_BUDGET_STATUS")
+if STATUS_FILE is None:
+    STATUS_FILE = get_data_path("llm_budget.json")
+# Rolling-window budgets; 0 disables one
+HOURLY_TOKENS = int(os.environ.get("URMOM_LLM_HOURLY_TOKENS", 200_000))
+DAILY_TOKENS = int(os.environ.get("URMOM_LLM_DAILY_TOKENS", 2_000_000))
+HOURLY_USD = float(os.environ.get("URMOM_LLM_HOURLY_USD", 0))
+DAILY_USD = float(os.environ.get("URMOM_LLM_DAILY_USD", 0))
+# Share of every budget held back for calls a user is waiting on
+PRIORITY_RESERVE = 0.2
+PRIORITY_PURPOSES = {"bargain"}
+# Longest a background interval gets stretched while the budget runs low
+MAX_STRETCH = 8.0
+# Recent spend the exhaustion projection extrapolates from
+RATE_WINDOW_SECONDS = 15 * 60
+# The ledger is rewritten with just the last day once it grows past this
+MAX_LEDGER_BYTES = 1_000_000
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+
+@dataclass(frozen=True)
+class Limit:
+    window: str  # "hour" or "day"
+    seconds: int
+    unit: str  # "tokens" or "usd"
+    amount: float
+
+    def describe(self):
+        amount = f"${self.amount:.2f}" if self.unit == "usd" else f"{self.amount:.0f} tokens"
+        return f"{self.window}ly {amount}"
+
+
+def default_limits():
+    limits = [
+        Limit("hour", HOUR, "tokens", HOURLY_TOKENS),
+        Limit("day", DAY, "tokens", DAILY_TOKENS),
+        Limit("hour", HOUR, "usd", HOURLY_USD),
+        Limit("day", DAY, "usd", DAILY_USD),
+    ]
+    return [limit for limit in limits if limit.amount > 0]
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive lock between processes on path + ".lock", held while the ledger is read or written."""
+    with open(path + ".lock", "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            # Retries for about 10 s, then raises OSError
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _file_id(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+def _field(obj, name):
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def usage_of(response, model=None):
+    """(tokens, cost in USD) of a litellm response; cost is 0 for models litellm has no price for."""
+    usage = _field(response, "usage")
+    tokens = _field(usage, "total_tokens") or (_field(usage, "prompt_tokens") or 0) + (
+        _field(usage, "completion_tokens") or 0
+    )
+    cost = (_field(response, "_hidden_params") or {}).get("response_cost")
+    if cost is None:
+        try:
+            import litellm
+
+            if hasattr(response, "choices"):
+                cost = litellm.completion_cost(completion_response=response)
+            else:
+                # Streamed replies only carry usage
+                prompt, completion = litellm.cost_per_token(
+                    model=model,
+                    prompt_tokens=_field(usage, "prompt_tokens") or 0,
+                    completion_tokens=_field(usage, "completion_tokens") or 0,
+                )
+                cost = prompt + completion
+        except Exception:
+            cost = 0.0
+    return int(tokens or 0), float(cost or 0.0)
+
+
+class Budget:
+    """
+    Hourly and daily token/cost budgets shared by every process through the
+    ledger file. Background calls may only spend up to PRIORITY_RESERVE short
+    of a limit, so a bargain still goes through once WYD has used its share.
+    """
+
+    def __init__(self, path=LEDGER_FILE, limits=None, status_path=STATUS_FILE, clock=time.time):
+        self.path = path
+        self.limits = default_limits() if limits is None else limits
+        self.status_path = status_path
+        self.clock = clock
+        # (time, purpose, tokens, usd) for the last day, from every process
+        self._records = deque()
+        self._offset = 0
+        # Which file the offset is into; compaction swaps in a new one
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """Reads what was appended since last time. Callers hold the file lock."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        file = _file_id(self.path)
+        if file != self._file or size < self._offset:
+            # Compacted by some process; read it again from the start
+            self._file = file
+            self._records.clear()
+            self._offset = 0
+        if size > self._offset:
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(self._offset)
+                    data = f.read(size - self._offset)
+            except OSError:
+                return
+            # A line still being written by another process is picked up next time
+            end = data.rfind(b"\n") + 1
+            self._offset += end
+            for line in data[:end].splitlines():
+                try:
+                    entry = json.loads(line)
+                    self._records.append((entry["t"], entry["purpose"], entry["tokens"], entry["usd"]))
+                except (ValueError, KeyError):
+                    continue
+        horizon = self.clock() - DAY
+        while self._records and self._records[0][0] < horizon:
+            self._records.popleft()
+
+    def _used(self, limit: Limit, now, seconds=None):
+        since = now - (seconds or limit.seconds)
+        column = 2 if limit.unit == "tokens" else 3
+        return sum(record[column] for record in self._records if record[0] >= since)
+
+    def _cap(self, limit: Limit, purpose):
+        return limit.amount if purpose in PRIORITY_PURPOSES else limit.amount * (1 - PRIORITY_RESERVE)
+
+    def check(self, purpose):
+        """The limit a call for this purpose would break, or None if it may go ahead."""
+        with self._lock:
+            self._locked_refresh()
+            now = self.clock()
+            for limit in self.limits:
+                if self._used(limit, now) >= self._cap(limit, purpose):
+                    metrics.inc("urmom_llm_budget_refusals_total", purpose=purpose, window=limit.window, unit=limit.unit)
+                    return limit
+        return None
+
+    def record(self, model, purpose, response):
+        tokens, usd = usage_of(response, model)
+        entry = {"t": self.clock(), "model": model, "purpose": purpose, "tokens": tokens, "usd": usd}
+        metrics.inc("urmom_llm_tokens_total", tokens, model=model, purpose=purpose)
+        metrics.inc("urmom_llm_cost_usd_total", usd, model=model, purpose=purpose)
+        with self._lock:
+            try:
+                with _file_lock(self.path):
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(entry) + "\n")
+                    self._refresh()
+                    if self._offset > MAX_LEDGER_BYTES:
+                        self._compact()
+            except OSError as e:
+                log(f"Could not record LLM usage in {self.path}: {e}", WARNING)
+                self._records.append((entry["t"], purpose, tokens, usd))
+            status = self._status()
+        self._publish(status)
+
+    def _locked_refresh(self):
+        try:
+            with _file_lock(self.path):
+                self._refresh()
+        except OSError as e:
+            log(f"Could not read LLM ledger {self.path}: {e}", WARNING)
+
+    def _compact(self):
+        # Under the file lock and right after a refresh, so no process's records are lost
+        try:
+            with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                for t, purpose, tokens, usd in self._records:
+                    f.write(json.dumps({"t": t, "purpose": purpose, "tokens": tokens, "usd": usd}) + "\n")
+            os.replace(self.path + ".tmp", self.path)
+            self._file = _file_id(self.path)
+            self._offset = os.path.getsize(self.path)
+        except OSError as e:
+            log(f"Could not compact LLM ledger {self.path}: {e}", WARNING)
+
+    def _average_call(self, purpose):
+        calls = [record for record in self._records if record[1] == purpose]
+        if not calls:
+            return None
+        return {"tokens": sum(r[2] for r in calls) / len(calls), "usd": sum(r[3] for r in calls) / len(calls)}
+
+    def stretch(self, base_period, purpose):
+        """
+        How much to lengthen a background job's interval so its typical call
+        fits in what is left of every budget, from 1 (no change) to MAX_STRETCH.
+        """
+        with self._lock:
+            self._locked_refresh()
+            now = self.clock()
+            per_call = self._average_call(purpose)
+            if per_call is None:
+                return 1.0
+            stretch = 1.0
+            for limit in self.limits:
+                cost = per_call[limit.unit]
+                if cost <= 0:
+                    continue
+                affordable = (self._cap(limit, purpose) - self._used(limit, now)) / cost
+                wanted = limit.seconds / base_period
+                stretch = max(stretch, MAX_STRETCH if affordable <= 0 else wanted / affordable)
+            return min(stretch, MAX_STRETCH)
+
+    def _status(self):
+        now = self.clock()
+        limits = []
+        for limit in self.limits:
+            used = self._used(limit, now)
+            rate = self._used(limit, now, RATE_WINDOW_SECONDS) / RATE_WINDOW_SECONDS
+            remaining = max(0.0, limit.amount - used)
+            limits.append(
+                {
+                    "window": limit.window,
+                    "unit": limit.unit,
+                    "limit": limit.amount,
+                    "used": used,
+                    "remaining": remaining,
+                    # At the last 15 minutes' pace; None when nothing is being spent
+                    "exhausted_in_seconds": remaining / rate if rate > 0 else None,
+                }
+            )
+        by_purpose = {}
+        for _, purpose, tokens, usd in self._records:
+            spent = by_purpose.setdefault(purpose, {"calls": 0, "tokens": 0, "usd": 0.0})
+            spent["calls"] += 1
+            spent["tokens"] += tokens
+            spent["usd"] += usd
+        projections = [entry["exhausted_in_seconds"] for entry in limits if entry["exhausted_in_seconds"] is not None]
+        return {
+            "updated": now,
+            "limits": limits,
+            "last_day": by_purpose,
+            "exhausted_in_seconds": min(projections) if projections else None,
+        }
+
+    def status(self) -> dict:
+        """Spend per window, per purpose over the last day, and the projected time until a budget runs out."""
+        with self._lock:
+            self._locked_refresh()
+            return self._status()
+
+    def _publish(self, status):
+        for entry in status["limits"]:
+            labels = {"window": entry["window"], "unit": entry["unit"]}
+            metrics.set_gauge("urmom_llm_budget_used", entry["used"], **labels)
+            metrics.set_gauge("urmom_llm_budget_remaining", entry["remaining"], **labels)
+        if status["exhausted_in_seconds"] is not None:
+            metrics.set_gauge("urmom_llm_budget_exhausted_in_seconds", status["exhausted_in_seconds"])
+        if not self.status_path:
+            return
+        try:
+            with open(self.status_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(status, f, indent=2)
+            os.replace(self.status_path + ".tmp", self.status_path)
+        except OSError:
+            pass
+
+
+_budget = None
+_budget_lock = threading.Lock()
+
+
+def get_budget() -> Budget:
+    global _budget
+    if _budget is None:
+        with _budget_lock:
+            if _budget is None:
+                _budget = Budget()
+    return _budget
@@ -0,0 +1,172 @@
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, fields
+
+from .log import log, WARNING
+from .validate import Validation
+
+RUNTIME_MODES = ["processes", "async"]
+RELOAD_DEBOUNCE_SECONDS = 0.3
+
+
+@dataclass(frozen=True)
+class Config:
+    lights_out_start: str
+    lights_out_end: str
+    nag: list
+    blacklisted_processes: list
+    screenshot_frequency_minutes: int
+    runtime_mode: str = "processes"
+
+
+def parse_config(json_args: dict) -> Config:
+    """Validates the dashboard's JSON config. Raises ValueError on bad values."""
+    return Config(
+        lights_out_start=Validation.validate_time_fmt(json_args["lightsOutStart"]),
+        lights_out_end=Validation.validate_time_fmt(json_args["lightsOutEnd"]),
+        nag=Validation.validate_non_empty_list(json_args["nag"]),
+        blacklisted_processes=Validation.validate_non_empty_list(json_args["blacklistedProcesses"]),
+        screenshot_frequency_minutes=Validation.validate_positive_int(json_args["screenshotFreqMin"]),
+        # "processes": one OS process per worker (default)
+        # "async": blacklist, lights_out and wyd share one process as asyncio tasks
+        runtime_mode=Validation.validate_choice(json_args.get("runtimeMode", "processes"), RUNTIME_MODES),
+    )
+
+
+def load_config_file(path) -> Config:
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_config(json.load(f))
+
+
+def changed_fields(old: Config, new: Config) -> set[str]:
+    return {f.name for f in fields(Config) if getattr(old, f.name) != getattr(new, f.name)}
+
+
+class SettingsInbox:
+    """
+    Channel the controller uses to push changed settings to one worker.
+    Workers call wait() where they used to sleep, so an update wakes them
+    immediately instead of after the current interval.
+    """
+
+    def __init__(self):
+        self._queue = multiprocessing.Queue()
+
+    def send(self, **changes):
+        self._queue.put(changes)
+
+    def wake(self):
+        """Ends a pending wait() early without changing any settings."""
+        self._queue.put({})
+
+    def poll(self) -> dict:
+        """Returns every pending change merged together, without blocking."""
+        changes = {}
+        while True:
+            try:
+                changes.update(self._queue.get_nowait())
+            except queue.Empty:
+                return changes
+
+    def wait(self, timeout) -> dict:
+        """Sleeps up to timeout seconds, returning early with any changes."""
+        try:
+            changes = self._queue.get(timeout=max(0, timeout))
+        except queue.Empty:
+            return {}
+        changes.update(self.poll())
+        return changes
+
+    async def wait_async(self, timeout, check_interval=1.0) -> dict:
+        """wait() for asyncio tasks; checks once a second rather than holding a thread."""
+        import asyncio
+
+        deadline = time.monotonic() + timeout
+        while True:
+            changes = self.poll()
+            remaining = deadline - time.monotonic()
+            if changes or remaining <= 0:
+                return changes
+            await asyncio.sleep(min(check_interval, remaining))
+
+
+def wait_for_settings(inbox, timeout) -> dict:
+    """inbox.wait(), or a plain sleep for workers started without an inbox."""
+    if inbox is None:
+        time.sleep(timeout)
+        return {}
+    return inbox.wait(timeout)
+
+
+async def wait_for_settings_async(inbox, timeout) -> dict:
+    import asyncio
+
+    if inbox is None:
+        await asyncio.sleep(timeout)
+        return {}
+    return await inbox.wait_async(timeout)
+
+
+class ConfigWatcher:
+    """
+    Watches a config file and calls on_change(old, new, changed) with each
+    valid new version. Invalid edits are logged and ignored, so a half-saved
+    file never reaches the workers.
+    """
+
+    def __init__(self, path, config: Config, on_change):
+        self.path = os.path.abspath(path)
+        self.config = config
+        self.on_change = on_change
+        self._timer = None
+        self._lock = threading.Lock()
+        self._observer = None
+
+    def start(self):
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                # Editors often save by writing a temp file and renaming it over
+                paths = {event.src_path, getattr(event, "dest_path", "")}
+                if watcher.path in {os.path.abspath(p) for p in paths if p}:
+                    watcher._schedule_reload()
+
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), os.path.dirname(self.path), recursive=False)
+        self._observer.daemon = True
+        self._observer.start()
+        log(f"Watching config file {self.path}")
+
+    def stop(self):
+        if self._observer:
+            self._observer.stop()
+
+    def _schedule_reload(self):
+        # A single save can fire several events; reload once they settle
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(RELOAD_DEBOUNCE_SECONDS, self.reload)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def reload(self):
+        try:
+            new = load_config_file(self.path)
+        except (OSError, KeyError, ValueError) as e:
+            log(f"Ignoring invalid config change: {e!r}", WARNING)
+            return
+        changed = changed_fields(self.config, new)
+        if not changed:
+            return
+        old, self.config = self.config, new
+        log(f"Config changed: {', '.join(sorted(changed))}")
+        self.on_change(old, new, changed)
@@ -0,0 +1,213 @@
+import json
+import socket
+import struct
+import time
+import multiprocessing
+from dataclasses import dataclass, asdict, field
+from typing import ClassVar
+
+from .log import log, WARNING
+
+# Bump whenever a command's payload changes shape. Receivers drop envelopes
+# from a different version instead of guessing at their fields.
+PROTOCOL_VERSION = 2
+
+# Frames are a 4-byte big-endian length followed by a UTF-8 JSON envelope.
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 64 * 1024
+SEND_TIMEOUT_SECONDS = 2.0
+
+_COMMANDS = {}
+
+
+def command(cls):
+    """Registers a Command subclass so it can be decoded from its TYPE."""
+    _COMMANDS[cls.TYPE] = cls
+    return cls
+
+
+@dataclass(frozen=True)
+class Command:
+    TYPE: ClassVar[str] = ""
+
+    def payload(self) -> dict:
+        return asdict(self)
+
+
+@command
+@dataclass(frozen=True)
+class ThrowSlipper(Command):
+    TYPE: ClassVar[str] = "throw_slipper"
+
+
+@command
+@dataclass(frozen=True)
+class ShowBubbleMessage(Command):
+    TYPE: ClassVar[str] = "show_bubble_message"
+    text: str = "..."
+    score: float = 0.0
+
+
+@command
+@dataclass(frozen=True)
+class SetExpression(Command):
+    TYPE: ClassVar[str] = "set_expression"
+    asset: str = "mom.png"
+
+
+@command
+@dataclass(frozen=True)
+class ShowBlacklistMessage(Command):
+    TYPE: ClassVar[str] = "show_blacklist_message"
+    process: str = "unknown"
+    count: int = 1
+
+
+@command
+@dataclass(frozen=True)
+class ChangeAnger(Command):
+    TYPE: ClassVar[str] = "change_anger"
+    delta: int = 0
+
+
+@command
+@dataclass(frozen=True)
+class PrepareForScreenshot(Command):
+    TYPE: ClassVar[str] = "prepare_for_screenshot"
+
+
+@command
+@dataclass(frozen=True)
+class UpdateNagMessages(Command):
+    TYPE: ClassVar[str] = "update_nag_messages"
+    messages: list = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class Envelope:
+    command: Command
+    version: int = PROTOCOL_VERSION
+    sent_at: float = field(default_factory=time.time)
+
+
+def encode(cmd: Command) -> bytes:
+    """Wraps a command in a versioned envelope and frames it for the wire."""
+    body = json.dumps(
+        {
+            "v": PROTOCOL_VERSION,
+            "type": cmd.TYPE,
+            "sent_at": time.time(),
+            "payload": cmd.payload(),
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    if len(body) > MAX_FRAME_BYTES:
+        raise ValueError(f"Command {cmd.TYPE} is too large to send ({len(body)} bytes)")
+    return _HEADER.pack(len(body)) + body
+
+
+def decode(body: bytes) -> Envelope | None:
+    """Parses one frame body. Returns None for unknown or incompatible envelopes."""
+    try:
+        data = json.loads(body.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        log(f"IPC: dropping malformed frame: {e}", WARNING)
+        return None
+
+    version = data.get("v")
+    if version != PROTOCOL_VERSION:
+        log(f"IPC: dropping envelope with protocol version {version}", WARNING)
+        return None
+
+    cls = _COMMANDS.get(data.get("type"))
+    if cls is None:
+        log(f"IPC: dropping unknown command type {data.get('type')}", WARNING)
+        return None
+
+    try:
+        cmd = cls(**data.get("payload", {}))
+    except TypeError as e:
+        log(f"IPC: dropping {cls.TYPE} with bad payload: {e}", WARNING)
+        return None
+    return Envelope(cmd, version, data.get("sent_at", time.time()))
+
+
+class CommandBus:
+    """
+    Carries Commands from the worker processes to the Mom process over a
+    socket pair. Any number of processes may put(); exactly one process
+    (Mom) reads, and it can hand fileno() to an event loop so commands are
+    handled as soon as they arrive instead of being polled for.
+
+    Pass the bus to multiprocessing.Process args like a Queue.
+    """
+
+    def __init__(self):
+        self._reader, self._writer = socket.socketpair()
+        # Frames from different producers must not interleave on the stream
+        self._write_lock = multiprocessing.Lock()
+        # Set, for every producer, once a frame was cut off mid-write
+        self._broken = multiprocessing.Value("b", False, lock=False)
+        self._buffer = b""
+        self.closed = False
+
+    def put(self, cmd: Command) -> bool:
+        """Sends a command to Mom. Returns False if it could not be delivered."""
+        try:
+            frame = encode(cmd)
+        except (TypeError, ValueError) as e:
+            log(f"IPC: not sending {cmd.TYPE}: {e}", WARNING)
+            return False
+        with self._write_lock:
+            if self._broken.value:
+                return False
+            sent = 0
+            try:
+                # A dead reader would otherwise block the worker forever
+                self._writer.settimeout(SEND_TIMEOUT_SECONDS)
+                while sent < len(frame):
+                    sent += self._writer.send(frame[sent:])
+                return True
+            except OSError as e:
+                log(f"IPC: failed to send {cmd.TYPE}: {e}", WARNING)
+                if sent:
+                    # Part of the frame is on the stream and Mom would misread every
+                    # frame after it, so the bus is closed: Mom sees EOF instead
+                    self._broken.value = True
+                    try:
+                        self._writer.shutdown(socket.SHUT_WR)
+                    except OSError:
+                        pass
+                return False
+
+    def fileno(self) -> int:
+        """The readable end, for QSocketNotifier / selectors."""
+        return self._reader.fileno()
+
+    def drain(self) -> list[Envelope]:
+        """Reads everything currently available without blocking."""
+        self._reader.setblocking(False)
+        while True:
+            try:
+                chunk = self._reader.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            if not chunk:
+                # Every writer is gone; the caller should stop watching us
+                self.closed = True
+                break
+            self._buffer += chunk
+
+        envelopes = []
+        offset = 0
+        while len(self._buffer) - offset >= _HEADER.size:
+            (length,) = _HEADER.unpack_from(self._buffer, offset)
+            end = offset + _HEADER.size + length
+            if len(self._buffer) < end:
+                break
+            envelope = decode(self._buffer[offset + _HEADER.size : end])
+            if envelope:
+                envelopes.append(envelope)
+            offset = end
+        self._buffer = self._buffer[offset:]
+        return envelopes
@@ -0,0 +1,343 @@
+import asyncio
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from .log import log, WARNING
+from . import metrics, budget
+
+# Whole-call budget, including retries and backoff
+DEFAULT_DEADLINE_SECONDS = 30.0
+MAX_RETRIES = 2
+BACKOFF_BASE_SECONDS = 0.5
+MAX_CONCURRENT_CALLS = 4
+# Consecutive failures that open a model's breaker, and how long it stays open
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN_SECONDS = 30.0
+# Longer than the lights-out prewarm lead, so a warmed connection is still pooled when it's needed
+KEEPALIVE_SECONDS = 300.0
+# Extra time the calling thread waits past the deadline for the loop to give up on its own
+CALLER_GRACE_SECONDS = 2.0
+# Sends every call to this OpenAI-compatible server instead of the model's
+# provider, e.g. benchmarks/llm_server.py for offline runs
+API_BASE_OVERRIDE = os.environ.get("URMOM_LLM_API_BASE")
+# Budget accounting key for callers that don't say what they are
+DEFAULT_PURPOSE = "background"
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    pass
+
+
+class LLMTimeout(LLMError):
+    pass
+
+
+class CircuitOpen(LLMError):
+    pass
+
+
+class BudgetExceeded(LLMError):
+    pass
+
+
+def _is_retryable(error) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in _RETRYABLE_STATUS
+    # litellm's connection and timeout errors carry no status code
+    return type(error).__name__ in {"APIConnectionError", "Timeout", "APITimeoutError", "ServiceUnavailableError"}
+
+
+@dataclass
+class StreamedReply:
+    """What a streamed call returns once the stream ends: the whole text and its usage."""
+
+    text: str
+    usage: object = None
+
+
+async def _collect(stream, on_delta):
+    parts, usage = [], None
+    async for chunk in stream:
+        usage = getattr(chunk, "usage", None) or usage
+        choices = getattr(chunk, "choices", None)
+        delta = choices[0].delta.content if choices else None
+        if delta:
+            parts.append(delta)
+            on_delta(delta)
+    return StreamedReply("".join(parts), usage)
+
+
+class _Breaker:
+    """Per-model circuit breaker: closed -> open after repeated failures -> half-open trial."""
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def allow(self, now) -> bool:
+        if self.opened_at is None:
+            return True
+        if now - self.opened_at < BREAKER_COOLDOWN_SECONDS or self.trial_running:
+            return False
+        self.trial_running = True
+        return True
+
+    def record(self, ok, now):
+        """ok is None for calls that say nothing about the model's health."""
+        self.trial_running = False
+        if ok is None:
+            return
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.failures >= BREAKER_THRESHOLD:
+            self.opened_at = now
+
+
+class LLMClient:
+    """
+    One per process. Owns an event loop on a background thread so litellm's
+    async HTTP connections stay open between calls, whichever thread makes them.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_CALLS):
+        self.max_concurrent = max_concurrent
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._breakers = {}
+        # Ledger file I/O and cost lookups, kept off the loop every call and stream runs on.
+        # One thread, so a check sees the records queued before it
+        self._budget_io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="urmom-llm-budget")
+        # Importing litellm takes seconds and can fetch its cost map; on the loop
+        # it would stall every call and deadline, so it starts here on its own thread
+        self._setup = ThreadPoolExecutor(max_workers=1, thread_name_prefix="urmom-llm-setup")
+        self._litellm = self._setup.submit(self._warm_session)
+        threading.Thread(target=self._run, name="urmom-llm", daemon=True).start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._ready.set()
+        self._loop.run_forever()
+
+    def _warm_session(self):
+        # A shared keep-alive pool for the providers that honour litellm.aclient_session
+        import litellm
+
+        if getattr(litellm, "aclient_session", None) is None:
+            try:
+                import httpx
+
+                litellm.aclient_session = httpx.AsyncClient(
+                    limits=httpx.Limits(max_keepalive_connections=self.max_concurrent, keepalive_expiry=KEEPALIVE_SECONDS)
+                )
+            except ImportError:
+                pass
+        return litellm
+
+    def complete(self, model, messages, deadline=DEFAULT_DEADLINE_SECONDS, purpose=DEFAULT_PURPOSE, **kwargs):
+        """
+        Blocking call for worker threads. Raises LLMError (or a subclass) on failure.
+        purpose is what the call is charged to in the token budget.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._call(model, messages, deadline, purpose, kwargs), self._loop)
+        try:
+            return future.result(timeout=deadline + CALLER_GRACE_SECONDS)
+        except TimeoutError:
+            future.cancel()
+            raise LLMTimeout(f"{model} did not answer within {deadline:.0f}s") from None
+
+    async def acomplete(self, model, messages, deadline=DEFAULT_DEADLINE_SECONDS, purpose=DEFAULT_PURPOSE, **kwargs):
+        """complete() for coroutines on any event loop."""
+        future = asyncio.run_coroutine_threadsafe(self._call(model, messages, deadline, purpose, kwargs), self._loop)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), deadline + CALLER_GRACE_SECONDS)
+        except TimeoutError:
+            raise LLMTimeout(f"{model} did not answer within {deadline:.0f}s") from None
+
+    def stream(self, model, messages, deadline=DEFAULT_DEADLINE_SECONDS, purpose=DEFAULT_PURPOSE, **kwargs):
+        """
+        complete() that yields the reply text piece by piece, on the calling
+        thread, as it arrives. Raises LLMError like complete() once the pieces
+        stop; a call is never retried after its first piece was yielded.
+        """
+        pieces = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(
+            self._call(model, messages, deadline, purpose, kwargs, on_delta=pieces.put), self._loop
+        )
+        future.add_done_callback(lambda _: pieces.put(None))
+        end = time.monotonic() + deadline + CALLER_GRACE_SECONDS
+        while True:
+            try:
+                piece = pieces.get(timeout=max(0.0, end - time.monotonic()))
+            except queue.Empty:
+                future.cancel()
+                raise LLMTimeout(f"{model} did not finish within {deadline:.0f}s") from None
+            if piece is None:
+                break
+            yield piece
+        future.result()
+
+    def warm(self, model, deadline=DEFAULT_DEADLINE_SECONDS, purpose=DEFAULT_PURPOSE):
+        """
+        Pays for a model's first call ahead of time: the litellm import and its
+        model metadata, then a one-token streamed request that resolves the
+        host and leaves a connection in the keep-alive pool. Returns the
+        seconds each step took. Raises LLMError if the request fails.
+        """
+        timings = {}
+        start = time.perf_counter()
+        # Usually already under way since the client started; this waits for it
+        litellm = self._litellm.result()
+        timings["import"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            litellm.get_model_info(model)
+        except Exception:
+            # Models litellm has no metadata for are still callable
+            pass
+        timings["metadata"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in self.stream(model, [{"role": "user", "content": "Hi"}], deadline, purpose, max_tokens=1):
+            pass
+        timings["connect"] = time.perf_counter() - start
+
+        for step, seconds in timings.items():
+            metrics.observe("urmom_llm_warm_seconds", seconds, model=model, step=step)
+        return timings
+
+    async def _request(self, litellm, model, messages, remaining, kwargs, on_delta):
+        if on_delta is None:
+            return await litellm.acompletion(model=model, messages=messages, timeout=remaining, **kwargs)
+        stream = await litellm.acompletion(
+            model=model, messages=messages, timeout=remaining, stream=True,
+            stream_options={"include_usage": True}, **kwargs
+        )
+        return await _collect(stream, on_delta)
+
+    async def _call(self, model, messages, deadline, purpose, kwargs, on_delta=None):
+        end = time.monotonic() + deadline
+        spent = await self._loop.run_in_executor(self._budget_io, budget.get_budget().check, purpose)
+        if spent is not None:
+            metrics.inc("urmom_llm_requests_total", model=model, outcome="over_budget")
+            raise BudgetExceeded(f"{purpose} call to {model} refused, the {spent.describe()} budget is used up")
+
+        try:
+            # Shielded: a timed-out call must not cancel the import the next call needs
+            litellm = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(self._litellm)), max(0.0, end - time.monotonic())
+            )
+        except TimeoutError:
+            metrics.inc("urmom_llm_requests_total", model=model, outcome="timeout")
+            raise LLMTimeout(f"{model} not called, litellm was still loading after {deadline:.0f}s") from None
+        if API_BASE_OVERRIDE:
+            # The full model name, provider prefix included, goes to the server as-is
+            kwargs = {
+                **kwargs,
+                "custom_llm_provider": "openai",
+                "api_base": API_BASE_OVERRIDE,
+                "api_key": os.environ.get("URMOM_LLM_API_KEY", "stand-in"),
+            }
+        breaker = self._breakers.setdefault(model, _Breaker())
+        attempt = 0
+        streamed = False
+        if on_delta is not None:
+            deliver = on_delta
+
+            def on_delta(piece):
+                nonlocal streamed
+                streamed = True
+                deliver(piece)
+
+        if not breaker.allow(time.monotonic()):
+            metrics.inc("urmom_llm_requests_total", model=model, outcome="circuit_open")
+            raise CircuitOpen(f"{model} is failing; not calling it for now")
+        # Recorded once per call, retries included. None leaves the failure count
+        # alone: the request was bad, or the caller gave up (cancelled)
+        ok = None
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    async with self._semaphore:
+                        remaining = end - time.monotonic()
+                        if remaining <= 0:
+                            raise asyncio.TimeoutError()
+                        response = await asyncio.wait_for(
+                            self._request(litellm, model, messages, remaining, kwargs, on_delta), remaining
+                        )
+                except Exception as e:
+                    metrics.observe("urmom_llm_seconds", time.perf_counter() - start, model=model, outcome="error")
+                    backoff = random.uniform(0, BACKOFF_BASE_SECONDS * 2 ** attempt)
+                    # A retry would repeat text the caller already has
+                    retryable = _is_retryable(e) and not streamed
+                    if attempt >= MAX_RETRIES or not retryable or time.monotonic() + backoff >= end:
+                        # Only failures on the provider's side count towards opening the breaker
+                        if _is_retryable(e):
+                            ok = False
+                        outcome = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+                        metrics.inc("urmom_llm_requests_total", model=model, outcome=outcome)
+                        if isinstance(e, asyncio.TimeoutError):
+                            raise LLMTimeout(f"{model} did not answer within {deadline:.0f}s") from e
+                        raise LLMError(f"{model} failed: {e}") from e
+                    attempt += 1
+                    metrics.inc("urmom_llm_retries_total", model=model)
+                    log(f"LLM call to {model} failed ({type(e).__name__}), retry {attempt} in {backoff:.1f}s", WARNING)
+                    await asyncio.sleep(backoff)
+                    continue
+
+                ok = True
+                metrics.observe("urmom_llm_seconds", time.perf_counter() - start, model=model, outcome="ok")
+                metrics.inc("urmom_llm_requests_total", model=model, outcome="ok")
+                # The caller doesn't wait for the bookkeeping
+                self._loop.run_in_executor(self._budget_io, budget.get_budget().record, model, purpose, response)
+                return response
+        finally:
+            # Also on cancellation, which would otherwise leave a half-open trial running forever
+            breaker.record(ok, time.monotonic())
+            metrics.set_gauge("urmom_llm_circuit_open", 1 if breaker.opened_at is not None else 0, model=model)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> LLMClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = LLMClient()
+    return _client
+
+
+def complete(model, messages, deadline=DEFAULT_DEADLINE_SECONDS, purpose=DEFAULT_PURPOSE, **kwargs):
+    return get_client().complete(model, messages, deadline, purpose, **kwargs)
+
+
+async def acomplete(model, messages, deadline=DEFAULT_DEADLINE_SECONDS, purpose=DEFAULT_PURPOSE, **kwargs):
+    return await get_client().acomplete(model, messages, deadline, purpose, **kwargs)
+
+
+def stream(model, messages, deadline=DEFAULT_DEADLINE_SECONDS, purpose=DEFAULT_PURPOSE, **kwargs):
+    return get_client().stream(model, messages, deadline, purpose, **kwargs)
+
+
+def warm(model, deadline=DEFAULT_DEADLINE_SECONDS, purpose=DEFAULT_PURPOSE):
+    return get_client().warm(model, deadline, purpose)
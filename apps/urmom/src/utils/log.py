@@ -1,11 +1,174 @@
+import atexit
+import os
+import queue
 import threading
+import time
 
+from .paths import get_data_path
 
-def log(text):
-    def write_log():
-        with open("log.txt", "a") as f:
-            f.write(text + "\n")
+__all__ = ["log", "flush_logs", "dropped_log_lines", "DEBUG", "INFO", "WARNING", "ERROR"]
 
-    thread = threading.Thread(target=write_log, daemon=True)
-    thread.start()
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+_LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+# In the app data directory (see get_data_path), not the working directory
+LOG_FILE = "log.txt"
+MAX_LOG_BYTES = 1024 * 1024  # Rotate log.txt -> log.txt.1 past 1 MB
+BACKUP_COUNT = 3
+QUEUE_SIZE = 10000
+BATCH_SIZE = 512
+FLUSH_INTERVAL_SECONDS = 0.5
+
+
+class _Flush:
+    """Queue marker: the writer sets the event once everything before it is on disk."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class LogWriter:
+    """
+    Single background thread that owns the log file for this process.
+
+    Callers only enqueue; the thread writes lines in batches with one
+    open/append/close per batch, so lines keep their order and the file is
+    not held open (other processes can still rotate it). When the queue is
+    full new lines are dropped and counted rather than blocking the caller.
+    """
+
+    def __init__(self, path=None, max_bytes=MAX_LOG_BYTES, backup_count=BACKUP_COUNT, queue_size=QUEUE_SIZE):
+        self.path = path or get_data_path(LOG_FILE)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="urmom-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, line: str) -> bool:
+        try:
+            self._queue.put_nowait(line)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout=2.0) -> bool:
+        """Blocks until every line submitted so far has been written."""
+        marker = _Flush()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def _run(self):
+        while True:
+            # Idle processes sleep here without waking up
+            item = self._queue.get()
+
+            batch = []
+            markers = []
+            # A batch is written once it is full, flushed, or FLUSH_INTERVAL_SECONDS old
+            written_by = time.monotonic() + FLUSH_INTERVAL_SECONDS
+            while True:
+                if isinstance(item, _Flush):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if len(batch) >= BATCH_SIZE or markers:
+                    break
+                remaining = written_by - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if self.dropped != self._reported_dropped:
+                batch.append(
+                    f"{_timestamp()} WARNING [{os.getpid()}] Log queue full, "
+                    f"dropped {self.dropped - self._reported_dropped} lines"
+                )
+                self._reported_dropped = self.dropped
+
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.done.set()
+
+    def _write(self, lines):
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+                size = f.tell()
+            if size > self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            print(f"[Log] Failed to write {self.path}: {e}")
+
+    def _rotate(self):
+        try:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        except OSError:
+            # Another process is rotating or holds the file; retry next batch
+            pass
+
+
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+_min_level = {name: level for level, name in _LEVEL_NAMES.items()}.get(
+    os.environ.get("URMOM_LOG_LEVEL", "INFO").upper(), INFO
+)
+
+
+def _timestamp():
+    now = time.time()
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)) + f".{int(now % 1 * 1000):03d}"
+
+
+def _get_writer():
+    global _writer, _writer_pid
+    # A forked child inherits the parent's writer object but not its thread
+    if _writer is None or _writer_pid != os.getpid():
+        with _writer_lock:
+            if _writer is None or _writer_pid != os.getpid():
+                _writer = LogWriter()
+                _writer_pid = os.getpid()
+    return _writer
+
+
+def log(text, level=INFO):
+    if level < _min_level:
+        return
+    line = f"{_timestamp()} {_LEVEL_NAMES.get(level, level)} [{os.getpid()}] {text}"
+    _get_writer().submit(line)
     print(text)
+
+
+def flush_logs(timeout=2.0) -> bool:
+    """Waits for this process's pending log lines to reach the file."""
+    if _writer is None or _writer_pid != os.getpid():
+        return True
+    return _writer.flush(timeout)
+
+
+def dropped_log_lines() -> int:
+    """Number of lines this process dropped because the log queue was full."""
+    if _writer is None or _writer_pid != os.getpid():
+        return 0
+    return _writer.dropped
+
+
+atexit.register(flush_logs)
@@ -0,0 +1,304 @@
+import atexit
+import bisect
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from .log import log, WARNING
+
+# Set by the controller before it spawns workers; every process in the tree
+# writes its snapshot there and the controller merges them.
+METRICS_DIR_ENV = "URMOM_METRICS_DIR"
+METRICS_PORT_ENV = "URMOM_METRICS_PORT"
+DEFAULT_METRICS_PORT = 9477  # 0 disables the HTTP endpoint
+REPORT_INTERVAL_SECONDS = 5.0
+PROM_FILENAME = "urmom.prom"
+# Each controller's metrics directory is tempdir/urmom-metrics-<pid>
+DIR_PREFIX = "urmom-metrics-"
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Registry:
+    """Counters, gauges and histograms recorded by one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        # Set on every update, cleared by snapshot(); the reporter sleeps on it
+        self.changed = threading.Event()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            self.changed.set()
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+            self.changed.set()
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = {"buckets": list(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+                self._histograms[key] = hist
+            index = bisect.bisect_left(hist["buckets"], value)
+            if index < len(hist["counts"]):
+                hist["counts"][index] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+            self.changed.set()
+
+    def snapshot(self) -> dict:
+        def entries(store):
+            return [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in store.items()]
+
+        with self._lock:
+            self.changed.clear()
+            return {
+                "counters": entries(self._counters),
+                "gauges": entries(self._gauges),
+                "histograms": [
+                    {
+                        "name": name,
+                        "labels": dict(labels),
+                        "buckets": list(hist["buckets"]),
+                        "counts": list(hist["counts"]),
+                        "sum": hist["sum"],
+                        "count": hist["count"],
+                    }
+                    for (name, labels), hist in self._histograms.items()
+                ],
+            }
+
+
+_registry = Registry()
+_process_name = "controller"
+_reporter = None
+_reporter_lock = threading.Lock()
+
+
+def set_process_name(name):
+    """Label for this process's series in the merged output."""
+    global _process_name
+    _process_name = name
+
+
+def inc(name, value=1, **labels):
+    _registry.inc(name, value, **labels)
+    _ensure_reporter()
+
+
+def set_gauge(name, value, **labels):
+    _registry.set_gauge(name, value, **labels)
+    _ensure_reporter()
+
+
+def observe(name, value, **labels):
+    _registry.observe(name, value, **labels)
+    _ensure_reporter()
+
+
+@contextmanager
+def timed(name, **labels):
+    """Records how long the block took, in seconds, into histogram `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def _write_snapshot():
+    directory = os.environ.get(METRICS_DIR_ENV)
+    if not directory or not _registry.changed.is_set():
+        return
+    snapshot = {"process": _process_name, "pid": os.getpid(), "time": time.time(), **_registry.snapshot()}
+    path = os.path.join(directory, f"{_process_name}-{os.getpid()}.json")
+    try:
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(path + ".tmp", path)
+    except OSError:
+        pass
+
+
+def _report_forever():
+    while True:
+        # Idle processes stay asleep; a burst of updates still makes one write per interval
+        _registry.changed.wait()
+        time.sleep(REPORT_INTERVAL_SECONDS)
+        _write_snapshot()
+
+
+def _ensure_reporter():
+    global _reporter
+    if _reporter is not None or not os.environ.get(METRICS_DIR_ENV):
+        return
+    with _reporter_lock:
+        if _reporter is None:
+            _reporter = threading.Thread(target=_report_forever, name="urmom-metrics", daemon=True)
+            _reporter.start()
+            atexit.register(_write_snapshot)
+
+
+_PROM_TYPES = {"counters": "counter", "gauges": "gauge", "histograms": "histogram"}
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    inner = ",".join(f'{k}="{escape(v)}"' for k, v in sorted(labels.items()))
+    return "{" + inner + "}"
+
+
+def render_prometheus(snapshots) -> str:
+    """Merges per-process snapshots into Prometheus text exposition format."""
+    series = {}
+    for snap in snapshots:
+        base = {"process": snap["process"]}
+        for kind in ("counters", "gauges", "histograms"):
+            for entry in snap.get(kind, []):
+                series.setdefault((entry["name"], kind), []).append(({**base, **entry["labels"]}, entry))
+
+    lines = []
+    for (name, kind), items in sorted(series.items()):
+        lines.append(f"# TYPE {name} {_PROM_TYPES[kind]}")
+        for labels, entry in items:
+            if kind != "histograms":
+                lines.append(f"{name}{_format_labels(labels)} {entry['value']}")
+                continue
+            cumulative = 0
+            for bound, count in zip(entry["buckets"], entry["counts"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {entry['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {entry['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {entry['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsAggregator:
+    """
+    Runs in the controller. Collects every process's snapshot, serves the
+    merged metrics on http://127.0.0.1:<port>/metrics and keeps a Prometheus
+    text file (urmom.prom) up to date in the metrics directory.
+    """
+
+    def __init__(self, directory=None, port=None):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), f"{DIR_PREFIX}{os.getpid()}")
+        if port is None:
+            port = int(os.environ.get(METRICS_PORT_ENV, DEFAULT_METRICS_PORT))
+        self.port = port
+        self._server = None
+        self._stopped = False
+
+    def start(self):
+        _remove_orphaned_dirs()
+        os.makedirs(self.directory, exist_ok=True)
+        atexit.register(self.stop)
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.directory, name))
+        # Children spawned from now on inherit this and start reporting
+        os.environ[METRICS_DIR_ENV] = self.directory
+        threading.Thread(target=self._write_forever, name="urmom-metrics-file", daemon=True).start()
+        if self.port:
+            self._start_http()
+
+    def collect(self):
+        _write_snapshot()
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return render_prometheus(snapshots)
+
+    def _write_forever(self):
+        path = os.path.join(self.directory, PROM_FILENAME)
+        while True:
+            time.sleep(REPORT_INTERVAL_SECONDS)
+            try:
+                with open(path + ".tmp", "w", encoding="utf-8") as f:
+                    f.write(self.collect())
+                os.replace(path + ".tmp", path)
+            except OSError:
+                pass
+
+    def _start_http(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        aggregator = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = aggregator.collect().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            # Bound to loopback only: metrics never leave the machine
+            self._server = ThreadingHTTPServer(("127.0.0.1", self.port), _Handler)
+        except OSError as e:
+            log(f"Metrics endpoint disabled, could not bind 127.0.0.1:{self.port}: {e}", WARNING)
+            return
+        threading.Thread(target=self._server.serve_forever, name="urmom-metrics-http", daemon=True).start()
+        log(f"Metrics available at http://127.0.0.1:{self.port}/metrics")
+
+    def stop(self):
+        """Stops serving and removes the metrics directory. Call once the workers have exited."""
+        if self._stopped:
+            return
+        self._stopped = True
+        if self._server:
+            self._server.shutdown()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _remove_orphaned_dirs():
+    """Removes what controllers that crashed before stop() left in the temp directory."""
+    try:
+        import psutil
+    except ImportError:
+        return
+    root = tempfile.gettempdir()
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return
+    for name in names:
+        pid = name[len(DIR_PREFIX):]
+        if name.startswith(DIR_PREFIX) and pid.isdigit() and not psutil.pid_exists(int(pid)):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
@@ -15,3 +15,19 @@ def get_asset_path(filename):
         base_path = os.path.join(os.path.dirname(__file__), "..", "..", "assets")
 
     return os.path.join(base_path, filename)
+
+
+def get_data_path(filename):
+    """
+    Where a file urmom writes at runtime lives: URMOM_DATA_DIR if set, else
+    the per-user app data directory. Never the working directory.
+    """
+    base_path = os.environ.get("URMOM_DATA_DIR")
+    if not base_path:
+        if sys.platform == "win32":
+            root = os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", "AppData", "Local"))
+        else:
+            root = os.environ.get("XDG_DATA_HOME") or os.path.expanduser(os.path.join("~", ".local", "share"))
+        base_path = os.path.join(root, "urmom")
+    os.makedirs(base_path, exist_ok=True)
+    return os.path.join(base_path, filename)
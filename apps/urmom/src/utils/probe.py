@@ -0,0 +1,26 @@
+import json
+import os
+import time
+
+# Set by benchmarks/startup.py; every process in the tree inherits it.
+PROBE_FILE_ENV = "URMOM_PROBE_FILE"
+
+_path = os.environ.get(PROBE_FILE_ENV)
+_seen = set()
+
+
+def mark(event, **fields):
+    """
+    Records a startup milestone (first paint, first loop iteration, ...) for
+    the benchmark harness. Each event is recorded once per process, and the
+    call is a no-op unless URMOM_PROBE_FILE is set.
+    """
+    if not _path or event in _seen:
+        return
+    _seen.add(event)
+    record = {"event": event, "pid": os.getpid(), "t": time.time(), **fields}
+    try:
+        with open(_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
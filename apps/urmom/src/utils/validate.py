@@ -21,6 +21,14 @@ class Validation:
         else:
             raise ValueError("Input is not a non-empty list.")
         
+    @staticmethod
+    def validate_choice(value: Any, choices: List[str]) -> str:
+        """Check if the input is one of the allowed string values."""
+        if isinstance(value, str) and value in choices:
+            return value
+        else:
+            raise ValueError(f"Invalid value: {value}. Expected one of {', '.join(choices)}.")
+
     @staticmethod
     def validate_positive_int(input_int: Any) -> int:
         """Check if the input is a positive integer"""
@@ -0,0 +1,85 @@
+"""
+Entry points for the processes main.py spawns.
+
+Under the spawn start method a child re-imports main.py and then only the
+module that holds its target, so this module's top level must stay free of
+feature imports. Each loader imports just what its own process needs; the
+heavy pieces (PyQt6 dialogs, litellm) are imported by the features
+themselves on first use.
+"""
+
+from utils import probe, metrics
+
+
+def _load_mom():
+    from features.mom.mom import main
+
+    return main
+
+
+def _load_blacklist():
+    from features.windows_api.blacklist import main
+
+    return main
+
+
+def _load_lights_out():
+    from features.lights_out.manager import main
+
+    return main
+
+
+def _load_wyd():
+    from features.wyd.wyd import main
+
+    return main
+
+
+def _load_async_runtime():
+    from runtime import main
+
+    return main
+
+
+# Worker name -> loader, also used by benchmarks/import_report.py
+LOADERS = {
+    "mom": _load_mom,
+    "blacklist": _load_blacklist,
+    "lights_out": _load_lights_out,
+    "wyd": _load_wyd,
+    "async_runtime": _load_async_runtime,
+}
+
+
+def run_mom(command_queue, messages):
+    probe.mark("worker_start", worker="mom")
+    metrics.set_process_name("mom")
+    _load_mom()(command_queue, messages)
+
+
+def run_blacklist(blacklisted_processes, dev_mode, mom_queue, settings_inbox=None):
+    probe.mark("worker_start", worker="blacklist")
+    metrics.set_process_name("blacklist")
+    _load_blacklist()(blacklisted_processes, dev_mode, mom_queue, settings_inbox)
+
+
+def run_lights_out(start_str, end_str, dev_mode, mom_queue, settings_inbox=None):
+    probe.mark("worker_start", worker="lights_out")
+    metrics.set_process_name("lights_out")
+    _load_lights_out()(start_str, end_str, dev_mode, mom_queue, settings_inbox)
+
+
+def run_wyd(mom_queue, check_interval_minutes, settings_inbox=None):
+    probe.mark("worker_start", worker="wyd")
+    metrics.set_process_name("wyd")
+    _load_wyd()(mom_queue, check_interval_minutes, settings_inbox)
+
+
+def run_async_runtime(blacklisted_processes, dev_mode, lights_out_start, lights_out_end,
+                      screenshot_frequency_minutes, mom_queue, settings_inboxes=None):
+    probe.mark("worker_start", worker="async_runtime")
+    metrics.set_process_name("async_runtime")
+    _load_async_runtime()(
+        blacklisted_processes, dev_mode, lights_out_start, lights_out_end,
+        screenshot_frequency_minutes, mom_queue, settings_inboxes,
+    )